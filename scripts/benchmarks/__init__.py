@@ -0,0 +1,16 @@
+# scripts/benchmarks/__init__.py
+"""
+author: Sage Gendron
+Headless benchmarks for the Excel-driven workflows. Run from the scripts directory, ie:
+    python -m benchmarks.workflows
+
+The quote and smartsheet helper modules import their siblings by bare module name (as they do when xlwings adds their
+folders to the PYTHONPATH), so those folders are added to sys.path here.
+"""
+import os
+import sys
+
+scripts_dir: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _folder in ('quote', 'smartsheet_utils'):
+    if (_path := os.path.join(scripts_dir, _folder)) not in sys.path:
+        sys.path.append(_path)
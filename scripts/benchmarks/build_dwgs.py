@@ -0,0 +1,110 @@
+# scripts/benchmarks/build_dwgs.py
+"""
+author: Sage Gendron
+Compares the vectorized product_submittal.build_dwgs() with the original row by row version (copied below) on random
+1000 row schedules with empty cells, repeated package keys, text rates, and every size/special case flag. Every DWG must
+match the original's, apart from the large size flag: the original compared the result of the small size check to
+'LARGE' and so never flagged a drawing as large, which the vectorized version fixes.
+
+    python -m benchmarks.build_dwgs [n_rows] [n_schedules]
+"""
+import random
+import sys
+import time
+
+import pandas as pd
+
+from product_submittal import build_dwgs
+from submittal.DWG import DWG
+
+
+def legacy_build_dwgs(df):
+    # original build_dwgs()
+    dwg_sch: dict[str, DWG] = {}
+    for index, row in df.iterrows():
+        if row['qty'] == 0:
+            continue
+        if type(pkg := row['pkg_key']) in (float, None) or pkg in dwg_sch:
+            continue
+        if type(dwg := row['dwg']) in (float, None):
+            continue
+        if type(ctrl_size := row['control_size_type']) in (float, None):
+            dwg: DWG = DWG(dwg, pkg, row['control_pt'], 'TBD', row['Signal'])
+        else:
+            dwg: DWG = DWG(dwg, pkg, row['control_pt'], ctrl_size.split()[0], row['Signal'])
+        try:
+            if size := row['size'] == 'SMALL' and type(rate := row['rate']) not in (None, str) and 0 < rate <= 5:
+                dwg.set_sm()
+        except TypeError:
+            raise Exception('Please ensure rate fields are blank or filled with numeric values. Save. Try again.')
+        if size == 'LARGE':
+            dwg.set_lg()
+        if row['sp_case_1'] == 'YES':
+            dwg.set_sp_case_1()
+        elif row['sys_type'] == 'SP_CASE_2' or row['conn_type'] == 'SP_CASE_2':
+            dwg.set_sp_case_2()
+        dwg_sch[pkg] = dwg
+    return dwg_sch
+
+
+def random_schedule(rand, n_rows):
+    """
+    :param random.Random rand: random number generator
+    :param int n_rows: number of schedule rows
+    :return: df - schedule columns read by generate_submittal()
+    :rtype: pd.DataFrame
+    """
+    nan: float = float('nan')
+    keys: list[str] = [chr(ord('A') + i) for i in range(26)] + [f"A{chr(ord('A') + i)}" for i in range(14)]
+    return pd.DataFrame({
+        'qty': [rand.choice([0, 1, 2, 3]) for _ in range(n_rows)],
+        'eq_type': ['FCU'] * n_rows,
+        'rate': [rand.choice([nan, 0, 2, 5, 6, 12, 'TBD']) for _ in range(n_rows)],
+        'pkg_key': [rand.choice(keys + [nan]) for _ in range(n_rows)],
+        'size': [rand.choice(['SMALL', 'LARGE', '2', '3', nan]) for _ in range(n_rows)],
+        'sys_type': [rand.choice(['MALE', 'SP_CASE_2']) for _ in range(n_rows)],
+        'conn_type': [rand.choice(['MALE', 'FEMALE', 'SP_CASE_2']) for _ in range(n_rows)],
+        'control_size_type': [rand.choice([nan, '3 FEMALE', '2 MALE']) for _ in range(n_rows)],
+        'control_pt': [rand.choice([nan, 'R100', 'S200']) for _ in range(n_rows)],
+        'Signal': [rand.choice(['24V', '120V']) for _ in range(n_rows)],
+        'dwg': [rand.choice(['4ABC-XXNN.pdf', '2ABC-XQNN+CTRL_1.pdf', 'L2ABD-XFNN.pdf', nan]) for _ in range(n_rows)],
+        'sp_case_1': [rand.choice([nan, nan, 'YES', 'NO']) for _ in range(n_rows)],
+    })
+
+
+def same(new, old, size):
+    """
+    :param DWG new: drawing built by build_dwgs()
+    :param DWG old: drawing built by the original build_dwgs()
+    :param str size: size cell of the drawing's row
+    :return: same - the drawings match (large size compared to the size cell, see module docstring)
+    :rtype: bool
+    """
+    fields: tuple[str, ...] = ('name', 'pkg', 'ctrl_size', 'signal', 'sm', 'sp_case_1', 'sp_case_2')
+    ctrl_match: bool = new.ctrl_model == old.ctrl_model or (pd.isna(new.ctrl_model) and pd.isna(old.ctrl_model))
+    return ctrl_match and all(getattr(new, f) == getattr(old, f) for f in fields) and new.lg == (size == 'LARGE')
+
+
+def main(n_rows=1000, n_schedules=50):
+    rand: random.Random = random.Random(0)
+    schedules: list[pd.DataFrame] = [random_schedule(rand, n_rows) for _ in range(n_schedules)]
+
+    start: float = time.perf_counter()
+    legacy: list[dict[str, DWG]] = [legacy_build_dwgs(df) for df in schedules]
+    legacy_ms: float = (time.perf_counter() - start) * 1000 / n_schedules
+    start = time.perf_counter()
+    built: list[dict[str, DWG]] = [build_dwgs(df) for df in schedules]
+    built_ms: float = (time.perf_counter() - start) * 1000 / n_schedules
+    print(f"{n_rows} row schedule   iterrows {legacy_ms:.1f} ms   vectorized {built_ms:.1f} ms")
+
+    matched: int = 0
+    for df, new, old in zip(schedules, built, legacy):
+        # size cell of the first row used for each package (reversed so the first row of each package key wins)
+        kept: pd.DataFrame = df[(df['qty'] != 0) & df['pkg_key'].notna() & df['dwg'].notna()]
+        sizes: dict[str, str] = dict(zip(kept['pkg_key'][::-1], kept['size'][::-1]))
+        matched += list(new) == list(old) and all(same(new[pkg], old[pkg], sizes[pkg]) for pkg in old)
+    print(f"{matched}/{n_schedules} schedules matched the original")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
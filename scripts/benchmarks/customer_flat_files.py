@@ -0,0 +1,98 @@
+# scripts/benchmarks/customer_flat_files.py
+"""
+author: Sage Gendron
+Compares the xlwings (Range.copy) path of the customer quote/flat schedule generation with the Excel-free headless
+path. The xlwings path runs against the FakeBook here, so its numbers exclude real COM latency and understate the gap.
+Then checks the packing list extracted from the headless flat schedule resolves its direct references, and that a
+computed packing list cell the file has no calculated value for fails the extraction instead of coming out blank.
+
+    python -m benchmarks.customer_flat_files [n_rows] [repeats]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import openpyxl
+
+import customer_files
+from benchmarks.workflows import setup
+from utils.fake_book import FakeBook, as_caller
+from utils.xlsx_ranges import extract_sheet
+
+
+def timed(func, repeats, *args):
+    """
+    :param function func: function to time
+    :param int repeats: number of runs
+    :return: best - fastest run in milliseconds
+    :rtype: float
+    """
+    best: float = float('inf')
+    for _ in range(repeats):
+        start: float = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run_xlwings(entry_point, project):
+    """
+    Runs an xlwings entry point with a FakeBook of the project file as the calling workbook.
+
+    :param function entry_point: argument-less entry point normally called from Excel
+    :param str project: filepath of the project workbook
+    :return: None
+    """
+    with as_caller(FakeBook(project)):
+        entry_point()
+
+
+def sheet_contents(fname, sheet_name):
+    """
+    :param str fname: filepath of the workbook to read
+    :param str sheet_name: name of the sheet to read
+    :return: contents - dictionary of {cell coordinate: value} for all non-blank cells
+    :rtype: dict
+    """
+    ws = openpyxl.load_workbook(fname)[sheet_name]
+    return {c.coordinate: c.value for row in ws.iter_rows() for c in row if c.value is not None}
+
+
+def main(n_rows=1000, repeats=3):
+    with tempfile.TemporaryDirectory() as root:
+        project: str = setup(root, n_rows)
+
+        xl_quote: float = timed(run_xlwings, repeats, customer_files.generate_customer_quote, project)
+        hl_quote: float = timed(customer_files.generate_customer_quote_headless, repeats, project)
+        print(f"customer quote     xlwings/FakeBook {xl_quote:8.1f} ms   headless {hl_quote:8.1f} ms")
+
+        xl_sch: float = timed(run_xlwings, repeats, customer_files.generate_customer_schedule, project)
+        xl_contents: dict[str, ...] = sheet_contents(customer_files.rename(project, 'SCHEDULE', 'xlsx'), 'SCHEDULE')
+
+        hl_sch: float = timed(customer_files.generate_customer_schedule_headless, repeats, project)
+        hl_contents: dict[str, ...] = sheet_contents(customer_files.rename(project, 'SCHEDULE', 'xlsx'), 'SCHEDULE')
+        print(f"customer schedule  xlwings/FakeBook {xl_sch:8.1f} ms   headless {hl_sch:8.1f} ms")
+        print(f"flat schedule contents identical: {xl_contents == hl_contents}")
+
+        # the headless flat schedule has never been calculated by Excel, so only direct references can be resolved
+        flat: str = customer_files.rename(project, 'SCHEDULE', 'xlsx')
+        packing: str = os.path.join(root, 'PACKING LIST.xlsx')
+        extract_sheet(flat, 'PACKING LIST', packing)
+        extracted: dict[str, ...] = sheet_contents(packing, 'PACKING LIST')
+        print(f"packing list extracted, direct references resolved: "
+              f"{extracted.get('A2') is not None and extracted.get('A2') == hl_contents.get('D33')}")
+        edited: openpyxl.Workbook = openpyxl.load_workbook(flat)
+        edited['PACKING LIST']['C2'] = '=SUM(SCHEDULE!B33:B1032)'
+        edited.save(flat)
+        os.remove(packing)
+        try:
+            extract_sheet(flat, 'PACKING LIST', packing)
+            print('computed cell with no calculated value extracted')
+        except Exception as e:
+            print(f"computed cell with no calculated value rejected: {e} (packing list left behind: "
+                  f"{os.path.exists(packing)})")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
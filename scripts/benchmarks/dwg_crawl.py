@@ -0,0 +1,104 @@
+# scripts/benchmarks/dwg_crawl.py
+"""
+author: Sage Gendron
+Compares the original single-threaded os.walk drawing crawl with the pruned, parallel, incremental crawl in
+utils.list_dwgs on a synthetic drawing tree with large excluded subtrees, and checks both list the same drawings.
+Local disk listings are far cheaper than listings on the network share, so the gap here understates production.
+Finishes by resolving a drawing added since the drawing index was built (which re-crawls only its kit folder) and a
+drawing that doesn't exist (which is reported missing).
+
+    python -m benchmarks.dwg_crawl [n_folders] [n_files]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from utils import dwg_index, list_dwgs
+
+
+def legacy_list_files():
+    """
+    The original os.walk crawl (excluded folders are walked, then skipped by path substring).
+
+    :return: dwg_list - data structure containing dwg files, pdf files, and the paths to get to them
+    :rtype: list
+    """
+    dwg_list: list[list[str, str, str]] = [['path', 'dwg', 'pdf']]
+    for path, subdir, files in os.walk(list_dwgs.dwg_folder_loc):
+        if '_archive' in path.lower():
+            continue
+        if '_edgecase' in path.lower():
+            continue
+        if 'engineer-specific' in path.lower():
+            continue
+        for file in files:
+            if file.endswith('.pdf'):
+                dwg_list.append([path, f"{file[:-4]}.dwg", file])
+    return dwg_list
+
+
+def build_tree(root, n_folders, n_files):
+    """
+    :param str root: top level folder standing in for C:\\Estimating\\CAD Drawings
+    :param int n_folders: number of kit folders
+    :param int n_files: number of drawings per kit folder (each kit folder also has an _archive with 4x as many)
+    :return: None
+    """
+    f: int
+    for f in range(n_folders):
+        folder: str = os.path.join(root, 'Kits', f"TYPE {f % 4}", f"SERIES {f}")
+        for sub, count in ((folder, n_files), (os.path.join(folder, '_archive', 'old'), n_files * 4),
+                           (os.path.join(folder, 'Engineer-Specific'), n_files)):
+            os.makedirs(sub)
+            for n in range(count):
+                open(os.path.join(sub, f"{f}ABC-{n:03}.pdf"), 'wb').close()
+            open(os.path.join(sub, 'notes.txt'), 'wb').close()
+
+
+def timed(label, func, *args):
+    start: float = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<36}{(time.perf_counter() - start) * 1000:10.1f} ms   {len(result) - 1} drawings")
+    return result
+
+
+def main(n_folders=400, n_files=25):
+    with tempfile.TemporaryDirectory() as root:
+        list_dwgs.dwg_folder_loc = os.path.join(root, 'CAD Drawings')
+        list_dwgs.crawl_cache_loc = os.path.join(root, 'list_dwgs_crawl.msgpack')
+        build_tree(list_dwgs.dwg_folder_loc, n_folders, n_files)
+
+        legacy: list[list[str]] = timed('os.walk (original)', legacy_list_files)
+        cold: list[list[str]] = timed('scandir + threads (full)', list_dwgs.list_files, False)
+        warm: list[list[str]] = timed('scandir + threads (no changes)', list_dwgs.list_files)
+
+        # add a drawing to one folder and remove one from another
+        first: str = os.path.join(list_dwgs.dwg_folder_loc, 'Kits', 'TYPE 0', 'SERIES 0')
+        open(os.path.join(first, 'NEW-001.pdf'), 'wb').close()
+        os.remove(os.path.join(list_dwgs.dwg_folder_loc, 'Kits', 'TYPE 1', 'SERIES 1', '1ABC-000.pdf'))
+        changed: list[list[str]] = timed('scandir + threads (2 folders changed)', list_dwgs.list_files)
+
+        print(f"identical to os.walk: {legacy == cold == warm}; "
+              f"incremental matches os.walk after changes: {changed == legacy_list_files()}")
+
+        # count the folders listed while resolving drawings against the index
+        dwg_index.dwg_index_loc = os.path.join(root, 'dwg_index.msgpack')
+        dwg_index.build_index(changed)
+        listed: list[str] = []
+        scan_dir = list_dwgs.scan_dir
+        list_dwgs.scan_dir = lambda path, cached=None: listed.append(path) or scan_dir(path, cached)
+
+        kit: str = os.path.join(list_dwgs.dwg_folder_loc, 'Kits', 'TYPE 2')
+        open(os.path.join(kit, 'SERIES 2', 'NEW-002.pdf'), 'wb').close()
+        start: float = time.perf_counter()
+        found, missing = dwg_index.resolve(['NEW-002.pdf', '2ABC-000.pdf', 'GONE-001.pdf'],
+                                           {'NEW-002.pdf': kit, '2ABC-000.pdf': kit, 'GONE-001.pdf': kit})
+        print(f"resolve after a drawing was added: {(time.perf_counter() - start) * 1000:.1f} ms, "
+              f"{len(listed)} folders listed (all inside its kit folder: {all(p.startswith(kit) for p in listed)}), "
+              f"found {sorted(found)}, missing {missing}")
+        list_dwgs.scan_dir = scan_dir
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
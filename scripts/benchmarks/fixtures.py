@@ -0,0 +1,202 @@
+# scripts/benchmarks/fixtures.py
+"""
+author: Sage Gendron
+Builds synthetic project files, templates, drawings, and spec sheets shaped like the real estimating documents so the
+workflows can be benchmarked without access to the estimating share.
+"""
+import os
+
+import openpyxl
+from pdfrw import IndirectPdfDict, PdfDict, PdfName, PdfWriter
+
+# column layout of the synthetic SCHEDULE sheet (header row 32, data from row 33)
+schedule_columns: dict[str, str] = {
+    'A': '#', 'B': 'qty', 'C': 'eq_type', 'D': 'tag', 'E': 'rate', 'F': 'pkg_key', 'G': 'conn_size', 'H': 'size',
+    'I': 'sys_type', 'J': 'control_method', 'K': 'conn_type', 'L': 'control_type', 'M': 'engr_1', 'N': 'engr_component',
+    'O': 'engr_2', 'P': 'engr_3', 'Q': 'ctrl_note', 'R': 'ctrl_by', 'S': 'control_size_type', 'T': 'control_pt',
+    'U': 'ctrl_fx_1', 'V': 'ctrl_fx_2', 'W': 'prod_note', 'X': 'Signal', 'Y': 'signal', 'Z': 'dwg', 'AA': 'notes',
+    'AB': 'sp_case_1', 'AC': 'smart_notes'}
+# column layout of the synthetic QUOTE sheet (header row 13)
+quote_columns: dict[str, str] = {
+    'E': 'pkg qty', 'F': 'parts', 'G': 'qty', 'H': 'description', 'I': 'list price', 'J': 'multiplier',
+    'K': 'net price', 'L': 'pkg price'}
+
+# package templates cycled through when building schedule rows: (dwg, size, control_size_type, control_pt, engr)
+package_templates: list[tuple] = [
+    ('4ABC-XXNN.pdf', '2', None, None, 'AUX1-B'),
+    ('2ABC-XQNN+CTRL_1.pdf', '3', '3 FEMALE', 'R100', None),
+    ('4ABE-XXNN.pdf', '4', None, None, 'AUX2-D'),
+    ('3ABCD-XQNN+CTRL_2.pdf', '2', '2 MALE', 'S200', None),
+]
+spec_names: list[str] = ['A.pdf', 'A-SM.pdf', 'B.pdf', 'C.pdf', 'D.pdf', 'D-SM.pdf', 'E.pdf', 'F.pdf', 'R.pdf',
+                         'R-24.pdf', 'S.pdf', 'S-24.pdf']
+
+
+def pkg_keys(n):
+    """
+    :param int n: number of package keys
+    :return: package keys in quote order (A-Z, then AA-AN)
+    :rtype: list
+    """
+    keys: list[str] = [chr(ord('A') + i) for i in range(26)] + [f"A{chr(ord('A') + i)}" for i in range(14)]
+    return keys[:n]
+
+
+def build_project(path, n_rows=200, n_pkgs=20):
+    """
+    Writes a synthetic project workbook with a SCHEDULE and a QUOTE sheet.
+
+    :param str path: target filepath (must follow the PROJECT_FILENAME_QUOTENUM naming schema)
+    :param int n_rows: number of scheduled equipment rows (the schedule holds 999 after the bypass row)
+    :param int n_pkgs: number of package keys the rows are spread over (max 40)
+    :return: path - filepath written
+    :rtype: str
+    """
+    wb: openpyxl.Workbook = openpyxl.Workbook()
+    sch = wb.active
+    sch.title = 'SCHEDULE'
+    sch['D2'] = 1234567
+    sch['C19'] = 'SYNTHETIC JOB'
+    sch['G22'] = 'SO12345'
+    sch['C23'] = 'ACME MECHANICAL'
+    sch['C24'] = 'J. DOE'
+    for col, name in schedule_columns.items():
+        sch[f"{col}32"] = name
+
+    keys: list[str] = pkg_keys(n_pkgs)
+
+    # zero quantity bypass row with a text size keeps pandas from parsing the size column as numeric
+    for col, v in {'A': 0, 'B': 0, 'C': 'FCU', 'D': 'BYPASS-1', 'E': 0.0, 'F': keys[0], 'G': 'TBD', 'H': 'TBD',
+                   'I': 'MALE', 'K': 'MALE', 'X': '24V', 'Y': '24V', 'Z': 'SKIP'}.items():
+        sch[f"{col}33"] = v
+
+    i: int
+    for i in range(min(n_rows, 999)):
+        r: int = 34 + i
+        key: str = keys[i % len(keys)]
+        dwg, size, ctrl_size_type, ctrl_pt, engr = package_templates[keys.index(key) % len(package_templates)]
+        values: dict[str, ...] = {
+            'A': i + 1, 'B': 1 + i % 3, 'C': 'FCU', 'D': f"FCU-{i + 1}", 'E': 12.0, 'F': key, 'G': 'TBD', 'H': size,
+            'I': 'MALE', 'J': 'TYPE-2 PKG', 'K': 'MALE', 'L': None, 'N': engr, 'S': ctrl_size_type, 'T': ctrl_pt,
+            'X': '24V', 'Y': '24V', 'Z': dwg, 'AB': 'NO', 'AC': f"note {i}",
+            'M': f"=E{r}*2", 'O': f"=B{r}+1", 'P': f"=M{r}+O{r}", 'U': f"=T{r}", 'V': f"=X{r}"}
+        for col, v in values.items():
+            sch[f"{col}{r}"] = v
+
+    qte = wb.create_sheet('QUOTE')
+    for col, name in quote_columns.items():
+        qte[f"{col}13"] = name
+    qte['AB7'] = 'Sage Gendron'
+    qte['AA4'] = 10250.0
+    for n, key in enumerate(pkg_keys(40)):
+        header: int = 15 + n * 15
+        qte[f"F{header}"] = f"PACKAGE({key})"
+        qte[f"L{header}"] = 100.0 + n
+        for r in range(header + 1, header + 15):
+            qte[f"I{r}"] = 10.0
+            qte[f"K{r}"] = 5.0
+            qte[f"H{r}"] = f"=F{r}&\" \"&G{r}"
+
+    wb.create_sheet('list_dwgs')
+    wb.save(path)
+    return path
+
+
+def build_quote_template(path):
+    """
+    Writes a blank project template with the QUOTE sheet text and formula ranges clear_quote() restores.
+
+    :param str path: target filepath
+    :return: path - filepath written
+    :rtype: str
+    """
+    wb: openpyxl.Workbook = openpyxl.Workbook()
+    qte = wb.active
+    qte.title = 'QUOTE'
+    for col, name in quote_columns.items():
+        qte[f"{col}13"] = name
+    for n, key in enumerate(pkg_keys(40)):
+        header: int = 15 + n * 15
+        qte[f"F{header}"] = f"PACKAGE({key})"
+        for r in range(header + 1, header + 15):
+            qte[f"H{r}"] = f"=F{r}&\" \"&G{r}"
+            qte[f"K{r}"] = f"=I{r}*J{r}"
+        qte[f"L{header}"] = f"=SUMPRODUCT(G{header + 1}:G{header + 14},K{header + 1}:K{header + 14})*E{header}"
+    wb.save(path)
+    return path
+
+
+def build_customer_templates(quote_path, schedule_path):
+    """
+    Writes blank customer quote and flat schedule templates (the flat schedule includes a PACKING LIST sheet).
+
+    :param str quote_path: target filepath for the customer quote template
+    :param str schedule_path: target filepath for the flat schedule template
+    :return: None
+    """
+    wb: openpyxl.Workbook = openpyxl.Workbook()
+    wb.active.title = 'QUOTE'
+    wb.save(quote_path)
+
+    wb = openpyxl.Workbook()
+    wb.active.title = 'SCHEDULE'
+    packing = wb.create_sheet('PACKING LIST')
+    packing['A1'] = 'PACKING LIST'
+    for r in range(2, 42):
+        packing[f"A{r}"] = f"=SCHEDULE!D{r + 31}"
+        packing[f"B{r}"] = f"=SCHEDULE!B{r + 31}"
+    wb.save(schedule_path)
+
+
+def build_pdf(path, pages=1, label=None):
+    """
+    Writes a small text-only PDF (stands in for a drawing or spec sheet). Like the real drawings, every file embeds its
+    own copy of the same font and company title block (a form XObject), shared by the pages within the file.
+
+    :param str path: target filepath
+    :param int pages: number of pages to write
+    :param str label: text printed on each page, defaults to the file name
+    :return: path - filepath written
+    :rtype: str
+    """
+    label = label or os.path.basename(path)
+    font: PdfDict = IndirectPdfDict(Type=PdfName.Font, Subtype=PdfName.Type1, BaseFont=PdfName.Helvetica)
+    title_block: PdfDict = IndirectPdfDict(Type=PdfName.XObject, Subtype=PdfName.Form, BBox=[0, 0, 612, 792])
+    title_block.stream = ''.join(f"{x} 36 m {x} 108 l S\n" for x in range(36, 576, 2)) + '36 72 m 576 72 l S\n' * 60
+    writer: PdfWriter = PdfWriter()
+    n: int
+    for n in range(pages):
+        content: PdfDict = PdfDict()
+        content.stream = f"BT /F1 18 Tf 72 720 Td ({label} page {n + 1}) Tj ET\n" + '0 0 m 612 792 l S\n' * 200 + \
+            '/TB Do\n'
+        writer.addpage(PdfDict(Type=PdfName.Page, MediaBox=[0, 0, 612, 792], Contents=content,
+                               Resources=PdfDict(Font=PdfDict(F1=font), XObject=PdfDict(TB=title_block))))
+    writer.write(path)
+    return path
+
+
+def build_drawing_tree(root, n_pkgs=20):
+    """
+    Writes the drawing and spec sheet folders used by generate_submittal() under root.
+
+    :param str root: directory to build the trees in
+    :param int n_pkgs: number of package keys used in the synthetic project
+    :return:
+        - dwg_root - directory standing in for C:\\Estimating\\CAD Drawings
+        - spec_root - directory standing in for C:\\Estimating\\Specification Pages
+    :rtype: (str, str)
+    """
+    dwg_root: str = os.path.join(root, 'CAD Drawings')
+    spec_root: str = os.path.join(root, 'Specification Pages')
+    kit_dirs: dict[str, str] = {'4': 'TYPE 1', '2': 'TYPE 2', '3': 'TYPE 3', 'L': 'LARGE SIZE'}
+    for folder in list(kit_dirs.values()) + ['TYPE 1/_archive']:
+        os.makedirs(os.path.join(dwg_root, 'Kits', folder), exist_ok=True)
+    os.makedirs(spec_root, exist_ok=True)
+
+    for dwg, *_ in package_templates[:min(n_pkgs, len(package_templates))]:
+        build_pdf(os.path.join(dwg_root, 'Kits', kit_dirs[dwg[0]], dwg), pages=2)
+    build_pdf(os.path.join(dwg_root, 'Kits', 'TYPE 1', '_archive', package_templates[0][0]), pages=2)
+    for spec in spec_names:
+        build_pdf(os.path.join(spec_root, spec), pages=2)
+
+    return dwg_root, spec_root
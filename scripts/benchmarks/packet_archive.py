@@ -0,0 +1,106 @@
+# scripts/benchmarks/packet_archive.py
+"""
+author: Sage Gendron
+Builds a synthetic archive of jobs with several quote revisions each (every revision changes a few row quantities and
+drops a package), compacts it into the content-addressed packet archive, reports the space saved, and checks every
+packet is rebuilt identically by restore(). Then rewrites a packet with different rows and checks the archive keeps no
+objects a fresh archive wouldn't have, and truncates a packet and checks it is skipped, keeping its archived copy.
+
+    python -m benchmarks.packet_archive [n_jobs] [n_revisions]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import product_quote
+from benchmarks.workflows import setup
+from quote.packet import load_packet, package_quantities, packet_rows, write_packet
+from utils import packet_archive
+from utils.fake_book import FakeBook, as_caller
+from utils.warehouse import find_packets
+
+
+def build_revisions(root, n_jobs, n_revisions):
+    """
+    :param str root: working directory for the run
+    :param int n_jobs: number of job folders to create
+    :param int n_revisions: number of revisions per job (after the original quote)
+    :return: jobs - top level job folder
+    :rtype: str
+    """
+    project: str = setup(root, 999, 40)
+    with as_caller(FakeBook(project)):
+        product_quote.generate_quote()
+    packet: dict[str, ...] = load_packet(product_quote.rename(project, 'DATA', 'msgpack'))
+
+    jobs: str = os.path.join(root, 'Jobs')
+    rand: random.Random = random.Random(0)
+    i: int
+    for i in range(n_jobs):
+        rows: list[dict[str, ...]] = packet_rows(packet)
+        # unique tags per job so savings only come from rows shared between revisions of the same job
+        for row in rows:
+            row['tag'] = f"J{i}-{row['tag']}"
+        pkg_quantities: dict[str, float] = package_quantities(packet)
+        folder: str = os.path.join(jobs, f"JOB {i}")
+        os.makedirs(folder)
+        r: int
+        for r in range(n_revisions + 1):
+            revision: str = '' if r == 0 else f" R.{r}"
+            write_packet(os.path.join(folder, f"JOB {i}{revision}_DATA_Q{2000 + i}.msgpack"), rows, pkg_quantities)
+            # next revision: a handful of quantity changes and one dropped package
+            for row in rand.sample(rows, 5):
+                row['qty'] += 1
+                pkg_quantities[row['pkg_key']] += 1
+            dropped: str = rand.choice(sorted(pkg_quantities))
+            rows = [row for row in rows if row['pkg_key'] != dropped]
+            del pkg_quantities[dropped]
+    return jobs
+
+
+def main(n_jobs=20, n_revisions=4):
+    with tempfile.TemporaryDirectory() as root:
+        jobs: str = build_revisions(root, n_jobs, n_revisions)
+        db: str = os.path.join(root, 'packet_archive.sqlite')
+
+        start: float = time.perf_counter()
+        print(packet_archive.compact(jobs, db), f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        start = time.perf_counter()
+        print(packet_archive.compact(jobs, db), f"in {(time.perf_counter() - start) * 1000:.1f} ms (re-run)")
+
+        summary: dict[str, int] = packet_archive.report(db)
+        print(summary, f"({summary['archived bytes'] / summary['original bytes']:.1%} of original, "
+                       f"{os.path.getsize(db) / summary['original bytes']:.1%} counting SQLite page overhead)")
+
+        start = time.perf_counter()
+        packets: list[str] = find_packets(jobs)
+        identical: bool = all(packet_archive.restore(fname, db) == load_packet(fname) for fname in packets)
+        print(f"{len(packets)} packets restored identically: {identical} "
+              f"({(time.perf_counter() - start) * 1000 / len(packets):.1f} ms per restore)")
+
+        # the latest revision of a job rewritten with different rows replaces its manifest, leaving its earlier rows to
+        # be collected
+        latest: str = packets[max(n_revisions - 1, 0)]
+        revised: dict[str, ...] = load_packet(latest)
+        rows: list[dict[str, ...]] = packet_rows(revised)
+        for row in rows:
+            row['qty'] += 10
+        write_packet(latest, rows, package_quantities(revised))
+        print(packet_archive.compact(jobs, db), '(latest revision rewritten)')
+        fresh: str = os.path.join(root, 'fresh.sqlite')
+        packet_archive.compact(jobs, fresh)
+        print(f"objects {packet_archive.report(db)['objects']}, in a fresh archive "
+              f"{packet_archive.report(fresh)['objects']}, rewritten packet restored identically: "
+              f"{packet_archive.restore(latest, db) == load_packet(latest)}")
+
+        # a packet still being written is skipped, keeping its earlier archived copy
+        with open(packets[-1], 'r+b') as outfile:
+            outfile.truncate(os.path.getsize(packets[-1]) // 2)
+        before: dict[str, ...] = packet_archive.restore(packets[-1], db)
+        print(packet_archive.compact(jobs, db), '(one packet truncated)')
+        print(f"truncated packet's earlier copy kept: {packet_archive.restore(packets[-1], db) == before}")
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,119 @@
+# scripts/benchmarks/quote_data.py
+"""
+author: Sage Gendron
+Compares the vectorized salesorder.extract.quote_packages() with the original row by row quote_data() loop (copied
+below) on random quotes (40 packages of pkg_rows rows, 14 on the quote template) with zero quantity and zero price
+packages, keys past Z, repeated keys, blank and auxiliary parts, and rows before the first package. Every package must
+match the original's, apart from packages with a quantity but no package net: the original left the previous package
+open and added their parts to it, where the vectorized version skips them as intended (and as packet_data() does), so
+those packages are given a zero quantity before the original is run.
+
+    python -m benchmarks.quote_data [n_quotes] [pkg_rows]
+"""
+import random
+import sys
+import time
+
+import pandas as pd
+
+from salesorder.extract import quote_packages
+
+
+def legacy_quote_packages(df):
+    # original quote_data() after the quote is read
+    package_quantities: list[int] = df['pkg qty'].values.tolist()
+    part_numbers: list[str] = df['parts'].values.tolist()
+    part_quantities: list[int] = df['qty'].values.tolist()
+    part_prices: list[float] = df['net price'].values.tolist()
+    package_prices: list[float] = df['pkg price'].values.tolist()
+
+    part_dict: dict[str, list[str]] = {}
+    qty_dict: dict[str, list[int]] = {}
+    price_dict: dict[str, list[float]] = {}
+    current_pkg: str = ''
+    current_pkg_qty: int = 0
+    for pkg_qty, pt, pt_qty, pt_price, pkg_price in zip(
+            package_quantities, part_numbers, part_quantities, part_prices, package_prices):
+        if type(pt) is not float and pt.startswith('PACK'):
+            if pkg_qty == 0.0:
+                current_pkg = ''
+                current_pkg_qty = 0
+                continue
+            if pkg_price > 0.0:
+                current_pkg = pt[-2] if len(pt) == 10 else f"A{pt[-2]}"
+                current_pkg_qty = pkg_qty
+                part_dict[current_pkg]: list[str] = []
+                qty_dict[current_pkg]: list[int] = []
+                price_dict[current_pkg]: list[float] = []
+        elif current_pkg != '' and type(pt) is not float and pt != '' and pt[:4] not in ('AUX1', 'AUX2'):
+            part_dict[current_pkg].append(pt)
+            qty_dict[current_pkg].append(pt_qty * current_pkg_qty)
+            price_dict[current_pkg].append(pt_price)
+    return part_dict, qty_dict, price_dict
+
+
+def random_quote(rand, pkg_rows=14):
+    """
+    :param random.Random rand: random number generator
+    :param int pkg_rows: number of part rows under each package (14 on the quote template)
+    :return: df - quote columns read by quote_data(), after its dropna()
+    :rtype: pd.DataFrame
+    """
+    nan: float = float('nan')
+    keys: list[str] = [chr(ord('A') + i) for i in range(26)] + [f"A{chr(ord('A') + i)}" for i in range(14)]
+    rows: list[dict[str, ...]] = [{'pkg qty': nan, 'parts': 'PN-STRAY', 'qty': 1, 'description': 'stray',
+                                   'net price': 1.0, 'pkg price': nan}]
+    key: str
+    for key in keys:
+        # occasionally quote a key twice
+        key = rand.choice(keys) if rand.random() < 0.05 else key
+        rows.append({'pkg qty': rand.choice([0.0, 1.0, 2.0, 5.0, 0.0, nan]), 'parts': f"PACKAGE({key})",
+                     'qty': nan, 'description': f"PACKAGE {key}", 'net price': nan,
+                     'pkg price': rand.choice([0.0, 120.0, 355.5, 980.25, nan])})
+        for _ in range(pkg_rows):
+            rows.append({'pkg qty': nan, 'parts': rand.choice(['PN-100', 'PN-200', 'VLV-3', 'AUX1-B', 'AUX2-D', '',
+                                                               nan, nan]),
+                         'qty': rand.choice([1, 2, 4, nan]), 'description': 'part',
+                         'net price': rand.choice([5.0, 12.5, 40.0, nan]), 'pkg price': nan})
+    df: pd.DataFrame = pd.DataFrame(rows)
+    df.dropna(thresh=4, inplace=True)
+    return df
+
+
+def normalized(structures):
+    """
+    :param tuple structures: part, quantity, and price dictionaries
+    :return: structures - the same with NaN replaced by None, so missing values compare equal
+    :rtype: tuple
+    """
+    return tuple({key: [None if pd.isna(v) else v for v in values] for key, values in d.items()} for d in structures)
+
+
+def main(n_quotes=200, pkg_rows=14):
+    rand: random.Random = random.Random(0)
+    quotes: list[pd.DataFrame] = [random_quote(rand, pkg_rows) for _ in range(n_quotes)]
+
+    start: float = time.perf_counter()
+    legacy: list[tuple[dict, dict, dict]] = [legacy_quote_packages(df) for df in quotes]
+    legacy_ms: float = (time.perf_counter() - start) * 1000 / n_quotes
+    start = time.perf_counter()
+    built: list[tuple[dict, dict, dict]] = [quote_packages(df) for df in quotes]
+    built_ms: float = (time.perf_counter() - start) * 1000 / n_quotes
+    print(f"{len(quotes[0])} row quote   row loop {legacy_ms:.2f} ms   vectorized {built_ms:.2f} ms")
+
+    matched: int = 0
+    leaked: int = 0
+    for df, new, old in zip(quotes, built, legacy):
+        # zero the quantity of packages with no package net, so the original skips them (see module docstring)
+        fixed: pd.DataFrame = df.copy()
+        no_net: pd.Series = fixed['parts'].astype(object).str.startswith('PACK', na=False) & \
+            ~(fixed['pkg price'] > 0.0)
+        fixed.loc[no_net, 'pkg qty'] = 0.0
+        matched += normalized(new) == normalized(legacy_quote_packages(fixed))
+        leaked += normalized(old) != normalized(legacy_quote_packages(fixed))
+    print(f"{matched}/{n_quotes} quotes matched the original ({leaked} where the original added the parts of a "
+          f"package with no net to the package before it)")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,120 @@
+# scripts/benchmarks/sales_order_load.py
+"""
+author: Sage Gendron
+Loads synthetic sales orders into the SQLite stand-in for the order entry database with salesorder.load.load_lines()
+(one executemany() per order in a single transaction) and compares rows per second with upserting one row at a time,
+committing each row. Then checks the load is idempotent (re-loading changes no rows), that a revised, shorter order
+updates only its changed lines and removes the lines past its end, and that an order with a bad line is rolled back
+entirely. Finishes with generate_sales_order() loading a synthetic project's sales order, which reads the sales order
+number from the calling workbook in a single round trip.
+
+    python -m benchmarks.sales_order_load [n_orders] [n_lines]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import product_quote
+import sales_order
+from benchmarks.workflows import setup
+from salesorder import load
+from utils.fake_book import FakeBook, as_caller
+from utils.rename import rename
+
+
+def random_order(rand, n_lines):
+    """
+    :param random.Random rand: random number generator
+    :param int n_lines: number of sales order lines
+    :return: lines - (part number, quantity, net price) of each line
+    :rtype: list
+    """
+    return [(f"PN-{rand.randint(100, 999)}", float(rand.randint(1, 40)), round(rand.uniform(1, 500), 2))
+            for _ in range(n_lines)]
+
+
+def table(con):
+    """
+    :param sqlite3.Connection con: open connection
+    :return: rows - every sales order line, in order
+    :rtype: list
+    """
+    return con.execute('SELECT * FROM sales_order_lines ORDER BY so_number, line').fetchall()
+
+
+def main(n_orders=50, n_lines=500):
+    rand: random.Random = random.Random(0)
+    orders: dict[str, list[tuple]] = {f"SO{10000 + n}": random_order(rand, n_lines) for n in range(n_orders)}
+    n_rows: int = n_orders * n_lines
+
+    with tempfile.TemporaryDirectory() as root:
+        # one row at a time, each committed on its own
+        con: sqlite3.Connection = load.connect(os.path.join(root, 'row_by_row.sqlite'))
+        start: float = time.perf_counter()
+        so_number: str
+        lines: list[tuple]
+        for so_number, lines in orders.items():
+            for n, (pn, qty, net) in enumerate(lines, start=1):
+                con.execute(load.upsert_sql, (so_number, n, pn, qty, net, time.time()))
+                con.commit()
+        row_seconds: float = time.perf_counter() - start
+        con.close()
+
+        con = load.connect(os.path.join(root, 'sales_orders.sqlite'))
+        start = time.perf_counter()
+        stats: list[dict[str, ...]] = [load.load_lines(con, so_number, lines) for so_number, lines in orders.items()]
+        bulk_seconds: float = time.perf_counter() - start
+        print(f"{n_rows} lines in {n_orders} orders   row by row {n_rows / row_seconds:>10,.0f} rows/s   "
+              f"executemany {n_rows / bulk_seconds:>10,.0f} rows/s   "
+              f"(per order {min(s['rows_per_sec'] for s in stats):,.0f}-{max(s['rows_per_sec'] for s in stats):,.0f})")
+
+        # loading the same orders again changes nothing
+        loaded: list[tuple] = table(con)
+        stats = [load.load_lines(con, so_number, lines) for so_number, lines in orders.items()]
+        print(f"re-loaded: {sum(s['written'] for s in stats)} written, {sum(s['removed'] for s in stats)} removed, "
+              f"table unchanged: {table(con) == loaded}")
+
+        # a revised order: 5 lines changed and the last 20 lines dropped
+        so_number = next(iter(orders))
+        revised: list[tuple] = orders[so_number][:n_lines - 20]
+        for i in rand.sample(range(len(revised)), 5):
+            revised[i] = (revised[i][0], revised[i][1] + 1, revised[i][2])
+        result: dict[str, ...] = load.load_lines(con, so_number, revised)
+        print(f"revised order: {result['written']} written, {result['removed']} removed, lines now "
+              f"{con.execute('SELECT COUNT(*) FROM sales_order_lines WHERE so_number = ?', (so_number,)).fetchone()[0]}")
+
+        # a missing part number fails the whole order, leaving the lines loaded before it untouched
+        loaded = table(con)
+        try:
+            load.load_lines(con, so_number, [(pn, qty + 1, net) for pn, qty, net in revised] + [(None, 1.0, 1.0)])
+            print('bad line loaded')
+        except sqlite3.IntegrityError as e:
+            print(f"bad line rejected ({e}), table unchanged: {table(con) == loaded}")
+        con.close()
+
+        # generate_sales_order() writing the xlsx and loading the database
+        project: str = setup(root, 1000, 40)
+        load.sales_order_db_loc = os.path.join(root, 'project_sales_orders.sqlite')
+        sales_order.load_sales_order_db = True
+        book: FakeBook = FakeBook(project)
+        with as_caller(book):
+            product_quote.generate_quote()
+        book.save()
+        book = FakeBook(project)
+        start = time.perf_counter()
+        with as_caller(book):
+            result = sales_order.generate_sales_order()
+        elapsed: float = time.perf_counter() - start
+        con = load.connect()
+        db_lines: list[tuple] = [row[2:5] for row in table(con)]
+        con.close()
+        xlsx_lines: list[tuple] = load.read_lines(rename(project, 'SALES ORDER', 'xlsx'))
+        print(f"generate_sales_order: {elapsed * 1000:.0f} ms, {result['rows']} lines loaded at "
+              f"{result['rows_per_sec']:,.0f} rows/s with {sum(calls for calls, _ in book.stats.values())} Excel "
+              f"round trip(s), same as the xlsx: {db_lines == xlsx_lines}")
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
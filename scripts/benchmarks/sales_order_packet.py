@@ -0,0 +1,79 @@
+# scripts/benchmarks/sales_order_packet.py
+"""
+author: Sage Gendron
+Compares the Excel parsing path of the sales order extraction (schedule_data()/quote_data()) with the DATA packet path
+(packet_data()) on a synthetic quoted project, checks both produce the same sales order structures (also with an
+engineered component on a bypass row, which generate_quote() doesn't quote), checks a schedule edited after quoting has
+its engineered components read again, and checks an edited quote is detected as stale.
+
+    python -m benchmarks.sales_order_packet [n_rows] [n_pkgs]
+"""
+import sys
+import tempfile
+import time
+
+import openpyxl
+
+import product_quote
+import sales_order
+from benchmarks.workflows import setup
+from quote.packet import load_packet
+from salesorder.assign import engineered_components
+from salesorder.extract import packet_data, quote_data, schedule_data
+from utils.fake_book import FakeBook, as_caller
+
+
+def main(n_rows=1000, n_pkgs=40):
+    with tempfile.TemporaryDirectory() as root:
+        project: str = setup(root, n_rows, n_pkgs)
+        book: FakeBook = FakeBook(project)
+        with as_caller(book):
+            product_quote.generate_quote()
+        book.save()
+
+        wb: FakeBook = FakeBook(project)
+        start: float = time.perf_counter()
+        excel: tuple[dict, dict, dict] = engineered_components(schedule_data(wb), *quote_data(wb))
+        excel_ms: float = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        packet: tuple[dict, dict, dict] = engineered_components(
+            *packet_data(wb, load_packet(sales_order.find_packet(wb))))
+        packet_ms: float = (time.perf_counter() - start) * 1000
+
+        print(f"sales order extraction  excel {excel_ms:8.1f} ms   packet {packet_ms:8.1f} ms")
+        print(f"sales order structures identical: {excel == packet}")
+
+        # give the bypass row a quantity and an engineered component, then quote again
+        edited: openpyxl.Workbook = openpyxl.load_workbook(project)
+        edited['SCHEDULE']['B33'] = 2
+        edited['SCHEDULE']['N33'] = 'AUX1-BYPASS'
+        edited.save(project)
+        book = FakeBook(project)
+        with as_caller(book):
+            product_quote.generate_quote()
+        book.save()
+        wb = FakeBook(project)
+        excel = engineered_components(schedule_data(wb), *quote_data(wb))
+        packet = engineered_components(*packet_data(wb, load_packet(sales_order.find_packet(wb))))
+        print(f"sales order structures identical with a bypass row component: {excel == packet} "
+              f"(component included: {'AUX1-BYPASS' in packet[0][edited['SCHEDULE']['F33'].value]})")
+
+        # change an engineered component on the schedule after the quote was generated
+        edited = openpyxl.load_workbook(project)
+        edited['SCHEDULE']['N33'] = 'AUX2-BYPASS'
+        edited.save(project)
+        excel = engineered_components(schedule_data(wb), *quote_data(wb))
+        packet = engineered_components(*packet_data(wb, load_packet(sales_order.find_packet(wb))))
+        print(f"sales order structures identical with the schedule edited after quoting: {excel == packet} "
+              f"(edit included: {'AUX2-BYPASS' in packet[0][edited['SCHEDULE']['F33'].value]})")
+
+        # hand edit a quoted part quantity after the quote was generated
+        edited = openpyxl.load_workbook(project)
+        edited['QUOTE']['G16'] = 99
+        edited.save(project)
+        print(f"edited quote detected as stale: {packet_data(wb, load_packet(sales_order.find_packet(wb))) is None}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
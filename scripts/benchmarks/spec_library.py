@@ -0,0 +1,85 @@
+# scripts/benchmarks/spec_library.py
+"""
+author: Sage Gendron
+Builds a synthetic Specification Pages folder of n_sheets spec sheets, packs it into the consolidated spec library, and
+times loading a submittal's spec sheets in a new process from the individual pdfs (on the thread pool, no spec cache)
+vs from the library, with a fixed delay added to every pdf opened (latency_ms) to stand in for the network share.
+Checks the merged spec pages are identical either way and that an edited sheet is read from its own pdf.
+
+    python -m benchmarks.spec_library [n_sheets] [n_used] [latency_ms]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fixtures import build_pdf
+from benchmarks.submittal_merge import network_latency, page_digests
+from submittal import spec_library
+from submittal.merge import write_merged
+
+
+def load_ms(fnames, target, use_library):
+    """
+    :param list fnames: filepaths of the spec sheets to load
+    :param str target: filepath to write the merged spec sheets to
+    :param bool use_library: load from the spec library, else from the individual pdfs
+    :return: elapsed - milliseconds to load the spec sheets starting from a new process
+    :rtype: float
+    """
+    # a new process: nothing cached in memory
+    spec_library._sheets.clear()
+    spec_library._library = None
+    index_loc: str = spec_library.spec_library_index_loc
+    if not use_library:
+        spec_library.spec_library_index_loc = index_loc + '.missing'
+
+    start: float = time.perf_counter()
+    with ThreadPoolExecutor(8) as pool:
+        page_lists: list[list] = spec_library.load_sheets(fnames, pool)
+    elapsed: float = (time.perf_counter() - start) * 1000
+
+    spec_library.spec_library_index_loc = index_loc
+    write_merged(target, page_lists)
+    return elapsed
+
+
+def main(n_sheets=300, n_used=40, latency_ms=20):
+    with tempfile.TemporaryDirectory() as root:
+        spec_folder: str = os.path.join(root, 'Specification Pages')
+        os.makedirs(spec_folder)
+        spec_library.spec_library_loc = os.path.join(root, 'spec_library.pdf')
+        spec_library.spec_library_index_loc = os.path.join(root, 'spec_library.msgpack')
+        fnames: list[str] = [build_pdf(os.path.join(spec_folder, f"SPEC-{n:03}.pdf"), pages=1 + n % 3)
+                             for n in range(n_sheets)]
+
+        start: float = time.perf_counter()
+        index: dict[str, ...] = spec_library.build_library(spec_folder)
+        sources: int = sum(os.path.getsize(f) for f in fnames)
+        print(f"library built in {(time.perf_counter() - start) * 1000:.0f} ms: {len(index['sheets'])} sheets, "
+              f"{sources / 1024:.0f} KB of pdfs -> {index['size'] / 1024:.0f} KB")
+
+        # every nth sheet, so the pages used are spread across the library
+        used: list[str] = fnames[::max(1, n_sheets // n_used)][:n_used]
+        files: str = os.path.join(root, 'files.pdf')
+        library: str = os.path.join(root, 'library.pdf')
+        with network_latency(latency_ms):
+            files_ms: float = load_ms(used, files, False)
+            library_ms: float = load_ms(used, library, True)
+        print(f"{len(used)} spec sheets, +{latency_ms} ms/pdf   individual pdfs {files_ms:.1f} ms   "
+              f"library {library_ms:.1f} ms")
+        print(f"pages identical: {page_digests(files) == page_digests(library)}")
+
+        # edit one sheet after the library was built: it is read from its own pdf until the library is rebuilt
+        build_pdf(used[0], pages=1, label='revised')
+        os.utime(used[0], (time.time() + 1, time.time() + 1))
+        spec_library._library = None
+        spec_library._sheets.clear()
+        read: int = spec_library.stats['read']
+        spec_library.load_sheets(used)
+        print(f"edited sheet read from its own pdf: {spec_library.stats['read'] - read == 1}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:4]])
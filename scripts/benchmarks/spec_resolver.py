@@ -0,0 +1,138 @@
+# scripts/benchmarks/spec_resolver.py
+"""
+author: Sage Gendron
+Compares submittal.spec.resolve_specs() with the original per-variant spec functions (copied below) on random synthetic
+schedules. The spec sheets chosen must match exactly; controls sheets are compared as sets per drawing since the
+original returned them in set order, and the original only kept the controls of the last drawing with controls.
+
+    python -m benchmarks.spec_resolver [n_drawings] [n_schedules]
+"""
+import random
+import sys
+import time
+
+from submittal.DWG import DWG
+from submittal.spec import controls, resolve_specs
+
+
+def legacy_lg_spec(dwg_parts, spec_list_lg):
+    # original lg_spec()
+    names: dict[str, str] = {c: f"{c}-LG.pdf" for c in 'ABCDEF'}
+    for char in dwg_parts[0]:
+        if char in 'ABCDE' and names[char] not in spec_list_lg:
+            spec_list_lg.append(names[char])
+    if names['B'] not in spec_list_lg:
+        spec_list_lg.append(names['B'])
+    if dwg_parts[1][1] == 'F' and names['F'] not in spec_list_lg:
+        spec_list_lg.append(names['F'])
+    return spec_list_lg
+
+
+def legacy_typ_spec(dwg_parts, is_sm, spec_list):
+    # original typ_spec()
+    for char in dwg_parts[0]:
+        if char in 'AD':
+            name: str = f"{char}-SM.pdf" if is_sm else f"{char}.pdf"
+            if name not in spec_list:
+                spec_list.append(name)
+        elif char in 'BCE' and f"{char}.pdf" not in spec_list:
+            spec_list.append(f"{char}.pdf")
+    if dwg_parts[1][2] == 'F' and 'F.pdf' not in spec_list:
+        spec_list.append('F.pdf')
+    return spec_list
+
+
+def legacy_sp_case(dwg_parts, spec_list, case):
+    # original sp_case_1()/sp_case_2() (identical apart from the filename suffix)
+    for char in dwg_parts[0]:
+        if char in 'ABCDE' and f"{char}-{case}.pdf" not in spec_list:
+            spec_list.append(f"{char}-{case}.pdf")
+    if dwg_parts[1][2] == 'F' and f"F-{case}.pdf" not in spec_list:
+        spec_list.append(f"F-{case}.pdf")
+    return spec_list
+
+
+def legacy_resolve(dwgs):
+    """
+    :param list dwgs: DWG objects in submittal order
+    :return:
+        - spec_list - standard/special case then large size spec sheets, as the original generate_submittal() built them
+        - controls_sets - set of controls spec sheets for each drawing with controls
+    :rtype: (list, list)
+    """
+    spec_list: list[str] = []
+    spec_list_lg: list[str] = []
+    controls_sets: list[set[str]] = []
+    for dwg in dwgs:
+        parts: list[str] = dwg.parts()
+        if dwg.lg:
+            spec_list_lg = legacy_lg_spec(parts, spec_list_lg)
+        elif dwg.sp_case_2:
+            spec_list = legacy_sp_case(parts, spec_list, 'SP2')
+        elif dwg.sp_case_1:
+            spec_list = legacy_sp_case(parts, spec_list, 'SP1')
+        else:
+            spec_list = legacy_typ_spec(parts, dwg.sm, spec_list)
+        if type(dwg.ctrl_model) not in (None, float):
+            controls_sets.append(set(controls(parts[1], dwg.ctrl_model, dwg.ctrl_size, dwg.signal)))
+    return spec_list + spec_list_lg, controls_sets
+
+
+def random_dwgs(rand, n):
+    """
+    :param random.Random rand: random number generator
+    :param int n: number of drawings
+    :return: dwgs - DWG objects with random drawing codes, variants, and controls
+    :rtype: list
+    """
+    dwgs: list[DWG] = []
+    for i in range(n):
+        lg: bool = rand.random() < 0.2
+        components: str = ''.join(sorted(rand.sample('ABCDEG', rand.randint(1, 4))))
+        aux: str = rand.choice('FX')
+        ctrl: str = rand.choice(['', '+CTRL_1', '+CTRL_2'])
+        if lg:
+            name: str = f"L{rand.randint(1, 4)}{components}-X{aux}NN{ctrl}.pdf"
+        else:
+            name = f"{rand.randint(1, 4)}{components}-XX{aux}NN{ctrl}.pdf"
+        ctrl_model: str | float = float('nan')
+        if ctrl:
+            ctrl_model = rand.choice('RY' if ctrl == '+CTRL_1' else 'ST') + '100'
+        dwg: DWG = DWG(name, f"P{i}", ctrl_model, '1', rand.choice(['24V', '120V']))
+        if lg:
+            dwg.set_lg()
+        elif rand.random() < 0.3:
+            dwg.set_sm()
+        if rand.random() < 0.1:
+            dwg.set_sp_case_1()
+        elif rand.random() < 0.1:
+            dwg.set_sp_case_2()
+        dwgs.append(dwg)
+    return dwgs
+
+
+def main(n_dwgs=40, n_schedules=500):
+    rand: random.Random = random.Random(0)
+    schedules: list[list[DWG]] = [random_dwgs(rand, n_dwgs) for _ in range(n_schedules)]
+
+    start: float = time.perf_counter()
+    legacy: list[tuple[list, list]] = [legacy_resolve(dwgs) for dwgs in schedules]
+    legacy_ms: float = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    resolved: list[list[str]] = [resolve_specs(dwgs) for dwgs in schedules]
+    resolved_ms: float = (time.perf_counter() - start) * 1000
+    print(f"{n_schedules} schedules x {n_dwgs} drawings   original {legacy_ms:.1f} ms   resolver {resolved_ms:.1f} ms")
+
+    matched: int = 0
+    dropped: int = 0
+    for (spec_list, controls_sets), specs in zip(legacy, resolved):
+        # every drawing's controls, first called for first (the original kept only the last drawing's)
+        controls_list: list[str] = list(dict.fromkeys(s for c in controls_sets for s in sorted(c)))
+        specs_controls: list[str] = specs[len(spec_list):]
+        matched += specs[:len(spec_list)] == spec_list and sorted(specs_controls) == sorted(controls_list)
+        dropped += len(controls_list) - len(controls_sets[-1] if controls_sets else ())
+    print(f"{matched}/{n_schedules} schedules matched; {dropped} controls spec sheets the original dropped")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,89 @@
+# scripts/benchmarks/submittal_job.py
+"""
+author: Sage Gendron
+Runs the background submittal job (submittal.job.run()) on a synthetic project while polling its status file the way
+the workbook does, printing each distinct status seen, then runs it again and cancels it once drawings are resolved.
+Finally deletes a drawing the project uses and checks the job still writes the submittal and reports the drawing
+missing in its status, and that generate_submittal() names it in the exception shown in Excel.
+
+The job runs on a thread of this process rather than in a worker process from job.start(), as the synthetic folders are
+set up by patching module globals (see benchmarks.workflows.setup()) which a new process wouldn't see.
+
+    python -m benchmarks.submittal_job [n_rows] [n_pkgs]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import product_submittal
+from benchmarks.fixtures import package_templates
+from benchmarks.workflows import setup
+from submittal import job
+from utils.fake_book import FakeBook, as_caller
+
+
+def poll(project, worker, on_status=None):
+    """
+    :param str project: filepath of the project file
+    :param threading.Thread worker: thread running the job
+    :param function on_status: optional function called with each new status
+    :return: seen - distinct statuses read while the job ran, with the milliseconds since polling started
+    :rtype: list
+    """
+    seen: list[tuple[float, dict]] = []
+    start: float = time.perf_counter()
+    while True:
+        running: bool = worker.is_alive()
+        status: dict[str, ...] | None = job.read_status(project)
+        if status is not None and (not seen or status['updated'] != seen[-1][1]['updated']):
+            seen.append(((time.perf_counter() - start) * 1000, status))
+            if on_status is not None:
+                on_status(status)
+        if not running:
+            return seen
+        time.sleep(0.002)
+
+
+def main(n_rows=200, n_pkgs=20):
+    with tempfile.TemporaryDirectory() as root:
+        project: str = setup(root, n_rows, n_pkgs)
+
+        worker: threading.Thread = threading.Thread(target=job.run, args=(project,))
+        worker.start()
+        ms: float
+        status: dict[str, ...]
+        for ms, status in poll(project, worker):
+            print(f"{ms:8.1f} ms  {status['state']:<10}{status.get('stage', ''):<20}"
+                  f"drawings {status['drawings_resolved']}/{status['drawings_total']}   "
+                  f"pages {status['pages_merged']:<5}bytes {status['bytes_written']}")
+        print(f"submittal written: {os.path.getsize(status['target'])} bytes")
+
+        # cancel as soon as the drawings are resolved
+        os.remove(status['target'])
+        worker = threading.Thread(target=job.run, args=(project,))
+        worker.start()
+        seen: list[tuple[float, dict]] = poll(
+            project, worker, lambda s: s['state'] == 'running' and s['drawings_resolved'] and
+            not os.path.exists(job.cancel_path(project)) and job.cancel(project))
+        final: dict[str, ...] = seen[-1][1]
+        print(f"cancelled after {seen[-1][0]:.1f} ms: state {final['state']}, stage {final['stage']}, "
+              f"submittal written: {os.path.exists(final['target'])}, flag cleared: "
+              f"{not os.path.exists(job.cancel_path(project))}")
+
+        # a drawing that doesn't exist is left out of the submittal and reported
+        os.remove(os.path.join(product_submittal.dir_3, package_templates[-1][0]))
+        final = job.run(project)
+        print(f"drawing deleted: state {final['state']}, submittal written: {os.path.exists(final['target'])}, "
+              f"drawings {final['drawings_resolved']}/{final['drawings_total']}, missing {final['missing_drawings']}")
+        try:
+            with as_caller(FakeBook(project)):
+                product_submittal.generate_submittal()
+            print('drawing deleted: generate_submittal() raised nothing')
+        except Exception as e:
+            print(f"drawing deleted: generate_submittal() raised: {e}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,79 @@
+# scripts/benchmarks/submittal_memory.py
+"""
+author: Sage Gendron
+Measures peak Python memory (tracemalloc) of writing a submittal of n drawings with write_merged() (every page held
+until the file is written) vs write_streamed() (each drawing written as it is read) for growing submittal sizes, and
+checks both write the same pages. Finishes with a streamed product_submittal.concat() of the largest size.
+
+    python -m benchmarks.submittal_memory [largest n_dwgs]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pdfrw import PdfReader
+
+import product_submittal
+from benchmarks.fixtures import build_pdf
+from benchmarks.submittal_merge import page_digests
+from submittal import fragments, sources, spec_library
+from submittal.DWG import DWG
+from submittal.merge import write_merged, write_streamed
+
+
+def measure(func, *args):
+    """
+    :param function func: function writing a pdf
+    :return:
+        - peak - peak traced memory while func ran in MB
+        - elapsed - milliseconds func took (slowed by tracing)
+    :rtype: (float, float)
+    """
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    func(*args)
+    elapsed: float = (time.perf_counter() - start) * 1000
+    peak: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024, elapsed
+
+
+def main(n_max=800):
+    with tempfile.TemporaryDirectory() as root:
+        dwgs: list[str] = [build_pdf(os.path.join(root, f"4ABC-XX{n:03}.pdf"), pages=2) for n in range(n_max)]
+        sizes: list[int] = [n for n in (n_max // 16, n_max // 4, n_max) if n]
+
+        print(f"{'drawings':>9}{'merged MB':>12}{'streamed MB':>14}{'merged ms':>12}{'streamed ms':>14}  same pages")
+        n: int
+        for n in sizes:
+            merged: str = os.path.join(root, f"merged_{n}.pdf")
+            streamed: str = os.path.join(root, f"streamed_{n}.pdf")
+            merged_mb, merged_ms = measure(lambda: write_merged(merged, [PdfReader(f).pages for f in dwgs[:n]]))
+            streamed_mb, streamed_ms = measure(lambda: write_streamed(streamed, (PdfReader(f).pages
+                                                                                 for f in dwgs[:n])))
+            print(f"{n:>9}{merged_mb:>12.1f}{streamed_mb:>14.1f}{merged_ms:>12.0f}{streamed_ms:>14.0f}  "
+                  f"{page_digests(merged) == page_digests(streamed)}")
+
+        # concat() switches to the streaming writer past stream_above drawings
+        product_submittal.spec_loc = os.path.join(root, 'Specification Pages')
+        spec_library.spec_library_index_loc = os.path.join(root, 'spec_library.msgpack')
+        fragments.fragment_cache_loc = os.path.join(root, 'submittal_fragments')
+        sources.source_index_loc = os.path.join(root, 'submittal_sources.sqlite')
+        os.makedirs(product_submittal.spec_loc)
+        build_pdf(os.path.join(product_submittal.spec_loc, 'A.pdf'), pages=2)
+        dwg_dict: dict[str, DWG] = {}
+        for i, fpath in enumerate(dwgs):
+            # package keys past AN, so every drawing is appended after the lettered drawings
+            dwg: DWG = DWG(os.path.basename(fpath), f"Z{chr(ord('Z') + i)}", None, 'TBD', None)
+            dwg.set_fpath(fpath)
+            dwg_dict[dwg.pkg] = dwg
+        project: str = os.path.join(root, 'JOB_PROJECT_Q1001.xlsm')
+        concat_mb, concat_ms = measure(product_submittal.concat, project, dwg_dict, ['A.pdf'])
+        pages: int = len(PdfReader(os.path.join(root, 'JOB_SUBMITTAL_Q1001.pdf')).pages)
+        print(f"concat, {len(dwgs)} drawings (streamed): {concat_mb:.1f} MB peak, {concat_ms:.0f} ms, {pages} pages")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,248 @@
+# scripts/benchmarks/submittal_merge.py
+"""
+author: Sage Gendron
+Times product_submittal.concat() on a synthetic 40 drawing submittal against the original concat (a fresh PdfReader
+for every drawing and spec sheet, merged without deduplication or compression), compares file sizes, and checks every
+page of the submittal has the same (decompressed) content and resources as the original.
+
+Opening a pdf on the network share is dominated by latency that local disk doesn't have, so the sequential vs parallel
+loading comparison is also run with a fixed delay added to every pdf read (latency_ms).
+
+Finally, submittals are stitched from the fragment cache (see submittal.fragments): cold, warm, with one drawing
+revised, and with a byte budget small enough to force evictions. Then several processes (forked, so they see the
+synthetic folders) cache fragments of different drawings at once, and every fragment written must end up in the index.
+
+    python -m benchmarks.submittal_merge [n_dwgs] [spec_pages] [latency_ms]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from pdfrw import PdfDict, PdfReader, PdfWriter
+
+import product_submittal
+from benchmarks.fixtures import build_pdf, pkg_keys, spec_names
+from submittal import fragments, sources, spec_library
+from submittal.DWG import DWG
+from submittal.merge import _digest, copy_pages
+from utils.rename import rename
+
+
+def legacy_concat(wb, dwg_dict, spec_list):
+    """
+    The original concat(): drawings in package key order, then spec sheets, each parsed from the pdf every time.
+
+    :param str wb: filepath of the project file
+    :param dict dwg_dict: dictionary of package keys: DWG objects with filepaths
+    :param list spec_list: list of spec sheet filenames in order of occurrence
+    :return: None - file is written
+    """
+    merger: PdfWriter = PdfWriter()
+    dwg_list: list[None] = [None] * 40
+    for pkg, dwg in dwg_dict.items():
+        i: int = ord(pkg[1]) - ord('A') + 26 if len(pkg) > 1 else ord(pkg) - ord('A')
+        if dwg.fpath not in dwg_list:
+            dwg_list[i] = dwg.fpath
+    for dwg in dwg_list:
+        if dwg is not None:
+            merger.addpages(PdfReader(dwg).pages)
+    for pdf in spec_list:
+        merger.addpages(PdfReader(os.path.join(product_submittal.spec_loc, pdf)).pages)
+    merger.write(rename(wb, 'SUBMITTAL', 'pdf'))
+
+
+def build_inputs(root, n_dwgs, spec_pages):
+    """
+    :param str root: working directory for the run
+    :param int n_dwgs: number of drawings (one per package key, max 40)
+    :param int spec_pages: number of pages per spec sheet
+    :return:
+        - project - filepath standing in for the project file
+        - dwg_dict - dictionary of package keys: DWG objects with filepaths
+        - spec_list - list of spec sheet filenames
+    :rtype: (str, dict, list)
+    """
+    product_submittal.spec_loc = os.path.join(root, 'Specification Pages')
+    fragments.fragment_cache_loc = os.path.join(root, 'submittal_fragments')
+    sources.source_index_loc = os.path.join(root, 'submittal_sources.sqlite')
+    spec_library.spec_library_loc = os.path.join(root, 'spec_library.pdf')
+    spec_library.spec_library_index_loc = os.path.join(root, 'spec_library.msgpack')
+    os.makedirs(product_submittal.spec_loc)
+    os.makedirs(os.path.join(root, 'Kits'))
+
+    dwg_dict: dict[str, DWG] = {}
+    n: int
+    for n, key in enumerate(pkg_keys(n_dwgs)):
+        dwg: DWG = DWG(f"4ABC-XX{n:02}.pdf", key, None, 'TBD', None)
+        dwg.set_fpath(build_pdf(os.path.join(root, 'Kits', dwg.name), pages=2))
+        dwg_dict[key] = dwg
+    for spec in spec_names:
+        build_pdf(os.path.join(product_submittal.spec_loc, spec), pages=spec_pages)
+
+    return os.path.join(root, 'JOB_PROJECT_Q1001.xlsm'), dwg_dict, list(spec_names)
+
+
+@contextmanager
+def network_latency(latency_ms):
+    """
+    Adds a fixed delay to every pdf file opened by concat() (drawings, spec sheets, fragments, and the spec library) to
+    stand in for a network share. Pages parsed from contents already in memory are not delayed.
+
+    :param int latency_ms: delay per pdf read in milliseconds
+    """
+    def slow_reader(*args, **kwargs):
+        if 'fdata' not in kwargs:
+            time.sleep(latency_ms / 1000)
+        return PdfReader(*args, **kwargs)
+
+    def slow_open(*args, **kwargs):
+        time.sleep(latency_ms / 1000)
+        return open(*args, **kwargs)
+
+    product_submittal.PdfReader = fragments.PdfReader = spec_library.PdfReader = slow_reader
+    # spec sheets outside the library are read into memory with open() (see spec_library.load_pages())
+    spec_library.open = slow_open
+    try:
+        yield
+    finally:
+        product_submittal.PdfReader = fragments.PdfReader = spec_library.PdfReader = PdfReader
+        del spec_library.open
+
+
+def page_digests(fname):
+    """
+    :param str fname: filepath of a submittal
+    :return: digests - content hash of each page's decompressed content streams, resources, and media box
+    :rtype: list
+    """
+    return [_digest(PdfDict(Contents=page.Contents, Resources=page.inheritable.Resources,
+                            MediaBox=page.inheritable.MediaBox), {}, set())
+            for page in PdfReader(fname, decompress=True).pages]
+
+
+def timed(label, func, *args):
+    """
+    :param str label: label for the printed timing
+    :param function func: function writing the submittal
+    :return: digests - page digests of the submittal written (see page_digests())
+    :rtype: list
+    """
+    start: float = time.perf_counter()
+    func(*args)
+    elapsed: float = time.perf_counter() - start
+    target: str = rename(args[0], 'SUBMITTAL', 'pdf')
+    print(f"{label:<40}{elapsed * 1000:10.1f} ms{os.path.getsize(target) / 1024:10.0f} KB")
+    return page_digests(target)
+
+
+def spec_load_ms(load, spec_list, repeats=5):
+    """
+    :param function load: function returning the pages of a spec sheet filepath
+    :param list spec_list: list of spec sheet filenames
+    :param int repeats: number of runs
+    :return: best - fastest time to load the pages of every spec sheet in milliseconds
+    :rtype: float
+    """
+    best: float = float('inf')
+    for _ in range(repeats):
+        start: float = time.perf_counter()
+        for pdf in spec_list:
+            load(os.path.join(product_submittal.spec_loc, pdf))
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def cache_drawings(fpaths):
+    """
+    :param list fpaths: filepaths of drawings to cache the fragments of, in a worker process
+    :return: None - fragments are written and the index flushed
+    """
+    fpath: str
+    for fpath in fpaths:
+        fragments.drawing_pages(fpath)
+        fragments.flush()
+
+
+def main(n_dwgs=40, spec_pages=8, latency_ms=20):
+    with tempfile.TemporaryDirectory() as root:
+        project, dwg_dict, spec_list = build_inputs(root, n_dwgs, spec_pages)
+
+        # spec sheet loading alone, as drawings and the write dominate concat() on these small synthetic pdfs
+        # (every object is resolved, as merging does, since pdfrw parses lazily)
+        parse_ms: float = spec_load_ms(lambda f: copy_pages(PdfReader(f).pages), spec_list)
+        spec_load_ms(spec_library.load_pages, spec_list, 1)
+        memory_ms: float = spec_load_ms(spec_library.load_pages, spec_list)
+        print(f"spec sheet loading  read + parse {parse_ms:.1f} ms   parsed page cache + copy {memory_ms:.2f} ms")
+
+        # full submittals starting from empty caches, merging from the source pdfs every run
+        product_submittal.use_fragment_cache = False
+        spec_library._sheets.clear()
+        legacy: list[bytes] = timed('original concat', legacy_concat, project, dwg_dict, spec_list)
+        product_submittal.dedupe_resources = product_submittal.compress_streams = False
+        plain: list[bytes] = timed('concat (no dedupe, no compression)', product_submittal.concat, project, dwg_dict,
+                                   spec_list)
+        product_submittal.dedupe_resources = True
+        deduped: list[bytes] = timed('concat (dedupe)', product_submittal.concat, project, dwg_dict, spec_list)
+        product_submittal.compress_streams = True
+        cold: list[bytes] = timed('concat (dedupe + compression)', product_submittal.concat, project, dwg_dict,
+                                  spec_list)
+        memory: list[bytes] = timed('concat (parsed spec page cache)', product_submittal.concat, project, dwg_dict,
+                                    spec_list)
+        print(f"{len(legacy)} pages identical to original: {legacy == plain == deduped == cold == memory}")
+
+        # sequential vs thread pool loading with every pdf parsed (no spec cache) behind network latency
+        workers: int = product_submittal.pdf_workers
+        results: list[list[bytes]] = []
+        with network_latency(latency_ms):
+            for product_submittal.pdf_workers in (1, workers):
+                spec_library._sheets.clear()
+                results.append(timed(f"concat, {product_submittal.pdf_workers} worker(s), +{latency_ms} ms/pdf",
+                                     product_submittal.concat, project, dwg_dict, spec_list))
+        product_submittal.pdf_workers = workers
+        print(f"pages identical to original: {all(r == legacy for r in results)}")
+
+        # stitched from fragments: every fragment merged, every fragment cached (in a new process, then in the same
+        # process), all behind the same network latency as above
+        product_submittal.use_fragment_cache = True
+        with network_latency(latency_ms):
+            results = [timed(f"fragments (cold), +{latency_ms} ms/pdf", product_submittal.concat, project, dwg_dict,
+                             spec_list)]
+            fragments._index = None
+            results.append(timed(f"fragments (new process), +{latency_ms} ms/pdf", product_submittal.concat, project,
+                                 dwg_dict, spec_list))
+            results.append(timed(f"fragments (same process), +{latency_ms} ms/pdf", product_submittal.concat, project,
+                                 dwg_dict, spec_list))
+            # one drawing revised: only its fragment is merged again
+            revised: DWG = next(iter(dwg_dict.values()))
+            build_pdf(revised.fpath, pages=2, label=f"{revised.name} rev 1")
+            os.utime(revised.fpath, (time.time() + 1, time.time() + 1))
+            timed(f"fragments (1 drawing revised), +{latency_ms} ms/pdf", product_submittal.concat, project, dwg_dict,
+                  spec_list)
+        print(f"pages identical to original: {all(r == legacy for r in results)}   {fragments.report()}")
+
+        # a byte budget holding about half the fragments: the least recently used are evicted
+        fragments.fragment_cache_bytes = fragments.report()['bytes'] // 2
+        timed('fragments (half size budget)', product_submittal.concat, project, dwg_dict, spec_list)
+        print(fragments.report())
+        timed('fragments (half size budget, again)', product_submittal.concat, project, dwg_dict, spec_list)
+        print(fragments.report())
+
+        # processes flushing the index at the same time each merge into it rather than overwriting each other's
+        fragments.fragment_cache_bytes = 512 * 1024 * 1024
+        shutil.rmtree(fragments.fragment_cache_loc)
+        fragments._index = None
+        fpaths: list[str] = [dwg.fpath for dwg in dwg_dict.values()]
+        with ProcessPoolExecutor(4) as pool:
+            list(pool.map(cache_drawings, [fpaths[i::4] for i in range(4)]))
+        fragments._index = None
+        cached: int = len([f for f in os.listdir(fragments.fragment_cache_loc) if f.endswith('.pdf')])
+        print(f"4 processes caching {len(fpaths)} drawings: {cached} fragments written, "
+              f"{fragments.report()['fragments']} indexed, {fragments.report()['misses']} misses counted")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:4]])
@@ -0,0 +1,94 @@
+# scripts/benchmarks/submittal_output.py
+"""
+author: Sage Gendron
+Output report for linearized submittals: writes a synthetic submittal with product_submittal.concat() with and without
+linearize_output and reports file size, the bytes a viewer must download before it can show the first page (the whole
+file for a regular pdf, the first page section given by the linearization dictionary otherwise), and the resulting
+first page latency over a connection of the given speed and round trip time. Then checks a submittal written by the
+streaming writer is left unlinearized, and that a failed linearization leaves the pdf as it was, with no temporary file.
+
+    python -m benchmarks.submittal_output [n_dwgs] [mbps] [rtt_ms]
+"""
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+import pikepdf
+
+import product_submittal
+from benchmarks.submittal_merge import build_inputs, page_digests
+from submittal.merge import linearize
+from utils.rename import rename
+
+
+def first_page_bytes(fname):
+    """
+    :param str fname: filepath of a pdf
+    :return: first_page - bytes from the start of the file needed to show the first page
+    :rtype: int
+    """
+    with open(fname, 'rb') as infile:
+        head: bytes = infile.read(1024)
+    # the linearization dictionary is the first object of a linearized file; /E is the end of the first page section
+    if (found := re.search(rb'/Linearized.*?/E (\d+)', head, re.S)) is not None:
+        return int(found.group(1))
+    return os.path.getsize(fname)
+
+
+def main(n_dwgs=40, mbps=10, rtt_ms=50):
+    with tempfile.TemporaryDirectory() as root:
+        project, dwg_dict, spec_list = build_inputs(root, n_dwgs, 8)
+        target: str = rename(project, 'SUBMITTAL', 'pdf')
+
+        print(f"{'output':<14}{'write ms':>10}{'size KB':>10}{'first page KB':>15}{'first page ms':>15}  "
+              f"(at {mbps} Mbit/s, {rtt_ms} ms round trip)")
+        results: dict[str, str] = {}
+        for label, linearized in (('regular', False), ('linearized', True)):
+            product_submittal.linearize_output = linearized
+            start: float = time.perf_counter()
+            product_submittal.concat(project, dwg_dict, spec_list)
+            elapsed: float = (time.perf_counter() - start) * 1000
+            results[label] = shutil.copyfile(target, os.path.join(root, f"{label}.pdf"))
+
+            size: int = os.path.getsize(target)
+            first: int = first_page_bytes(target)
+            latency: float = rtt_ms + first * 8 / (mbps * 1000)
+            print(f"{label:<14}{elapsed:>10.0f}{size / 1024:>10.0f}{first / 1024:>15.1f}{latency:>15.0f}")
+
+        with pikepdf.open(results['linearized']) as pdf:
+            print(f"linearization valid: {pdf.is_linearized and pdf.check_linearization()}   "
+                  f"pages identical: {page_digests(results['regular']) == page_digests(results['linearized'])}")
+
+        # over stream_above drawings the submittal is streamed and not linearized
+        stream_above: int = product_submittal.stream_above
+        product_submittal.stream_above = n_dwgs - 1
+        product_submittal.concat(project, dwg_dict, spec_list)
+        product_submittal.stream_above = stream_above
+        with pikepdf.open(target) as pdf:
+            print(f"streamed submittal linearized: {pdf.is_linearized}")
+
+        # a save failing partway through (here, no room for the rewrite) leaves the original
+        with open(target, 'rb') as infile:
+            original: bytes = infile.read()
+        save = pikepdf.Pdf.save
+
+        def failing_save(pdf, fname, *args, **kwargs):
+            with open(fname, 'wb') as outfile:
+                outfile.write(b'%PDF-1.7 partial')
+            raise OSError('No space left on device')
+
+        pikepdf.Pdf.save = failing_save
+        try:
+            linearize(target)
+        except OSError as e:
+            print(f"failed linearization ({e}): original kept: {open(target, 'rb').read() == original}, temporary "
+                  f"files left: {[f for f in os.listdir(root) if f.endswith('.tmp')]}")
+        finally:
+            pikepdf.Pdf.save = save
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:4]])
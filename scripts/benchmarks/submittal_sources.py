@@ -0,0 +1,116 @@
+# scripts/benchmarks/submittal_sources.py
+"""
+author: Sage Gendron
+Builds submittals for a set of synthetic projects (each using a different subset of the drawings), then revises a
+drawing and a spec sheet and checks submittal.sources finds exactly the submittals built from them, that touching a
+file without changing it finds none, and that regenerate() rebuilds only the affected submittals, in parallel, faster
+than building them one after the other when every pdf read is delayed to stand in for the network share (latency_ms).
+Then deletes a project file and regenerates, revises a spec sheet and rebuilds just one of its projects (only the others
+must remain affected), and builds a submittal with the index unreachable (the submittal must still be written).
+
+Worker processes see the synthetic folders patched in by benchmarks.workflows.setup() as they are forked from this
+process (run on Linux; on Windows workers are spawned and would read the real locations).
+
+    python -m benchmarks.submittal_sources [n_projects] [workers] [latency_ms]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.fixtures import build_pdf, build_project, package_templates
+from benchmarks.submittal_merge import network_latency
+from benchmarks.workflows import setup
+from product_submittal import build_submittal
+from submittal import sources
+from utils.rename import rename
+
+
+def check(label, found, expected):
+    """
+    :param str label: description of the change
+    :param dict found: output of sources.affected()
+    :param list expected: project filepaths expected to be affected
+    :return: None - prints the result
+    """
+    print(f"{label:<44}{len(found):>3} affected   expected {len(expected):>3}   match {sorted(found) == sorted(expected)}")
+
+
+def main(n_projects=12, workers=4, latency_ms=20):
+    with tempfile.TemporaryDirectory() as root:
+        setup(root, 40, len(package_templates))
+        sources.source_index_loc = os.path.join(root, 'submittal_sources.sqlite')
+
+        # project i uses the first 1 + i % 4 drawings
+        projects: list[str] = [build_project(os.path.join(root, f"JOB{i}_PROJECT_Q{1000 + i}.xlsm"), 40,
+                                             1 + i % len(package_templates)) for i in range(n_projects)]
+        start: float = time.perf_counter()
+        project: str
+        for project in projects:
+            build_submittal(project)
+        sequential_ms: float = (time.perf_counter() - start) * 1000
+        print(f"{n_projects} submittals built one after the other: {sequential_ms:.0f} ms")
+
+        start = time.perf_counter()
+        check('nothing changed (full scan)', sources.affected(), [])
+        print(f"full scan: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        # revise the last drawing, used only by projects with every package
+        dwg_root: str = os.path.join(root, 'CAD Drawings', 'Kits', 'TYPE 3')
+        revised: str = build_pdf(os.path.join(dwg_root, package_templates[-1][0]), pages=2, label='REV B')
+        users: list[str] = projects[len(package_templates) - 1::len(package_templates)]
+        check('drawing revised', sources.affected([revised]), users)
+        check('drawing revised (full scan)', sources.affected(), users)
+
+        # touching a file without changing its contents is not a change
+        os.utime(os.path.join(root, 'Specification Pages', 'A.pdf'))
+        check('spec sheet touched', sources.affected([os.path.join(root, 'Specification Pages', 'A.pdf')]), [])
+
+        before: dict[str, float] = {p: os.path.getmtime(rename(p, 'SUBMITTAL', 'pdf')) for p in projects}
+        start = time.perf_counter()
+        results: dict[str, dict | None] = sources.regenerate(list(sources.affected()), workers)
+        regen_ms: float = (time.perf_counter() - start) * 1000
+        rebuilt: list[str] = [p for p in projects if os.path.getmtime(rename(p, 'SUBMITTAL', 'pdf')) != before[p]]
+        print(f"regenerated {len(results)} in {regen_ms:.0f} ms with {workers} workers "
+              f"({sequential_ms / n_projects * len(results):.0f} ms one after the other), all done: "
+              f"{all(s['state'] == 'done' for s in results.values())}, only affected rebuilt: {rebuilt == users}")
+        check('after regenerating', sources.affected(), [])
+
+        # a spec sheet used by every project, revised twice to regenerate every submittal one at a time then in
+        # parallel, with a delay on every pdf read standing in for the network share
+        spec: str = os.path.join(root, 'Specification Pages', 'A.pdf')
+        revision: str
+        for revision, n_workers in (('REV C', 1), ('REV D', workers)):
+            build_pdf(spec, pages=3, label=revision)
+            with network_latency(latency_ms):
+                start = time.perf_counter()
+                results = sources.regenerate(list(sources.affected([spec])), n_workers)
+            print(f"spec sheet revised: regenerated {len(results)} in {(time.perf_counter() - start) * 1000:.0f} ms "
+                  f"with {n_workers} worker(s) at {latency_ms} ms per pdf read")
+
+        # a project deleted since its submittal was built is dropped rather than rebuilt
+        os.remove(projects[0])
+        build_pdf(spec, pages=2, label='REV E')
+        results = sources.regenerate(list(sources.affected()), workers)
+        print(f"project deleted: dropped {sum(s is None for s in results.values())}, rebuilt "
+              f"{sum(s is not None for s in results.values())}, still recorded: "
+              f"{projects[0] in sources.affected([spec])}")
+
+        # rebuilding one project after a revision leaves only the others built from the older version
+        build_pdf(spec, pages=2, label='REV F')
+        build_submittal(projects[1])
+        check('spec sheet revised, 1 rebuilt', sources.affected([spec]), projects[2:])
+        check('spec sheet revised, 1 rebuilt (full scan)', sources.affected(), projects[2:])
+
+        # an index that can't be opened is reported without failing the submittal already written
+        index_loc: str = sources.source_index_loc
+        sources.source_index_loc = os.path.join(root, 'unreachable', 'submittal_sources.sqlite')
+        target: str = rename(projects[1], 'SUBMITTAL', 'pdf')
+        os.remove(target)
+        build_submittal(projects[1])
+        sources.source_index_loc = index_loc
+        print(f"index unreachable: submittal written: {os.path.exists(target)}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:4]])
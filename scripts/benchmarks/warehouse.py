@@ -0,0 +1,101 @@
+# scripts/benchmarks/warehouse.py
+"""
+author: Sage Gendron
+Builds a synthetic archive of job folders from one generated quote (each job quotes a random subset of its packages),
+then times a full ingest into the estimate warehouse, an incremental re-ingest, and the query API. Finishes by
+truncating one packet and checking the ingest skips it, keeping its prior copy, while still loading a new packet.
+
+    python -m benchmarks.warehouse [n_jobs]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import product_quote
+from benchmarks.workflows import setup
+from quote.packet import load_packet, package_quantities, packet_rows, write_packet
+from utils import warehouse
+from utils.fake_book import FakeBook, as_caller
+
+
+def build_archive(root, n_jobs):
+    """
+    :param str root: working directory for the run
+    :param int n_jobs: number of job folders to create
+    :return: jobs - top level job folder
+    :rtype: str
+    """
+    project: str = setup(root)
+    with as_caller(FakeBook(project)):
+        product_quote.generate_quote()
+    packet: dict[str, ...] = load_packet(product_quote.rename(project, 'DATA', 'msgpack'))
+    rows: list[dict[str, ...]] = packet_rows(packet)
+    pkg_quantities: dict[str, float] = package_quantities(packet)
+
+    jobs: str = os.path.join(root, 'Jobs')
+    rand: random.Random = random.Random(0)
+    i: int
+    for i in range(n_jobs):
+        keep: set[str] = set(rand.sample(sorted(pkg_quantities), rand.randint(1, len(pkg_quantities))))
+        folder: str = os.path.join(jobs, f"JOB {i}")
+        os.makedirs(folder)
+        write_packet(os.path.join(folder, f"JOB {i}_DATA_Q{2000 + i}.msgpack"),
+                     [r for r in rows if r['pkg_key'] in keep], {k: q for k, q in pkg_quantities.items() if k in keep})
+    return jobs
+
+
+def timed(label, func, *args):
+    start: float = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<28}{(time.perf_counter() - start) * 1000:10.1f} ms   {result if type(result) is dict else ''}")
+    return result
+
+
+def main(n_jobs=500):
+    with tempfile.TemporaryDirectory() as root:
+        jobs: str = build_archive(root, n_jobs)
+        db: str = os.path.join(root, 'warehouse.sqlite')
+
+        timed('full ingest', warehouse.ingest, jobs, db)
+        timed('re-ingest (no changes)', warehouse.ingest, jobs, db)
+        # touch one packet without changing it, overwrite a second with the first's contents, and delete a third
+        first, second, third = warehouse.find_packets(jobs)[:3]
+        os.utime(first)
+        with open(first, 'rb') as infile:
+            data: bytes = infile.read()
+        with open(second, 'wb') as outfile:
+            outfile.write(data)
+        os.remove(third)
+        timed('re-ingest (changed)', warehouse.ingest, jobs, db)
+
+        con = warehouse.connect(db)
+        part: str = con.execute('SELECT part_number FROM package_parts LIMIT 1').fetchone()[0]
+        con.close()
+        used: list[tuple] = timed(f"jobs_using_part({part})", warehouse.jobs_using_part, part, db)
+        kits: list[tuple] = timed('common_kits_by_size()', warehouse.common_kits_by_size, None, 3, db)
+        print(f"{len(used)} jobs used {part}; most common kits:")
+        for kit in kits:
+            print('   ', kit)
+
+        # a truncated packet is skipped (keeping the warehouse's copy of it) without losing the rest of the ingest
+        first, second = warehouse.find_packets(jobs)[:2]
+        with open(first, 'rb') as infile:
+            data = infile.read()
+        with open(first, 'wb') as outfile:
+            outfile.write(data[:len(data) // 2])
+        added: str = os.path.join(os.path.dirname(second), 'JOB COPY_DATA_Q9999.msgpack')
+        with open(second, 'rb') as infile, open(added, 'wb') as outfile:
+            outfile.write(infile.read())
+        counts: dict[str, int] = timed('re-ingest (truncated)', warehouse.ingest, jobs, db)
+        con = warehouse.connect(db)
+        kept: int = con.execute('SELECT COUNT(*) FROM packets WHERE path = ?', (first,)).fetchone()[0]
+        loaded: int = con.execute('SELECT COUNT(*) FROM packets WHERE path = ?', (added,)).fetchone()[0]
+        con.close()
+        print(f"truncated packet skipped: {counts['failed'] == 1}, prior copy kept: {kept == 1}, "
+              f"new packet loaded: {loaded == 1}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
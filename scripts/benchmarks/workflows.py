@@ -0,0 +1,136 @@
+# scripts/benchmarks/workflows.py
+"""
+author: Sage Gendron
+Runs each Excel entry point headless against a synthetic project file (see benchmarks.fixtures) and prints wall time
+plus per-operation call counts/timings recorded by the FakeBook and the worst Excel round trip call sites.
+
+Each entry point runs against a round trip budget (round_trip_budgets below) and the run fails with
+RoundTripBudgetExceeded if a change adds Excel calls. Lower the budget when a change removes calls.
+
+Smartsheet entry points are not included as they require a live Smartsheet server.
+
+    python -m benchmarks.workflows [n_rows] [n_pkgs]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import customer_files
+import product_quote
+import product_submittal
+import sales_order
+from benchmarks.fixtures import build_customer_templates, build_drawing_tree, build_project, build_quote_template
+from quote import io as quote_io
+from salesorder import load
+from submittal import fragments, sources, spec_library
+from utils import dwg_index, list_dwgs
+from utils.com_profiler import ComProfile, ProfiledBook
+from utils.fake_book import FakeBook, as_caller
+
+# maximum Excel range round trips per entry point for the default synthetic project (200 rows, 20 packages)
+round_trip_budgets: dict[str, int] = {
+    'generate_quote': 80,
+    'generate_quote (revision)': 81,
+    'generate_submittal': 0,
+    'generate_sales_order': 0,
+    'generate_sales_order (database load)': 1,
+    'generate_customer_quote': 1,
+    'generate_customer_schedule': 9,
+    'csr_file_copy': 2,
+}
+
+
+def setup(root, n_rows=200, n_pkgs=20):
+    """
+    Builds all synthetic files in root and points the entry point modules' location globals at them.
+
+    :param str root: working directory for the run
+    :param int n_rows: number of scheduled equipment rows
+    :param int n_pkgs: number of package keys
+    :return: project - filepath of the synthetic project workbook
+    :rtype: str
+    """
+    project: str = build_project(os.path.join(root, 'JOB_PROJECT_Q1001.xlsm'), n_rows, n_pkgs)
+
+    quote_io.quote_template_loc = build_quote_template(os.path.join(root, 'Project Template.xlsm'))
+    quote_io.quote_snapshot_loc = os.path.join(root, 'Project Template QUOTE.json')
+
+    customer_files.quote_template = os.path.join(root, 'Quote Template.xlsx')
+    customer_files.schedule_template = os.path.join(root, 'Schedule Template.xlsx')
+    customer_files.prod_order_loc = os.path.join(root, 'New Orders')
+    build_customer_templates(customer_files.quote_template, customer_files.schedule_template)
+
+    dwg_root, spec_root = build_drawing_tree(root, n_pkgs)
+    product_submittal.spec_loc = spec_root
+    fragments.fragment_cache_loc = os.path.join(root, 'submittal_fragments')
+    sources.source_index_loc = os.path.join(root, 'submittal_sources.sqlite')
+    spec_library.spec_library_loc = os.path.join(root, 'spec_library.pdf')
+    spec_library.spec_library_index_loc = os.path.join(root, 'spec_library.msgpack')
+    product_submittal.dir_1 = os.path.join(dwg_root, 'Kits', 'TYPE 1')
+    product_submittal.dir_2 = os.path.join(dwg_root, 'Kits', 'TYPE 2')
+    product_submittal.dir_3 = os.path.join(dwg_root, 'Kits', 'TYPE 3')
+    product_submittal.dir_l = os.path.join(dwg_root, 'Kits', 'LARGE SIZE')
+    list_dwgs.dwg_folder_loc = dwg_root
+    list_dwgs.crawl_cache_loc = os.path.join(root, 'list_dwgs_crawl.msgpack')
+    dwg_index.dwg_index_loc = os.path.join(root, 'dwg_index.msgpack')
+    load.sales_order_db_loc = os.path.join(root, 'sales_orders.sqlite')
+
+    return project
+
+
+def run(name, entry_point, project, enforce_budget=True):
+    """
+    Runs a single entry point with a FakeBook of the project file as the calling workbook and prints its timings.
+
+    :param str name: label for the printed report
+    :param function entry_point: argument-less entry point normally called from Excel
+    :param str project: filepath of the project workbook
+    :param bool enforce_budget: fail the run if the entry point exceeds its round trip budget
+    :return: book - the FakeBook used as the calling workbook
+    :rtype: FakeBook
+    """
+    book: FakeBook = FakeBook(project)
+    profiled: ProfiledBook = ProfiledBook(book, ComProfile(round_trip_budgets.get(name) if enforce_budget else None))
+    start: float = time.perf_counter()
+    with as_caller(profiled) as headless:
+        entry_point()
+    elapsed: float = time.perf_counter() - start
+
+    print(f"\n== {name}: {elapsed * 1000:.1f} ms")
+    print(profiled.profile.summary())
+    print(book.report())
+    for other in headless.opened:
+        print(f"-- {os.path.basename(other.fullname)}")
+        print(other.report())
+    return book
+
+
+def main(n_rows=200, n_pkgs=20):
+    with tempfile.TemporaryDirectory() as root:
+        project: str = setup(root, n_rows, n_pkgs)
+        # budgets are sized for the default synthetic project only
+        enforce: bool = (n_rows, n_pkgs) == (200, 20)
+
+        # the quote is saved back to the project file so downstream workflows read the generated quote
+        book: FakeBook = run('generate_quote', product_quote.generate_quote, project, enforce)
+        book.save()
+
+        # revisions reset the quote sheet from the template snapshot before quoting
+        revision: str = shutil.copyfile(project, project.replace('.xlsm', ' R.1.xlsm'))
+        run('generate_quote (revision)', product_quote.generate_quote, revision, enforce)
+
+        run('generate_submittal', product_submittal.generate_submittal, project, enforce)
+        run('generate_sales_order', sales_order.generate_sales_order, project, enforce)
+        # loading the database also reads the sales order number from the schedule
+        sales_order.load_sales_order_db = True
+        run('generate_sales_order (database load)', sales_order.generate_sales_order, project, enforce)
+        sales_order.load_sales_order_db = False
+        run('generate_customer_quote', customer_files.generate_customer_quote, project, enforce)
+        run('generate_customer_schedule', customer_files.generate_customer_schedule, project, enforce)
+        run('csr_file_copy', customer_files.csr_file_copy, project, enforce)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
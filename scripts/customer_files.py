@@ -3,11 +3,16 @@
 author: Sage Gendron
 Handles copying template files and copying required information from automated Excel workbooks to 'flat' Excel files for
 customer/engineer consumption.
+
+The *_headless variants produce the same files from the saved project file without an Excel instance (ie on a Linux
+worker) by streaming the source ranges once and writing the copied template in a single save.
 """
 import xlwings as xw
 import os
 import shutil
+from utils.com_profiler import profile, write_summary
 from utils.rename import rename
+from utils.xlsx_ranges import extract_sheet, read_ranges, write_ranges
 
 # IMMUTABLE GLOBAL VARIABLES USED FOR EASE IN UPDATING; THIS IS NOT BEST PRACTICE
 # Template file locations
@@ -42,7 +47,7 @@ def copy_customer_quote_file(wb):
     """
     Copies blank flat quote file to active/calling workbook directory with correct naming scheme.
 
-    :param xlwings.Book wb: calling filepath/filename to be modified
+    :param xlwings.Book | str wb: calling workbook (or its filepath) with filename to be modified
     :return: target - filepath/filename of copied customer quote template
     :rtype: str
     """
@@ -62,11 +67,11 @@ def generate_customer_quote():
     :return: None
     """
     # instantiate Book instance to interact with Excel
-    wb: xw.Book = xw.Book.caller()
+    wb: xw.Book = profile(xw.Book.caller())
 
     # copy customer quote template and create Book instance for customer quote
     customer_quote_fname: str = copy_customer_quote_file(wb)
-    wb_cq: xw.Book = xw.Book(customer_quote_fname)
+    wb_cq: xw.Book = profile(xw.Book(customer_quote_fname), wb)
 
     # copy only active quote cell text (not formulas) to new customer quote file
     wb.sheets['QUOTE'].range(internal_quote_range).copy(wb_cq.sheets['QUOTE'].range(customer_quote_range))
@@ -74,13 +79,36 @@ def generate_customer_quote():
     # saves file, but DOES NOT close it, so customer quote print area can be adjusted if required
     wb_cq.save()
 
+    # write Excel round trip summary if profiling was requested
+    write_summary(wb)
+
+
+def generate_customer_quote_headless(fullname):
+    """
+    Excel-free version of generate_customer_quote(). Reads the calculated (cached) quote values from the saved project
+    file and writes them into a copy of the customer quote template.
+
+    :param str fullname: filepath of the saved project file
+    :return: customer_quote_fname - filepath of the generated customer quote
+    :rtype: str
+    """
+    # copy customer quote template next to the project file
+    customer_quote_fname: str = copy_customer_quote_file(fullname)
+
+    # read only active quote cell text (not formulas) and write it to the new customer quote file in one save
+    grids: dict[str, list[list]] = read_ranges(fullname, 'QUOTE', [internal_quote_range], data_only=True)
+    write_ranges(customer_quote_fname, 'QUOTE',
+                 [(internal_quote_range, customer_quote_range, grids[internal_quote_range])])
+
+    return customer_quote_fname
+
 
 def copy_customer_schedule_file(wb):
     """
     Copies customer schedule template to the same directory as the calling workbook.
     This will purposefully throw an error if the file does not use the standardized naming scheme.
 
-    :param xlwings.Book wb: as a parameter, calling workbook filepath
+    :param xlwings.Book | str wb: as a parameter, calling workbook (or its filepath)
     :return: target - filepath of newly copied flat schedule file
     :rtype: str
     """
@@ -104,12 +132,12 @@ def generate_customer_schedule():
     :return: None - saves file in folder
     """
     # instantiate Book instance to interact with Excel
-    wb: xw.Book = xw.Book.caller()
+    wb: xw.Book = profile(xw.Book.caller())
     smart_schedule = wb.sheets['SCHEDULE']
 
     # copy flat quote file and create xw instance for quote
     customer_schedule: str = copy_customer_schedule_file(wb)
-    wb_fs: xw.Book = xw.Book(customer_schedule)
+    wb_fs: xw.Book = profile(xw.Book(customer_schedule), wb)
     dest_schedule = wb_fs.sheets['SCHEDULE']
 
     # copy text only fields
@@ -135,6 +163,34 @@ def generate_customer_schedule():
     # save file, but DO NOT close, so schedule can be filtered
     wb_fs.save()
 
+    # write Excel round trip summary if profiling was requested
+    write_summary(wb)
+
+
+def generate_customer_schedule_headless(fullname):
+    """
+    Excel-free version of generate_customer_schedule(). Reads all text and formula ranges from the saved project file
+    in one pass and writes them into a copy of the flat schedule template in one save.
+
+    :param str fullname: filepath of the saved project file
+    :return: customer_schedule - filepath of the generated flat schedule
+    :rtype: str
+    """
+    # copy flat schedule template next to the project file
+    customer_schedule: str = copy_customer_schedule_file(fullname)
+
+    # (source range, destination range) pairs; text ranges as copied by Range.copy() and formula only ranges
+    transfers: list[tuple[str, str]] = [
+        (job_info_range, job_info_range), (general_system_range, general_system_range),
+        (ctrl_info_range, ctrl_info_range), (prod_info_range, prod_info_range), (smart_notes_col, flat_notes_col),
+        (engr_formula_range, engr_formula_range), (ctrl_formula_range, ctrl_formula_range)]
+
+    # read formulas (not cached values) so formula ranges transfer as formulas, as Range.copy() would
+    grids: dict[str, list[list]] = read_ranges(fullname, 'SCHEDULE', [src for src, _ in transfers])
+    write_ranges(customer_schedule, 'SCHEDULE', [(src, dest, grids[src]) for src, dest in transfers])
+
+    return customer_schedule
+
 
 def csr_file_copy():
     """
@@ -143,7 +199,7 @@ def csr_file_copy():
     :return: None - Saves files in the production folder denoted by the Sales Order number
     """
     # instantiate Book instance to interact with Excel
-    wb: xw.Book = xw.Book.caller()
+    wb: xw.Book = profile(xw.Book.caller())
     schedule = wb.sheets['SCHEDULE']
 
     # grab SO# and job name from schedule
@@ -154,42 +210,75 @@ def csr_file_copy():
     if type(sales_order_num) is None or type(sales_order_num) is float:
         raise Exception('Please enter SO number in the appropriate field prior to copying files.')
 
+    # copy files to production (no Excel required from here on)
+    copy_to_production(wb.fullname, sales_order_num, job_name)
+
+    # write Excel round trip summary if profiling was requested
+    write_summary(wb)
+
+
+def copy_to_production(fullname, sales_order_num, job_name):
+    """
+    File-level half of csr_file_copy(). Creates the production folder, extracts the packing list out of the flat
+    schedule, and copies the flat schedule and submittal. Requires no Excel instance.
+
+    :param str fullname: filepath of the project file
+    :param str sales_order_num: sales order number for the job
+    :param str job_name: job name for the job
+    :return: so_prod_path - production folder the files were copied to
+    :rtype: str
+    """
     # create folder name/location by concatenating SO# - job name
     so_no_jn: str = f"{sales_order_num} - {job_name}"
-    so_prod_path: str = f"{prod_order_loc}\\{so_no_jn}"
+    so_prod_path: str = os.path.join(prod_order_loc, so_no_jn)
 
     # manipulate calling workbook filepath to find submittal
-    submittal: str = rename(wb, 'SUBMITTAL', 'pdf')
-    submittal_fname: str = submittal.split('\\')[-1]
+    submittal: str = rename(fullname, 'SUBMITTAL', 'pdf')
+    submittal_fname: str = os.path.basename(submittal)
 
     # manipulate calling workbook filepath to find schedule
-    customer_schedule: str = rename(wb, 'SCHEDULE', 'xlsx')
-
-    # create instance of the flat schedule and open
-    try:
-        wb_fs: xw.Book = xw.Book(customer_schedule)
-    except FileNotFoundError:
+    customer_schedule: str = rename(fullname, 'SCHEDULE', 'xlsx')
+    if not os.path.isfile(customer_schedule):
         raise Exception('Generate flat schedule and try again.')
 
     # build target filepaths
-    target_to_orders: str = f"{so_prod_path}\\{so_no_jn}.xlsx"
-    target_submittal: str = f"{so_prod_path}\\{submittal_fname}"
-    tag_sch_loc: str = wb.fullname.split('\\')
-    target_prod_sch: str = '\\'.join(tag_sch_loc[:-1]) + f"\\{so_no_jn}.xlsx"
-    target_packing: str = f"{so_prod_path}\\PACKING LIST.xlsx"
+    target_to_orders: str = os.path.join(so_prod_path, f"{so_no_jn}.xlsx")
+    target_submittal: str = os.path.join(so_prod_path, submittal_fname)
+    target_prod_sch: str = os.path.join(os.path.dirname(fullname), f"{so_no_jn}.xlsx")
+    target_packing: str = os.path.join(so_prod_path, 'PACKING LIST.xlsx')
 
     # create the folder in to_orders if it doesn't already exist
     if not os.path.isdir(so_prod_path):
         os.makedirs(so_prod_path)
 
-    # copy packing list out of flat schedule into a separate file and save; file stays open on screen
-    wb_fs.sheets['PACKING LIST'].api.Copy()
-    xw.books.active.save(target_packing)
+    # copy packing list sheet out of flat schedule into a separate file
+    extract_sheet(customer_schedule, 'PACKING LIST', target_packing)
 
     # copy files from calling folder to newly created job folder in production queue
-    try:
-        shutil.copyfile(customer_schedule, target_to_orders)
-    except FileNotFoundError:
-        raise Exception('Please generate the flat schedule and copy files again.')
+    shutil.copyfile(customer_schedule, target_to_orders)
     shutil.copyfile(submittal, target_submittal)
     shutil.copyfile(customer_schedule, target_prod_sch)
+
+    return so_prod_path
+
+
+def batch_copy_to_production(fullnames):
+    """
+    Hands off several won jobs to production at once, reading SO# and job name from each saved project file.
+
+    :param list fullnames: filepaths of saved project files
+    :return: prod_paths - dictionary of {project filepath: production folder}
+    :rtype: dict
+    """
+    prod_paths: dict[str, str] = {}
+    fullname: str
+    for fullname in fullnames:
+        cells: dict[str, list[list]] = read_ranges(fullname, 'SCHEDULE', [sales_order_cell, job_name_cell],
+                                                   data_only=True)
+        sales_order_num = cells[sales_order_cell][0][0]
+        # check to be sure SO# was populated, else error
+        if sales_order_num is None:
+            raise Exception(f"Please enter SO number in {os.path.basename(fullname)} prior to copying files.")
+        prod_paths[fullname] = copy_to_production(fullname, str(sales_order_num), cells[job_name_cell][0][0])
+
+    return prod_paths
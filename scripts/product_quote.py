@@ -6,7 +6,6 @@ Primary logic for quote generation based on information contained in the enginee
 import pandas as pd
 import xlwings as xw
 import re
-import json
 
 from quote.connections import size_dict
 from quote.controls import control_type_1, control_type_2
@@ -14,7 +13,10 @@ from quote.descriptions import generate_description, assign_descrip_to_quote
 from quote.f_component import sm_f_component
 from quote.io import assign_pn_to_quote, quoted_by, clear_quote
 from quote.kit_sizes import quote_sm_kit, quote_large_kit
+from quote.packet import schedule_components, write_packet
+from utils.com_profiler import profile, write_summary
 from utils.rename import rename
+from utils.xlsx_ranges import sheet_digest
 
 # Project file cells (strings) for header
 sch_job_name: str = 'C19'
@@ -28,6 +30,8 @@ q_attn: str = 'F9'
 eta_cell: str = 'L7'
 shipping_cell: str = 'L8'
 quote_total: str = 'AA4'
+# DATA packet format: 'msgpack' (columnar, schema-versioned) or 'json' (legacy list for older consumers)
+data_packet_format: str = 'msgpack'
 
 
 def quote_pkg(sch_row):
@@ -117,12 +121,12 @@ def quote_pkg(sch_row):
 def generate_quote():
     """
     Parent function that is called from the project file. Iterates through all schedule data, creates quote, quotes
-    parts, enters all data into Excel quote, saves data package of all digested info from schedule as a JSON file.
+    parts, enters all data into Excel quote, saves data package of all digested info from schedule (see quote.packet).
 
-    :return: data.json - saves sorted list of dictionaries in same folder to archive data for future mining
+    :return: DATA packet - saves schedule rows and package quantities in same folder to archive data for future mining
     :rtype: file
     """
-    wb: xw.Book = xw.Book.caller()
+    wb: xw.Book = profile(xw.Book.caller())
 
     # if called from a revised project file, resets quote to blank from the template
     if 'R.' in wb.fullname.split('\\')[-1]:
@@ -131,6 +135,12 @@ def generate_quote():
     # convert schedule to a DataFrame object
     df: pd.DataFrame = pd.read_excel(wb.fullname, sheet_name='SCHEDULE', header=0, index_col=0, usecols='A:AC',
                                      skiprows=31, nrows=1000)
+    # engineered components of every scheduled row (bypass and branch rows included), counted as schedule_data() does
+    # so the sales order built from the DATA packet matches the one built from the schedule
+    engr_components: dict = schedule_components(df['qty'].values.tolist(), df['pkg_key'].values.tolist(),
+                                                df['engr_component'].values.tolist())
+    # digest of the schedule just read, so a sales order built from the packet can tell if it was edited since
+    schedule_digest: str = sheet_digest(wb.fullname, 'SCHEDULE')
     # remove rows with > 7 NaN values and re-index
     df.dropna(thresh=7, inplace=True)
     df.reset_index(drop=True)
@@ -210,10 +220,9 @@ def generate_quote():
     # change quoted by cell to match initials in filename
     quoted_by(wb)
 
-    # add per package key quantities as a final JSON entry in the data packet to aid sales order generation
-    json_sch.append(pkg_quantities)
+    # export data packet (rows plus per package key quantities to aid sales order generation) with similar naming
+    packet_file: str = rename(wb, 'DATA', data_packet_format)
+    write_packet(packet_file, json_sch, pkg_quantities, data_packet_format, engr_components, schedule_digest)
 
-    # export JSON data packet with similar file naming scheme
-    json_export_file: str = rename(wb, 'DATA', 'json')
-    with open(json_export_file, 'w') as outfile:
-        json.dump(json_sch, outfile, sort_keys=True, indent=4)
+    # write Excel round trip summary if profiling was requested
+    write_summary(wb)
@@ -7,22 +7,42 @@ available drawings, asks submittal refining questions and returns a full submitt
 import xlwings as xw
 import pandas as pd
 import os
-from pdfrw import PdfReader, PdfWriter
+import sys
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from pdfrw import PdfReader
 
+from submittal import fragments, job, sources
 from submittal.DWG import DWG
-from submittal.spec import lg_spec, typ_spec, sp_case_1, sp_case_2, controls
+from submittal.merge import linearize, write_merged, write_streamed
+from submittal.spec import resolve_specs
+from submittal.spec_library import load_sheets
+from utils.dwg_index import resolve
 from utils.rename import rename
 
 # IMMUTABLE GLOBAL VARIABLES USED FOR EASE IN UPDATING; THIS IS NOT BEST PRACTICE
 spec_loc: str = r'C:\Estimating\Specification Pages'
 
-# locate directory for drawings based on type to speed up walk
-dir_all: str = r'C:\Estimating\CAD Drawings\Kits'
+# kit type directories drawings are filed under (see kit_dir())
 dir_1: str = r'C:\Estimating\CAD Drawings\Kits\TYPE 1'
 dir_2: str = r'C:\Estimating\CAD Drawings\Kits\TYPE 2'
 dir_3: str = r'C:\Estimating\CAD Drawings\Kits\TYPE 3'
 dir_l: str = r'C:\Estimating\CAD Drawings\Kits\LARGE SIZE'
 
+# number of drawings/spec sheets read from the network share at once
+pdf_workers: int = 8
+# merge mode: write one copy of identical fonts/images/title blocks, and flate compress content streams
+dedupe_resources: bool = True
+compress_streams: bool = True
+# stitch submittals from cached pre-merged drawing fragments (see submittal.fragments)
+use_fragment_cache: bool = True
+# write linearized ("fast web view") pdfs with compressed object streams, so the first page shows while downloading
+# (streamed submittals are not linearized: pikepdf loads the whole file, undoing the streaming writer's flat memory)
+linearize_output: bool = True
+# submittals with more drawings than this are written with the bounded memory streaming writer (see submittal.merge)
+stream_above: int = 100
+
 job_name_cell: str = 'C19'
 co_name_cell: str = 'C23'
 
@@ -30,123 +50,83 @@ co_name_cell: str = 'C23'
 def build_dwgs(df):
     """
     Builds drawing objects based on information in provided DataFrame.
-    Skips rows with no quantity, package key, or drawing provided. Only runs once per package key.
+    Skips rows with no quantity, package key, or drawing provided. Only the first remaining row of each package key is
+    used.
 
     :param pd.DataFrame df: data used to build drawing objects
     :return: dwg_sch - dictionary with package keys as keys and dwg objects as values
     :rtype: dict
     """
-    dwg_sch: dict[str, DWG] = {}
-
-    # loop through all rows on schedule
-    i: int
-    for index, row in df.iterrows():
-        # skip if row quantity is 0
-        if row['qty'] == 0:
-            continue
-        # skip if package key empty/NaN or if package key has already been included in submittal
-        if type(pkg := row['pkg_key']) in (float, None) or pkg in dwg_sch:
-            continue
-        # skip if drawing empty/NaN
-        if type(dwg := row['dwg']) in (float, None):
-            continue
-
-        # instantiate DWG object differently if control part by us or by other
-        if type(ctrl_size := row['control_size_type']) in (float, None):
-            dwg: DWG = DWG(dwg, pkg, row['control_pt'], 'TBD', row['Signal'])
-        else:
-            dwg: DWG = DWG(dwg, pkg, row['control_pt'], ctrl_size.split()[0], row['Signal'])
-
-        # if marked as small, mark DWG object as small
-        try:
-            if size := row['size'] == 'SMALL' and type(rate := row['rate']) not in (None, str) and 0 < rate <= 5:
-                dwg.set_sm()
-        except TypeError:
-            raise Exception('Please ensure rate fields are blank or filled with numeric values. Save. Try again.')
-
-        # if marked as large, mark DWG object as large
-        if size == 'LARGE':
-            dwg.set_lg()
-        # if special case 1 is required, mark DWG as such
-        if row['sp_case_1'] == 'YES':
-            dwg.set_sp_case_1()
-        # if special case 2 is required, mark DWG as such
-        elif row['sys_type'] == 'SP_CASE_2' or row['conn_type'] == 'SP_CASE_2':
-            dwg.set_sp_case_2()
-
-        # add completed DWG object to dictionary with pkg_key as key
-        dwg_sch[pkg] = dwg
-
-    return dwg_sch
+    # skip rows with a quantity of 0 or an empty package key/drawing, then keep the first row of each package key
+    df = df[(df['qty'] != 0) & df['pkg_key'].notna() & df['dwg'].notna()].drop_duplicates('pkg_key')
+
+    # control part by other if no control size provided, else the size from the control size/type (the column is read as
+    # floats when no row has a control size)
+    ctrl_size: pd.Series = df['control_size_type'].astype(object).str.split().str[0].fillna('TBD')
+    # small if marked as small with a rate between 0 and 5 (rates entered as text are never small)
+    rate: pd.Series = pd.to_numeric(df['rate'], errors='coerce')
+    sm: pd.Series = (df['size'] == 'SMALL') & (rate > 0) & (rate <= 5)
+    lg: pd.Series = df['size'] == 'LARGE'
+    # special case 1 takes precedence over special case 2
+    sp_case_1: pd.Series = df['sp_case_1'] == 'YES'
+    sp_case_2: pd.Series = ~sp_case_1 & ((df['sys_type'] == 'SP_CASE_2') | (df['conn_type'] == 'SP_CASE_2'))
+
+    # build DWG objects only for the unique packages, with pkg_key as key
+    return {pkg: DWG(dwg, pkg, ctrl_pt, size, signal, sm=is_sm, lg=is_lg, sp_case_1=is_sp_1, sp_case_2=is_sp_2)
+            for pkg, dwg, ctrl_pt, size, signal, is_sm, is_lg, is_sp_1, is_sp_2 in
+            zip(df['pkg_key'], df['dwg'], df['control_pt'], ctrl_size, df['Signal'], sm.tolist(), lg.tolist(),
+                sp_case_1.tolist(), sp_case_2.tolist())}
+
+
+def kit_dir(name):
+    """
+    :param str name: drawing file name
+    :return: folder - kit type folder the drawing is filed under
+    :rtype: str
+    """
+    # type 2 / type 3 control kits and large size drawings have their own folders, everything else is type 1
+    return {'2': dir_2, '3': dir_3, 'L': dir_l}.get(name[0], dir_1)
 
 
 def find_dwgs(dwg_sch):
     """
-    Generate filepaths for drawings in sch_dict
+    Generate filepaths for drawings in sch_dict from the persistent drawing index (see utils.dwg_index).
 
     :param dict dwg_sch: dict of deduplicated drawings from schedule as values, package keys as keys
-    :return: sch_dict - dict of deduplicated drawings from schedule as values, package keys as keys
-    :rtype: dict
+    :return: tuple containing:
+        - sch_dict - dict of deduplicated drawings from schedule as values, package keys as keys
+        - missing - list of drawings (with their package keys) that do not exist in the CAD Drawings folder
+    :rtype: tuple
     """
-    # walk through folders to find drawing, append file path to list
+    # check to ensure filetype is included from dwg column on schedule to counteract manually added drawing codes
+    names: dict[str, str] = {pkg: dwg.name if dwg.name[-4:] == '.pdf' else f"{dwg.name}.pdf"
+                             for pkg, dwg in dwg_sch.items()}
+
+    # look up every drawing in its kit type folder; drawings that can't be found keep no filepath and are left out of
+    # the submittal, as when the folders were walked, and are returned so they can be reported
+    found, missing = resolve(list(dict.fromkeys(names.values())), {name: kit_dir(name) for name in names.values()})
+
+    pkg: str
     dwg: DWG
-    for dwg in dwg_sch.values():
-        name: str = dwg.name
-
-        # check to ensure filetype is included from dwg column on schedule to counteract manually added drawing codes
-        if name[-4:] != '.pdf':
-            name = f"{name}.pdf"
-
-        # loop through subfolders and files therein to find drawing location
-        path: str
-        subdir: list[str]
-        files: list[str]
-        # if no control kit
-        if name[0] not in '23L':
-            for path, subdir, files in os.walk(dir_1):
-                for file in files:
-                    if file == dwg.name:
-                        dwg.fpath = os.path.join(path, file)
-        # if type 2 drawing
-        elif name[0] == '2':
-            for path, subdir, files in os.walk(dir_2):
-                for file in files:
-                    if file == dwg.name:
-                        dwg.fpath = os.path.join(path, file)
-        # if type 3 drawing
-        elif name[0] == '3':
-            for path, subdir, files in os.walk(dir_3):
-                for file in files:
-                    if file == dwg.name:
-                        dwg.fpath = os.path.join(path, file)
-        # if large size drawing
-        elif name[0] == 'L':
-            for path, subdir, files in os.walk(dir_l):
-                for file in files:
-                    if file == name:
-                        dwg.fpath = os.path.join(path, file)
-        # otherwise walk all directories to look for the drawing
-        else:
-            for path, subdir, files in os.walk(dir_all):
-                for file in files:
-                    if file == dwg.name:
-                        dwg.fpath = os.path.join(path, file)
+    for pkg, dwg in dwg_sch.items():
+        dwg.set_fpath(found.get(names[pkg]))
 
-    return dwg_sch
+    return dwg_sch, [f"{name} (package {pkg})" for pkg, name in names.items() if name in missing]
 
 
-def concat(wb, dwg_dict, spec_list):
+def concat(wb, dwg_dict, spec_list, progress=None):
     """
-    Creates the pdf container, then grabs all required drawing filepaths, then appends spec sheets from all the
-    determine_spec functions. Finally, writes the pdf file to the active folder.
+    Grabs all required drawing filepaths, then appends spec sheets from all the determine_spec functions. Finally,
+    writes the merged pdf file to the active folder (see submittal.merge).
 
-    :param xw.Book wb: the project file generate_submittal is being called from
+    :param xw.Book | str wb: the project file (or its filepath) generate_submittal is being called from
     :param dict dwg_dict: dictionary of dwgs as keys and values: [package key, dwg filepath]
     :param list spec_list: list of accessory filepaths in order of occurrence
+    :param function progress: optional function called with keyword progress fields (pages_merged, bytes_written)
     :return: None - file is written
     """
-    # instantiate pdf container
-    merger: PdfWriter = PdfWriter()
+    progress = progress or (lambda **fields: None)
+
     # instantiate list for ordered drawings from A to AN as a base
     dwg_list: list[None] = [None] * 40
 
@@ -172,73 +152,147 @@ def concat(wb, dwg_dict, spec_list):
             if dwg.fpath not in dwg_list:
                 dwg_list.append(dwg.fpath)
 
-    # add pdf dwg filepath to merger in order of package keys, skipping any letters with no unique dwg
-    dwg: str
-    for dwg in dwg_list:
-        if dwg is None:
-            continue
-        merger.addpages(PdfReader(dwg).pages)
+    # skip any letters with no unique dwg
+    dwg_paths: list[str] = [dwg for dwg in dwg_list if dwg is not None]
+    spec_paths: list[str] = [os.path.join(spec_loc, pdf) for pdf in spec_list]
+
+    if len(dwg_paths) > stream_above:
+        # write each drawing as soon as it is read (keeping at most pdf_workers drawings in memory), then spec sheets
+        with ThreadPoolExecutor(pdf_workers) as pool:
+            write_streamed(target, _streamed_sources(pool, dwg_paths, spec_paths), dedupe_resources,
+                           compress_streams, progress)
+    else:
+        # read and parse drawings concurrently (each open is mostly network latency), from their cached pre-merged
+        # fragments when enabled (merging only drawings not cached yet), while spec sheets are taken from the
+        # consolidated spec library (sheets not in the library are read on the same pool)
+        read_drawing: Callable[[str], list] = fragments.drawing_pages if use_fragment_cache else \
+            lambda f: PdfReader(f).pages
+        with ThreadPoolExecutor(pdf_workers) as pool:
+            dwg_pages: Iterator[list] = pool.map(read_drawing, dwg_paths)
+            spec_pages: list[list] = load_sheets(spec_paths, pool)
+
+            # drawings in order of package keys, then accessories in the order they were added to list
+            page_lists: list[list] = _collect(dwg_pages, progress) + spec_pages
+        if use_fragment_cache:
+            fragments.flush()
+        progress(pages_merged=sum(len(pages) for pages in page_lists))
+
+        # write pdf file to folder, sharing identical fonts/logos/title blocks between source files
+        write_merged(target, page_lists, dedupe_resources, compress_streams)
+
+    # rewrite for fast web view before the submittal is uploaded/shared
+    if linearize_output and len(dwg_paths) <= stream_above:
+        progress(stage='linearizing')
+        linearize(target)
+    progress(bytes_written=os.path.getsize(target))
+
+    # record what the submittal was built from, so it can be regenerated when a drawing/spec sheet is revised; the
+    # submittal is already written, so an unreachable or locked index is reported rather than failing it
+    try:
+        sources.record(wb if type(wb) is str else wb.fullname, target, dwg_paths, spec_paths)
+    except Exception as e:
+        print(f"submittal sources not recorded for {target}: {type(e).__name__}: {e}", file=sys.stderr)
+
+
+def _streamed_sources(pool, dwg_paths, spec_paths):
+    # drawings in order, each read at most pdf_workers drawings ahead of the writer, then the spec sheets
+    reading: deque[Future] = deque()
+    fpath: str
+    for fpath in dwg_paths:
+        reading.append(pool.submit(lambda f: PdfReader(f).pages, fpath))
+        if len(reading) >= pdf_workers:
+            yield reading.popleft().result()
+    while reading:
+        yield reading.popleft().result()
+    yield from load_sheets(spec_paths, pool)
+
+
+def _collect(dwg_pages, progress):
+    # gather each drawing's pages as its read finishes, reporting the running page count
+    page_lists: list[list] = []
+    pages: list
+    for pages in dwg_pages:
+        page_lists.append(pages)
+        progress(pages_merged=sum(len(p) for p in page_lists))
+    return page_lists
+
+
+def build_submittal(fullname, progress=None):
+    """
+    Pulls information required from the saved schedule, creates DWG objects, calls functions to locate pdf drawings,
+    calls functions to select spec sheets, then calls a function to concatenate/save them to the submittal file. Needs
+    no Excel instance, so it can also be run in a background worker process (see submittal.job).
+
+    :param str fullname: filepath of the project file
+    :param function progress: optional function called with keyword progress fields (stage, drawings_total,
+        drawings_resolved, missing_drawings, pages_merged, bytes_written)
+    :return: missing - list of drawings (with their package keys) left out of the submittal as they do not exist
+    :rtype: list
+    """
+    progress = progress or (lambda **fields: None)
+
+    # take dwg column as pandas dataframe object and send to list
+    progress(stage='reading schedule')
+    df: pd.DataFrame = pd.read_excel(fullname, sheet_name='SCHEDULE', header=0, usecols='B:C,E:F,H:I,K,S,T,X,Z,AB',
+                                     skiprows=31, nrows=1000)
+    df.dropna(thresh=5, inplace=True)
+
+    # build dwg objects and map to package keys
+    sch_dict = build_dwgs(df)
+
+    # get filepaths to all drawings to be included in submittals, reporting any that don't exist
+    progress(stage='resolving drawings', drawings_total=len(sch_dict))
+    missing: list[str]
+    sch_dict, missing = find_dwgs(sch_dict)
+    progress(drawings_resolved=len(sch_dict) - len(missing), missing_drawings=missing)
+    if missing:
+        print(f"drawings missing from the submittal of {fullname}: {', '.join(missing)}", file=sys.stderr)
 
-    # add accessories in order they were added to list
-    pdf: str
-    for pdf in spec_list:
-        merger.addpages(PdfReader(f"{spec_loc}\\{pdf}").pages)
+    # identify spec sheets for all drawings (standard/special case, then large size, then controls)
+    final_spec_list: list[str] = resolve_specs(sch_dict.values())
 
-    # write pdf file to folder
-    merger.write(target)
+    progress(stage='merging pdfs')
+    concat(fullname, sch_dict, final_spec_list, progress)
+    return missing
 
 
 def generate_submittal():
     """
-    Master submittal generation function. Pulls information required from schedule, creates DWG objects, calls functions
-    to location pdf drawings, calls functions to select spec sheets, then calls a function to concatenate/save them to
-    the submittal file.
+    Master submittal generation function. Builds the submittal file for the calling project file (see
+    build_submittal()) while Excel waits.
 
     :return: None - calls function concat to write pdf file
     """
     # instantiate Book instance to interact with Excel
     wb: xw.Book = xw.Book.caller()
 
-    # take dwg column as pandas dataframe object and send to list
-    df: pd.DataFrame = pd.read_excel(wb.fullname, sheet_name='SCHEDULE', header=0, usecols='B:C,E:F,H:I,K,S,T,X,Z,AB',
-                                     skiprows=31, nrows=1000)
-    df.dropna(thresh=5, inplace=True)
+    # the submittal is written without drawings that don't exist, so name them once it is done
+    missing: list[str] = build_submittal(wb.fullname)
+    if missing:
+        raise Exception(f"Submittal written without the following drawings. Please check they exist in the CAD "
+                        f"Drawings folder and generate the submittal again: {', '.join(missing)}")
 
-    # build dwg objects and map to package keys
-    sch_dict = build_dwgs(df)
 
-    # get filepaths to all drawings to be included in submittals
-    sch_dict = find_dwgs(sch_dict)
-
-    # instantiate persistent variables
-    spec_list: list[str] = []
-    spec_list_lg: list[str] = []
-    controls_list: list[str] = []
+def generate_submittal_background():
+    """
+    Starts building the submittal file for the calling project file in a background worker process and returns
+    immediately, leaving Excel free. Progress is written to a status file next to the project file (see submittal.job).
 
-    # iterate through all pkg_key : dwg pairs in dictionary to identify spec sheets
-    pkg: str
-    dwg: DWG
-    for dwg in sch_dict.values():
-        # split dwg filename by '-' and '&'
-        parts: list[str] = dwg.parts()
+    :return: None - the worker process writes the pdf file
+    """
+    # instantiate Book instance to interact with Excel
+    wb: xw.Book = xw.Book.caller()
 
-        # large size doesn't have special cases
-        if dwg.lg:
-            spec_list_lg = lg_spec(parts, spec_list_lg)
+    job.start(wb.fullname)
 
-        else:
-            if dwg.sp_case_2:
-                spec_list = sp_case_2(parts, spec_list)
-            elif dwg.sp_case_1:
-                spec_list = sp_case_1(parts, spec_list)
-            else:
-                spec_list = typ_spec(parts, dwg.sm, spec_list)
 
-        # if dwg object flagged to include controls
-        if type(dwg.ctrl_model) not in (None, float):
-            controls_list = controls(parts[1], dwg.ctrl_model, dwg.ctrl_size, dwg.signal)
+def cancel_submittal():
+    """
+    Asks the background submittal job of the calling project file to stop (see generate_submittal_background()).
 
-    # concatenate all lists into a single list for pdf merging
-    final_spec_list: list[str] = spec_list + spec_list_lg + controls_list
+    :return: None
+    """
+    # instantiate Book instance to interact with Excel
+    wb: xw.Book = xw.Book.caller()
 
-    concat(wb, sch_dict, final_spec_list)
+    job.cancel(wb.fullname)
@@ -5,7 +5,10 @@ Contains functions to interact with the quote sheet within the project Excel fil
 Primarily assigns quoted packages to standard Excel cell ranges (where lookups pull pricing from a database), but also
 alters quoted_by cell and can clear the quote sheet if necessary (on revisions).
 """
-import xlwings as xw
+import json
+import os
+
+from utils.xlsx_ranges import read_ranges
 
 # Excel Quote cell ranges (dictionaries) for packages
 quote_kitqty: dict[str, str] = {
@@ -38,8 +41,10 @@ user2_cell: str = 'AB8'
 user3_cell: str = 'AB6'
 # variables for clear_quote()
 quote_template_loc: str = r'C:\Estimating\Customer\Project Template.xlsm'
-text_quote_range: str = 'E14:G682'
-quote_fx_range: str = 'H14:L682'
+# blank quote snapshot extracted from the template: text range E14:G682 and formula range H14:L682 as one block
+quote_snapshot_loc: str = r'C:\Estimating\Customer\Project Template QUOTE.json'
+quote_snapshot_range: str = 'E14:L682'
+quote_snapshot_version: int = 2
 
 
 def assign_pn_to_quote(wb, sub_dwg_dict, package_quantities):
@@ -87,29 +92,88 @@ def quoted_by(wb):
         quote.range(quote_author).value = quote.range(user3_cell).value
 
 
+def build_quote_snapshot():
+    """
+    Reads the blank text values and formulas of the quote sheet from the project template file (without Excel) and
+    serializes them to quote_snapshot_loc along with the template's modified time for invalidation.
+
+    :return: snapshot - dictionary with version, template mtime, range, and rows of cell contents
+    :rtype: dict
+    """
+    # formulas are kept as '=' prefixed strings when openpyxl is not in data_only mode; rows and columns past the
+    # template's last used cell are padded out to the full range, so clearing writes blanks over the whole quote
+    blank: list[list] = read_ranges(quote_template_loc, 'QUOTE', [quote_snapshot_range])[quote_snapshot_range]
+    rows: list[list] = [['' if v is None else v for v in row] for row in blank]
+
+    snapshot: dict[str, ...] = {
+        'version': quote_snapshot_version,
+        'template_mtime': os.path.getmtime(quote_template_loc),
+        'range': quote_snapshot_range,
+        'rows': rows
+    }
+    # write to a temporary file then replace, so another estimator's quote never reads a partial snapshot; if the
+    # snapshot is open elsewhere (PermissionError on Windows) it is left to the next run, as this one has its copy
+    tmp_file: str = f"{quote_snapshot_loc}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w') as outfile:
+        json.dump(snapshot, outfile)
+    try:
+        os.replace(tmp_file, quote_snapshot_loc)
+    except OSError:
+        os.remove(tmp_file)
+
+    return snapshot
+
+
+def load_quote_snapshot():
+    """
+    Loads the blank quote snapshot, rebuilding it if it is missing or can't be decoded, from an older snapshot version,
+    or if the project template has been modified since the snapshot was taken. If the template can't be reached, any
+    existing snapshot of the current version is used as is.
+
+    :return: snapshot - dictionary with version, template mtime, range, and rows of cell contents
+    :rtype: dict
+    """
+    # a snapshot that can't be read or decoded is treated as missing
+    snapshot: dict[str, ...] = {}
+    try:
+        with open(quote_snapshot_loc) as infile:
+            snapshot = json.load(infile)
+    except (OSError, ValueError):
+        pass
+
+    # discard snapshots written by older versions of this function or for a different range
+    if snapshot.get('version') != quote_snapshot_version or snapshot.get('range') != quote_snapshot_range:
+        snapshot = {}
+
+    try:
+        template_mtime: float | None = os.path.getmtime(quote_template_loc)
+    except OSError:
+        template_mtime = None
+
+    if not snapshot or (template_mtime is not None and snapshot['template_mtime'] != template_mtime):
+        snapshot = build_quote_snapshot()
+
+    return snapshot
+
+
 def clear_quote(wb):
     """
-    Copies blank quote sheet fields from template onto calling workbook. Only gets called if 'R.' is present in the
-    filename indicating a revision.
+    Writes blank quote sheet fields (text values and formulas) from the template snapshot onto calling workbook in a
+    single write. Only gets called if 'R.' is present in the filename indicating a revision.
+    Cell formatting is not part of the snapshot; the quote sheet formats are not changed by quoting.
 
     :param xw.Book wb: calling Book object
     :return: None - clears quote sheet fields for a fresh start
     """
-    # create a Book object for the quote template file for blank format copy
-    wb_template: xw.Book = xw.Book(quote_template_loc)
-    quote_template = wb_template.sheets['QUOTE']
+    # load the blank quote contents without opening the template in Excel
+    snapshot: dict[str, ...] = load_quote_snapshot()
     quote_current = wb.sheets['QUOTE']
 
     # un-filter calling project file's quote sheet so cells are copied to the correct ranges
     quote_current.api.AutoFilter.ShowAllData()
 
-    # copy text range from template to calling project
-    quote_template.range(text_quote_range).copy(quote_current.range(text_quote_range))
-
-    # copy formula range from template to calling project
-    fx1 = quote_template.range(quote_fx_range).formula
-    quote_current.range(quote_fx_range).formula = fx1
+    # write text and formula ranges to calling project as one block (constants assigned via .formula stay constants)
+    quote_current.range(snapshot['range']).formula = snapshot['rows']
 
-    # save live project file and close the template
+    # save live project file
     wb.save()
-    wb_template.close()
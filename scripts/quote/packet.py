@@ -0,0 +1,265 @@
+# scripts/quote/packet.py
+"""
+author: Sage Gendron
+Reads and writes the DATA packet archived by generate_quote(). The packet is schema-versioned and columnar: schedule
+rows and packages are separate, typed tables of {column: [values]} serialized with msgpack, so consumers no longer
+special-case a package quantity dict at the end of a row list and large jobs load quickly.
+
+Each package BOM is stored once in the package table (rows reference it by package key) and part numbers are interned
+in a string table referenced by index, so a package tagged on 30 rows is not serialized 30 times.
+
+The rows table only holds quoted rows, so the engineered components of every scheduled row (including the bypass and
+branch rows generate_quote() skips) are stored per package in a components table for sales order generation, along with
+a digest of the schedule sheet they were counted from, so edits to the schedule after quoting are detected. Packets
+written before version 3 (4), and legacy JSON packets, have no components table (schedule digest), stored as None.
+
+The original pretty-printed JSON list (rows followed by a package quantity dict) can still be written for
+compatibility and is converted to the current layout by load_packet().
+"""
+import json
+import math
+
+import msgpack
+import pandas as pd
+
+packet_schema: str = 'data-packet'
+packet_version: int = 4
+
+# schedule row table columns and the type each value is coerced to (None for blanks; text left in numeric columns is
+# kept as str)
+row_columns: dict[str, type] = {
+    'qty': float, 'eq_type': str, 'tag': str, 'rate': float, 'pkg_key': str, 'size': str, 'sys_type': str,
+    'conn_size': str, 'conn_type': str, 'engr_component': str, 'control_method': str, 'control_size_type': str,
+    'control_type': str, 'control_pt': str, 'signal': str, 'dwg': str, 'sp_case_1': str, 'quote_descrip': str}
+# rows with these drawing values are not quoted, so carry no BOM (see generate_quote())
+no_bom_dwgs: tuple[str, str] = ('SKIP', 'STACKED')
+
+
+def _coerce(v, to_type):
+    # blanks come out of pandas as NaN floats; store them as None (nil) instead
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return None
+    if to_type is float:
+        # text typed into a numeric column (ie a 'TBD' rate) is kept as text, as the schedule accepts it
+        try:
+            return float(v)
+        except (TypeError, ValueError):
+            return str(v)
+    if to_type is list:
+        return [x.item() if hasattr(x, 'item') else x for x in v]
+    # whole numbers typed into text columns (ie sizes) should read '2', not '2.0'
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def schedule_components(eq_qty_list, pkg_key_list, engr_component_list):
+    """
+    Sums the engineered components of the schedule rows by package key. Shared by generate_quote() (which stores the
+    result in the components table) and salesorder.extract.schedule_data(), so both sales order paths count the same
+    rows.
+
+    :param list eq_qty_list: schedule row quantities
+    :param list pkg_key_list: schedule row package keys
+    :param list engr_component_list: schedule row engineered components
+    :return: engr_components - dictionary of engineered components and quantities organized by package keys
+    :rtype: dict
+    """
+    # create dict of engineered components to be attributed by pkg key
+    engr_components: dict = {}
+    qty: int
+    pkg: str
+    engr_cmp: str
+    for qty, pkg, engr_cmp in zip(eq_qty_list, pkg_key_list, engr_component_list):
+        # filter out 0 quantity rows and empty rows
+        if type(pkg) is float or pd.isna(qty) or qty == 0 or type(engr_cmp) is float:
+            continue
+        # add the engineered component and quantity to the dictionary
+        if pkg not in engr_components.keys():
+            engr_components[pkg] = {engr_cmp: qty}
+        else:
+            engr_components[pkg][engr_cmp] = engr_components[pkg].get(engr_cmp, 0) + qty
+
+    return engr_components
+
+
+def _has_bom(dwg):
+    return dwg is not None and dwg not in no_bom_dwgs
+
+
+def build_packet(json_sch, pkg_quantities, engr_components=None, schedule_digest=None):
+    """
+    Transposes schedule rows into a typed, columnar packet with one BOM per package and interned part numbers.
+
+    :param list json_sch: list of dictionaries representing the Excel engineered schedule (see generate_quote())
+    :param dict pkg_quantities: dictionary of {package key: package quantity}
+    :param dict engr_components: dictionary of {package key: {engineered component: quantity}} from every scheduled
+        row (see schedule_components()), or None if unknown
+    :param str schedule_digest: digest of the schedule sheet the engineered components were counted from (see
+        utils.xlsx_ranges.sheet_digest()), or None if unknown
+    :return: packet - dictionary with schema, version, string table, rows table, packages table, components table, and
+        schedule digest
+    :rtype: dict
+    """
+    rows: dict[str, list] = {col: [_coerce(row.get(col), to_type) for row in json_sch]
+                             for col, to_type in row_columns.items()}
+
+    # every quoted row of a package carries the same BOM, so keep the first one found per package key
+    boms: dict[str, tuple[str, list[str], list[int]]] = {}
+    row: dict[str, ...]
+    for row, dwg in zip(json_sch, rows['dwg']):
+        if _has_bom(dwg) and row['pkg_key'] not in boms:
+            boms[row['pkg_key']] = (dwg, _coerce(row['part_numbers'], list), _coerce(row['part_quantities'], list))
+
+    # intern part numbers in order of first appearance
+    strings: dict[str, int] = {}
+    pkg_keys: list[str] = list(pkg_quantities.keys()) + [k for k in boms if k not in pkg_quantities]
+    packages: dict[str, list] = {'pkg_key': pkg_keys, 'qty': [], 'dwg': [], 'parts': [], 'part_qtys': []}
+    k: str
+    for k in pkg_keys:
+        dwg, pns, qtys = boms.get(k, (None, [], []))
+        packages['qty'].append(_coerce(pkg_quantities.get(k), float))
+        packages['dwg'].append(dwg)
+        packages['parts'].append([strings.setdefault(pn, len(strings)) for pn in pns])
+        packages['part_qtys'].append(qtys)
+
+    # flatten the engineered components into a table of one row per package key and component
+    components: dict[str, list] | None = None
+    if engr_components is not None:
+        components = {'pkg_key': [], 'engr_component': [], 'qty': []}
+        for k, quantities in engr_components.items():
+            for engr_cmp, q in quantities.items():
+                components['pkg_key'].append(k)
+                components['engr_component'].append(engr_cmp)
+                components['qty'].append(_coerce(q, float))
+
+    return {
+        'schema': packet_schema,
+        'version': packet_version,
+        'strings': list(strings),
+        'rows': rows,
+        'packages': packages,
+        'components': components,
+        'schedule_digest': schedule_digest
+    }
+
+
+def write_packet(fname, json_sch, pkg_quantities, fmt='msgpack', engr_components=None, schedule_digest=None):
+    """
+    Writes the DATA packet.
+
+    :param str fname: target filepath
+    :param list json_sch: list of dictionaries representing the Excel engineered schedule
+    :param dict pkg_quantities: dictionary of {package key: package quantity}
+    :param str fmt: 'msgpack' for the columnar packet or 'json' for the legacy JSON list (which has no components)
+    :param dict engr_components: dictionary of {package key: {engineered component: quantity}} (see build_packet())
+    :param str schedule_digest: digest of the schedule sheet the engineered components were counted from
+    :return: None - writes fname
+    """
+    if fmt == 'json':
+        # legacy layout: rows followed by the package quantity dict as a final entry
+        with open(fname, 'w') as outfile:
+            json.dump(json_sch + [pkg_quantities], outfile, sort_keys=True, indent=4, default=_native)
+    elif fmt == 'msgpack':
+        with open(fname, 'wb') as outfile:
+            outfile.write(msgpack.packb(build_packet(json_sch, pkg_quantities, engr_components, schedule_digest),
+                                         use_bin_type=True))
+    else:
+        raise Exception(f"Unknown DATA packet format '{fmt}'.")
+
+
+def _native(v):
+    # numpy scalars (ie int64 quantities from pandas) are not JSON serializable
+    if hasattr(v, 'item'):
+        return v.item()
+    raise TypeError(f"Object of type {type(v).__name__} is not JSON serializable")
+
+
+def load_packet(fname):
+    """
+    Loads a DATA packet in either the current columnar format or the legacy JSON format.
+
+    :param str fname: filepath of the DATA packet
+    :return: packet - dictionary with schema, version, rows table, packages table, components table, and schedule digest
+    :rtype: dict
+    """
+    with open(fname, 'rb') as infile:
+        data: bytes = infile.read()
+
+    # legacy JSON packets are a list of row dicts with the package quantities dict as the last entry
+    if data.lstrip()[:1] == b'[':
+        legacy: list = json.loads(data)
+        return build_packet(legacy[:-1], legacy[-1])
+
+    packet: dict[str, ...] = msgpack.unpackb(data, raw=False)
+    if packet.get('schema') != packet_schema or packet.get('version', 0) > packet_version:
+        raise Exception(f"{fname} is not a DATA packet this version of the code can read.")
+    # version 1 packets repeated part number/quantity lists on every row
+    if packet['version'] == 1:
+        return build_packet(_transpose(packet['rows']), dict(zip(packet['packages']['pkg_key'],
+                                                                 packet['packages']['qty'])))
+    # version 2 packets had no components table, and version 3 packets no schedule digest
+    packet.setdefault('components', None)
+    packet.setdefault('schedule_digest', None)
+    return packet
+
+
+def _transpose(columns):
+    return [dict(zip(columns.keys(), values)) for values in zip(*columns.values())]
+
+
+def package_boms(packet):
+    """
+    :param dict packet: DATA packet as returned by load_packet()
+    :return: boms - dictionary of {package key: (dwg, part numbers, part quantities)} for quoted packages
+    :rtype: dict
+    """
+    strings: list[str] = packet['strings']
+    packages: dict[str, list] = packet['packages']
+    return {k: (dwg, [strings[i] for i in parts], qtys)
+            for k, dwg, parts, qtys in zip(packages['pkg_key'], packages['dwg'], packages['parts'],
+                                           packages['part_qtys']) if dwg is not None}
+
+
+def packet_rows(packet):
+    """
+    Transposes the rows table of a packet back into a list of row dictionaries, with each quoted row's package BOM
+    expanded into part_numbers/part_quantities as generate_quote() built them.
+
+    :param dict packet: DATA packet as returned by load_packet()
+    :return: rows - list of dictionaries, one per schedule row
+    :rtype: list
+    """
+    boms: dict[str, tuple[str, list[str], list[int]]] = package_boms(packet)
+    rows: list[dict[str, ...]] = _transpose(packet['rows'])
+    row: dict[str, ...]
+    for row in rows:
+        _dwg, pns, qtys = boms[row['pkg_key']] if _has_bom(row['dwg']) else (None, [], [])
+        row['part_numbers'] = pns
+        row['part_quantities'] = qtys
+    return rows
+
+
+def package_quantities(packet):
+    """
+    :param dict packet: DATA packet as returned by load_packet()
+    :return: pkg_quantities - dictionary of {package key: package quantity}
+    :rtype: dict
+    """
+    return {k: q for k, q in zip(packet['packages']['pkg_key'], packet['packages']['qty']) if q is not None}
+
+
+def package_components(packet):
+    """
+    :param dict packet: DATA packet as returned by load_packet()
+    :return: engr_components - dictionary of {package key: {engineered component: quantity}} from every scheduled row,
+        or None if the packet has no components table
+    :rtype: dict | None
+    """
+    components: dict[str, list] | None = packet['components']
+    if components is None:
+        return None
+    engr_components: dict[str, dict[str, float]] = {}
+    for k, engr_cmp, q in zip(components['pkg_key'], components['engr_component'], components['qty']):
+        engr_components.setdefault(k, {})[engr_cmp] = q
+    return engr_components
@@ -6,17 +6,37 @@ a single sales order .csv file for order entry to directly upload into the enter
 
 Only generate_sales_order() called directly from an Excel project file by the Customer Service department.
 """
+import os
+import sqlite3
+
 import pandas as pd
 import xlwings as xw
 
+from quote.packet import load_packet
+from salesorder import load
 from salesorder.assign import engineered_components
-from salesorder.extract import quote_data, schedule_data
+from salesorder.extract import packet_data, quote_data, schedule_data
 from utils.rename import rename
 
 # IMMUTABLE GLOBAL VARIABLES USED FOR EASE IN UPDATING; THIS IS NOT BEST PRACTICE
 sorted_package_list: list[str] = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q',
                                   'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z', 'AA', 'AB', 'AC', 'AD', 'AE', 'AF', 'AG',
                                   'AH', 'AI', 'AJ', 'AK', 'AL', 'AM', 'AN']
+# also load the sales order lines straight into the order entry database (see salesorder.load)
+load_sales_order_db: bool = False
+
+
+def find_packet(wb):
+    """
+    :param xw.Book wb: calling Book object
+    :return: packet_file - filepath of the DATA packet written alongside the project file, or None if there is none
+    :rtype: str | None
+    """
+    ftype: str
+    for ftype in ('msgpack', 'json'):
+        if os.path.exists(packet_file := rename(wb, 'DATA', ftype)):
+            return packet_file
+    return None
 
 
 def generate_sales_order():
@@ -25,16 +45,25 @@ def generate_sales_order():
     creates a new Excel file with only that information multiplied accordingly.
     The new Excel file is saved in the calling folder and is ready for SQL import.
 
-    :return: None - Saves new file in active folder.
+    :return: stats - load_lines() statistics of the database load, or None if load_sales_order_db is off
+    :rtype: dict | None
     """
     # instantiate Book instance to interact with Excel
     wb: xw.Book = xw.Book.caller()
 
-    # extract required information from the schedule document and transform to structured dictionary
-    engr_components = schedule_data(wb)
+    # build from the DATA packet written by generate_quote() if one exists and still matches the quote
+    extracted: tuple[dict, dict, dict, dict] | None = None
+    if (packet_file := find_packet(wb)) is not None:
+        extracted = packet_data(wb, load_packet(packet_file))
+
+    if extracted is not None:
+        engr_components, part_dict, qty_dict, price_dict = extracted
+    else:
+        # extract required information from the schedule document and transform to structured dictionary
+        engr_components = schedule_data(wb)
 
-    # extract required information from the quote document and transform to organized structures
-    part_dict, qty_dict, price_dict = quote_data(wb)
+        # extract required information from the quote document and transform to organized structures
+        part_dict, qty_dict, price_dict = quote_data(wb)
 
     # assign engineered components to kits if required
     part_dict, qty_dict, price_dict = engineered_components(engr_components, part_dict, qty_dict, price_dict)
@@ -63,3 +92,16 @@ def generate_sales_order():
         outfile_df.to_excel(so_file, index=False, header=False)
     except PermissionError:
         raise Exception('Sales Order file is still open. Please close the sales order file and try again.')
+
+    # upsert the same lines into the database in one transaction, rather than importing the file by hand
+    if not load_sales_order_db:
+        return None
+    so_number: str = load.sales_order_number(wb)
+    con: sqlite3.Connection = load.connect()
+    try:
+        stats: dict[str, ...] = load.load_lines(con, so_number, list(zip(pn_list, qty_list, net_list)))
+    finally:
+        con.close()
+    print(f"{so_number}: {stats['rows']} lines ({stats['written']} written, {stats['removed']} removed) loaded in "
+          f"{stats['seconds'] * 1000:.1f} ms, {stats['rows_per_sec']:,.0f} rows/s")
+    return stats
@@ -3,9 +3,18 @@
 author: Sage Gendron
 Functions to extract data from the project Excel file (schedule and quote) and transforms the data into a usable data
 structure.
+
+packet_data() builds the same structures from the DATA packet written by generate_quote() plus a light read of the
+quote price columns; schedule_data()/quote_data() remain the fallback when there is no packet or the quote has changed
+since it was written (a schedule changed since then only has its engineered components read again).
 """
+import numpy as np
 import pandas as pd
 
+from quote.io import quote_kitqty
+from quote.packet import package_boms, package_components, package_quantities, schedule_components
+from utils.xlsx_ranges import sheet_digest
+
 
 def schedule_data(wb_sch):
     """
@@ -21,27 +30,8 @@ def schedule_data(wb_sch):
     df.dropna(thresh=3, inplace=True)
     df.reset_index(drop=True)
 
-    # transform DataFrame columns into transposed lists
-    eq_qty_list: list[int] = df['qty'].values.tolist()
-    pkg_key_list: list[str] = df['pkg_key'].values.tolist()
-    engr_component_list: list[str] = df['engr_component'].values.tolist()
-
-    # create dict of engineered components to be attributed by pkg key
-    engr_components: dict = {}
-    qty: int
-    pkg: str
-    engr_cmp: str
-    for qty, pkg, engr_cmp in zip(eq_qty_list, pkg_key_list, engr_component_list):
-        # filter out 0 quantity rows and empty rows
-        if type(pkg) is float or qty == 0 or type(engr_cmp) is float:
-            continue
-        # add the engineered component and quantity to the dictionary
-        if pkg not in engr_components.keys():
-            engr_components[pkg] = {engr_cmp: qty}
-        else:
-            engr_components[pkg][engr_cmp] = engr_components[pkg].get(engr_cmp, 0) + qty
-
-    return engr_components
+    return schedule_components(df['qty'].values.tolist(), df['pkg_key'].values.tolist(),
+                               df['engr_component'].values.tolist())
 
 
 def quote_data(wb_qte):
@@ -60,49 +50,139 @@ def quote_data(wb_qte):
                                      nrows=620)
     df.dropna(thresh=4, inplace=True)
 
-    # transform DataFrame columns into transposed lists
-    package_quantities: list[int] = df['pkg qty'].values.tolist()
+    return quote_packages(df)
+
+
+def quote_packages(df):
+    """
+    Splits the quote rows into packages by their PACK header rows, keeping the parts of packages with a quantity and a
+    package net > 0.
+
+    :param pd.DataFrame df: quote rows with pkg qty, parts, qty, net price, and pkg price columns
+    :return:
+        - part_dict - dictionary mapping a list of part numbers to package keys
+        - qty_dict - dictionary mapping a list of quantities to package keys
+        - price_dict - dictionary mapping a list of prices to package keys
+    :rtype: (dict, dict, dict)
+    """
+    # part cells as fixed width strings (blank for empty cells), so rows are classified by numpy comparisons of their
+    # first four characters rather than cell by cell
+    text: np.ndarray = df['parts'].fillna('').to_numpy(dtype=str)
+    prefix: np.ndarray = text.astype('<U4')
+
+    # mark PACK header rows and part rows (excluding blanks and auxiliary parts)
+    is_pack: np.ndarray = prefix == 'PACK'
+    is_part: np.ndarray = (text != '') & (prefix != 'AUX1') & (prefix != 'AUX2') & ~is_pack
+    # the running count of headers numbers the package each row falls under (0 before the first header)
+    pkg_n: np.ndarray = is_pack.cumsum()
+
+    # package key of each header (handle packages with keys > Z, ex. AA), and whether the package is included: zero
+    # quantity packages (ADDs, ALTs, 0 qty releases) and packages with no net are skipped
+    header_rows: np.ndarray = np.flatnonzero(is_pack)
+    keys: list[str] = [pt[-2] if len(pt) == 10 else f"A{pt[-2]}" for pt in text[header_rows].tolist()]
+    pkg_qtys: np.ndarray = df['pkg qty'].to_numpy()[header_rows]
+    included: np.ndarray = (pkg_qtys != 0.0) & (df['pkg price'].to_numpy()[header_rows] > 0.0)
+    # a key included twice keeps only its last package, as each PACK row restarts the lists of its key
+    last: dict[str, int] = {key: n for n, key in enumerate(keys, start=1) if included[n - 1]}
+    kept: np.ndarray = np.zeros(len(keys) + 1, dtype=bool)
+    kept[list(last.values())] = True
+
+    # forward fill each package's inclusion and quantity down its part rows by indexing with the package number
+    rows: np.ndarray = is_part & kept[pkg_n]
+    row_pkg_n: np.ndarray = pkg_n[rows]
+    # extended part quantities for the whole quote at once
+    ext_qty: list[float] = (df['qty'].to_numpy()[rows] * np.append(0, pkg_qtys)[row_pkg_n]).tolist()
+    part_numbers: list[str] = df['parts'].to_numpy()[rows].tolist()
+    part_prices: list[float] = df['net price'].to_numpy()[rows].tolist()
+
+    # the kept rows of each package are contiguous, so slice them out per package in quote order (included packages
+    # with no kept rows get empty lists)
+    starts: np.ndarray = np.searchsorted(row_pkg_n, list(last.values()), side='left')
+    ends: np.ndarray = np.searchsorted(row_pkg_n, list(last.values()), side='right')
+    part_dict: dict[str, list[str]] = {key: [] for key, include in zip(keys, included) if include}
+    qty_dict: dict[str, list[int]] = {key: [] for key in part_dict}
+    price_dict: dict[str, list[float]] = {key: [] for key in part_dict}
+    key: str
+    for key, start, end in zip(last, starts.tolist(), ends.tolist()):
+        part_dict[key] = part_numbers[start:end]
+        qty_dict[key] = ext_qty[start:end]
+        price_dict[key] = part_prices[start:end]
+
+    return part_dict, qty_dict, price_dict
+
+
+def packet_data(wb_qte, packet):
+    """
+    Extracts all information required to generate a sales order from the DATA packet, reading only package quantities,
+    parts, part quantities, and prices from the quote sheet. Package rows are located by their fixed quote positions,
+    so no PACK row scanning is required. The schedule is only read (see schedule_data()) if it has changed since the
+    packet was written, or the packet predates its engineered components table or schedule digest.
+
+    :param xw.Book wb_qte: Book object containing a generated quote sheet
+    :param dict packet: DATA packet written when the quote was generated (see quote.packet.load_packet())
+    :return:
+        - engr_components - dictionary of engineered components and quantities organized by package keys
+        - part_dict - dictionary mapping a list of part numbers to package keys
+        - qty_dict - dictionary mapping a list of quantities to package keys
+        - price_dict - dictionary mapping a list of prices to package keys
+        or None if the quote no longer matches the packet (edited after it was generated)
+    :rtype: (dict, dict, dict, dict) | None
+    """
+    # light read of the quote columns needed for pricing and the staleness check (row 14 is index 0)
+    df: pd.DataFrame = pd.read_excel(wb_qte.fullname, sheet_name='QUOTE', header=0, skiprows=12, nrows=620,
+                                     usecols=['pkg qty', 'parts', 'qty', 'net price', 'pkg price'])
+    df = df.reindex(range(620))
+    package_qtys: list[float] = df['pkg qty'].values.tolist()
     part_numbers: list[str] = df['parts'].values.tolist()
-    part_quantities: list[int] = df['qty'].values.tolist()
+    part_quantities: list[float] = df['qty'].values.tolist()
     part_prices: list[float] = df['net price'].values.tolist()
     package_prices: list[float] = df['pkg price'].values.tolist()
 
-    # instantiate structures for simple look up of quote data later
+    boms: dict[str, tuple[str, list[str], list[int]]] = package_boms(packet)
+    pkg_quantities: dict[str, float] = package_quantities(packet)
+
     part_dict: dict[str, list[str]] = {}
     qty_dict: dict[str, list[int]] = {}
     price_dict: dict[str, list[float]] = {}
 
-    # instantiate helper variables that only change when a quoted package has completed its loop
-    current_pkg: str = ''
-    current_pkg_qty: int = 0
-
-    # loop through part numbers in quote to identify which packages should be included in SO
-    pt: str
-    for pkg_qty, pt, pt_qty, pt_price, pkg_price in zip(
-            package_quantities, part_numbers, part_quantities, part_prices, package_prices):
-        if type(pt) is not float and pt.startswith('PACK'):
-            # handle zero quantity packages (ADDs, ALTs, 0 qty releases) and reset helper variables
-            if pkg_qty == 0.0:
-                current_pkg = ''
-                current_pkg_qty = 0
+    pkg_key: str
+    cell: str
+    for pkg_key, cell in quote_kitqty.items():
+        i: int = int(cell[1:]) - 14
+        pkg_qty: float = 0.0 if pd.isna(package_qtys[i]) else package_qtys[i]
+        _dwg, pns, qtys = boms.get(pkg_key, (None, [], []))
+
+        # the quote must still hold the package quantity and BOM the packet recorded, else the packet is stale
+        if pkg_qty != pkg_quantities.get(pkg_key, 0.0) or (pkg_qty != 0.0 and pkg_key not in boms):
+            return None
+        quoted: list[tuple[str, float]] = [(pt if type(pt) is str else '', q)
+                                           for pt, q in zip(part_numbers[i + 1:i + 1 + len(pns)],
+                                                            part_quantities[i + 1:i + 1 + len(pns)])]
+        if [pt for pt, _q in quoted] != [pn or '' for pn in pns] or \
+                any(pt != '' and q != qty for (pt, q), qty in zip(quoted, qtys)) or \
+                any(type(pt) is str for pt in part_numbers[i + 1 + len(pns):i + 15]):
+            return None
+
+        # only include packages with a quantity and a package net > 0
+        if pkg_qty == 0.0 or not package_prices[i] > 0.0:
+            continue
+        part_dict[pkg_key] = []
+        qty_dict[pkg_key] = []
+        price_dict[pkg_key] = []
+        # add parts, qtys, and net prices for the package, excluding blanks and auxiliary parts as quote_data() does
+        j: int
+        pn: str
+        for j, (pn, qty) in enumerate(zip(pns, qtys), start=i + 1):
+            if not pn or pn[:4] in ('AUX1', 'AUX2'):
                 continue
+            part_dict[pkg_key].append(pn)
+            qty_dict[pkg_key].append(qty * pkg_qty)
+            price_dict[pkg_key].append(part_prices[j])
 
-            # only proceed/include if the package net is > 0
-            if pkg_price > 0.0:
-                # handle packages with keys > Z (ex. AA)
-                current_pkg = pt[-2] if len(pt) == 10 else f"A{pt[-2]}"
-                # apply package quantity to local variable for multiplication at each part within package
-                current_pkg_qty = pkg_qty
-                # instantiate empty lists (at dict key pkg_key) for parts, quantities, and nets for the current pkg_key
-                part_dict[current_pkg]: list[str] = []
-                qty_dict[current_pkg]: list[int] = []
-                price_dict[current_pkg]: list[float] = []
-
-        # for each package, where current_pkg local variable is not blank, add parts, qtys, net prices to previously
-        # instantiated lists as required
-        elif current_pkg != '' and type(pt) is not float and pt != '' and pt[:4] not in ('AUX1', 'AUX2'):
-            part_dict[current_pkg].append(pt)
-            qty_dict[current_pkg].append(pt_qty * current_pkg_qty)
-            price_dict[current_pkg].append(pt_price)
+    # engineered components of every scheduled row, from the packet while the schedule is unchanged since quoting (its
+    # sheet digest matches the packet's), else read from the schedule as it is now, as schedule_data() counts them
+    engr_components: dict | None = package_components(packet)
+    if engr_components is None or packet['schedule_digest'] != sheet_digest(wb_qte.fullname, 'SCHEDULE'):
+        engr_components = schedule_data(wb_qte)
 
-    return part_dict, qty_dict, price_dict
+    return engr_components, part_dict, qty_dict, price_dict
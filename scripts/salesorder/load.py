@@ -0,0 +1,123 @@
+# scripts/salesorder/load.py
+"""
+author: Sage Gendron
+Loads sales order lines straight into the order entry SQL database through a DB-API 2.0 connection, in place of
+importing the SALES ORDER xlsx written by generate_sales_order() by hand. All lines of an order are written with one
+executemany() in a single transaction and upserted on (so_number, line), so loading the same order again changes
+nothing, and lines past the end of a re-loaded (shorter) order are removed in the same transaction.
+
+A local SQLite database (sales_order_db_loc) stands in for the enterprise server. Statements use the qmark parameter
+style shared by sqlite3 and pyodbc; pointing the loader at the server takes a connect() for its driver and its upsert
+dialect in upsert_sql (ie MERGE on SQL Server).
+
+    python -m salesorder.load [sales order xlsx] [sales order number]
+"""
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+import xlwings as xw
+
+# relevant location variables
+sales_order_db_loc: str = r'C:\Estimating\Data\sales_orders.sqlite'
+# schedule cell holding the sales order number (see smartsheet_update.so_cell)
+so_cell: str = 'G22'
+
+schema: str = """
+CREATE TABLE IF NOT EXISTS sales_order_lines (
+    so_number TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    part_number TEXT NOT NULL,
+    qty REAL,
+    net_price REAL,
+    loaded REAL NOT NULL,
+    PRIMARY KEY (so_number, line)
+);
+"""
+# insert new lines, and update existing lines only where they differ (so unchanged lines keep their load time)
+upsert_sql: str = """
+INSERT INTO sales_order_lines (so_number, line, part_number, qty, net_price, loaded) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (so_number, line) DO UPDATE SET
+    part_number = excluded.part_number, qty = excluded.qty, net_price = excluded.net_price, loaded = excluded.loaded
+WHERE part_number IS NOT excluded.part_number OR qty IS NOT excluded.qty OR net_price IS NOT excluded.net_price
+"""
+trim_sql: str = 'DELETE FROM sales_order_lines WHERE so_number = ? AND line > ?'
+
+
+def connect(db=None):
+    """
+    :param str db: filepath of the database (defaults to sales_order_db_loc)
+    :return: con - open DB-API connection with the sales order schema created
+    :rtype: sqlite3.Connection
+    """
+    con: sqlite3.Connection = sqlite3.connect(db or sales_order_db_loc)
+    con.executescript(schema)
+    return con
+
+
+def load_lines(con, so_number, lines):
+    """
+    Upserts every line of a sales order in one transaction (rolled back entirely if any line fails).
+
+    :param sqlite3.Connection con: open DB-API connection (see connect())
+    :param str so_number: sales order number
+    :param list lines: (part number, quantity, net price) of each line in sales order order
+    :return: stats - dictionary of {'rows': lines loaded, 'written': lines inserted or changed, 'removed': lines past
+        the end of the order deleted, 'seconds': time taken, 'rows_per_sec': lines loaded per second}
+    :rtype: dict
+    """
+    start: float = time.perf_counter()
+    loaded: float = time.time()
+    rows: list[tuple] = [(so_number, n, pn, qty, net, loaded) for n, (pn, qty, net) in enumerate(lines, start=1)]
+
+    cur: sqlite3.Cursor = con.cursor()
+    try:
+        cur.executemany(upsert_sql, rows)
+        written: int = cur.rowcount
+        cur.execute(trim_sql, (so_number, len(rows)))
+        removed: int = cur.rowcount
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    finally:
+        cur.close()
+
+    seconds: float = time.perf_counter() - start
+    return {'rows': len(rows), 'written': written, 'removed': removed, 'seconds': seconds,
+            'rows_per_sec': len(rows) / seconds if seconds else float('inf')}
+
+
+def sales_order_number(wb):
+    """
+    :param xw.Book wb: calling Book object
+    :return: so_number - sales order number entered on the schedule
+    :rtype: str
+    """
+    # one range read from the open workbook, as the number may not have been saved to the project file yet
+    so_no = wb.sheets['SCHEDULE'].range(so_cell).value
+    if so_no is None or type(so_no) is float:
+        raise Exception('Sales Order number not entered. Please add and try again.')
+    return str(so_no)
+
+
+def read_lines(fname):
+    """
+    :param str fname: filepath of a SALES ORDER xlsx written by generate_sales_order()
+    :return: lines - (part number, quantity, net price) of each line
+    :rtype: list
+    """
+    df: pd.DataFrame = pd.read_excel(fname, header=None, names=['part_number', 'qty', 'net_price'])
+    return list(zip(df['part_number'].tolist(), df['qty'].tolist(), df['net_price'].tolist()))
+
+
+if __name__ == '__main__':
+    # load an existing SALES ORDER xlsx
+    connection: sqlite3.Connection = connect()
+    try:
+        result: dict[str, ...] = load_lines(connection, sys.argv[2], read_lines(sys.argv[1]))
+    finally:
+        connection.close()
+    print(f"{result['rows']} lines ({result['written']} written, {result['removed']} removed) in "
+          f"{result['seconds'] * 1000:.1f} ms, {result['rows_per_sec']:,.0f} rows/s")
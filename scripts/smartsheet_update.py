@@ -13,6 +13,7 @@ import xlwings as xw
 
 from smartsheet_utils.create_objects import get_ss_client, create_cell
 from smartsheet_utils.upload import upload_attachments, upload_discussions, upload_row_info, sheet_id
+from utils.com_profiler import profile, write_summary
 from utils.rename import rename
 
 # general Excel cell locations
@@ -29,7 +30,7 @@ def update_ss():
     :return: None
     """
     # instantiate Book instance to interact with Excel
-    wb: xw.Book = xw.Book.caller()
+    wb: xw.Book = profile(xw.Book.caller())
     # instantiate smartsheet client with Quotes smartsheet
     ss_c: smartsheet.Smartsheet = get_ss_client(wb)
 
@@ -51,6 +52,9 @@ def update_ss():
     # push discussions to Smartsheet server
     _updated_discussions = upload_discussions(ss_c, job_row_id, fpath)
 
+    # write Excel round trip summary if profiling was requested
+    write_summary(wb)
+
 
 def mark_as_won():
     """
@@ -60,7 +64,7 @@ def mark_as_won():
     :return: None
     """
     # instantiate Book instance to interact with Excel
-    wb: xw.Book = xw.Book.caller()
+    wb: xw.Book = profile(xw.Book.caller())
     schedule = wb.sheets['SCHEDULE']
 
     # instantiate smartsheet client with Quotes smartsheet with api key selected from initials in filename
@@ -85,3 +89,6 @@ def mark_as_won():
 
     # push SS row object as an update to SS server via previously instantiated Sheets object
     _updated_row = ss_c.Sheets.update_rows(sheet_id, [job_row])
+
+    # write Excel round trip summary if profiling was requested
+    write_summary(wb)
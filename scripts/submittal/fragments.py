@@ -0,0 +1,229 @@
+# scripts/submittal/fragments.py
+"""
+author: Sage Gendron
+On-disk cache of pre-merged drawing fragments. Jobs repeat the same drawings, so each drawing is merged (deduplicated
+and compressed, see submittal.merge) once, stored under a key made from the content hash of its pdf, and later
+submittals are stitched together from the cached fragments. Spec sheets are not cached here: they come from the spec
+library (see submittal.spec_library), which already holds them deduplicated and compressed.
+
+The cache is bounded by total bytes (fragment_cache_bytes) with least recently used fragments evicted first, and keeps
+hit/miss counts across runs (see report()). Source pdf hashes are stored in the index with the file's modified time and
+size, so an unchanged drawing is never re-read from the network share to find its fragment.
+
+Several processes use the cache at once (ie submittal.sources.regenerate() workers and background submittal jobs), so
+flush() merges each process's index into the one on disk under a lock file rather than overwriting it, and indexes any
+fragment file found in the cache folder that no index lists.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from pdfrw import PdfReader
+
+from submittal.merge import write_merged
+
+# relevant location variables
+fragment_cache_loc: str = r'C:\Estimating\Data\submittal_fragments'
+# total size of all cached fragments before the least recently used are evicted
+fragment_cache_bytes: int = 512 * 1024 * 1024
+# seconds after which an index lock file is taken to be left behind by a process that died holding it
+index_lock_stale: float = 30.0
+# lifetime counts kept in the index
+counters: tuple[str, str, str] = ('hits', 'misses', 'evicted')
+
+# {'entries': {key: [bytes, last used]}, 'sources': {filepath: [modified time, size, content hash]}} plus lifetime
+# hit/miss/eviction counts, loaded from index.json on first use
+_index: dict[str, ...] | None = None
+_index_loc: str | None = None
+# lifetime counts as of the last load/flush, so only this process's own counts are added to the index on disk
+_counted: dict[str, int] = {}
+# fragments are looked up from concat()'s thread pool
+_lock: threading.Lock = threading.Lock()
+
+
+def _read_index(index_loc):
+    try:
+        with open(index_loc) as infile:
+            return json.load(infile)
+    except (OSError, ValueError):
+        return {'entries': {}, 'sources': {}, 'hits': 0, 'misses': 0, 'evicted': 0}
+
+
+def _load_index():
+    global _index, _index_loc, _counted
+
+    index_loc: str = os.path.join(fragment_cache_loc, 'index.json')
+    if _index is None or _index_loc != index_loc:
+        _index = _read_index(index_loc)
+        _index_loc = index_loc
+        _counted = {count: _index[count] for count in counters}
+    return _index
+
+
+def file_digest(fname):
+    """
+    :param str fname: filepath of a source pdf
+    :return: digest - hex sha1 of the file contents (only re-read if the file changed since it was last hashed)
+    :rtype: str
+    """
+    stat: os.stat_result = os.stat(fname)
+    with _lock:
+        cached: list | None = _load_index()['sources'].get(fname)
+    if cached is not None and cached[:2] == [stat.st_mtime, stat.st_size]:
+        return cached[2]
+
+    with open(fname, 'rb') as infile:
+        digest: str = hashlib.sha1(infile.read()).hexdigest()
+    with _lock:
+        _index['sources'][fname] = [stat.st_mtime, stat.st_size, digest]
+    return digest
+
+
+def fragment_pages(key, build):
+    """
+    Returns the pages of a cached fragment, merging and storing the fragment first if it isn't cached.
+
+    :param str key: fragment key (content hashes of its sources)
+    :param function build: argument-less function returning the lists of pdfrw pages making up the fragment
+    :return: pages - pdfrw pages of the fragment
+    :rtype: list
+    """
+    fname: str = os.path.join(fragment_cache_loc, f"{key}.pdf")
+    with _lock:
+        index: dict[str, ...] = _load_index()
+        hit: bool = key in index['entries'] and os.path.exists(fname)
+        index['hits' if hit else 'misses'] += 1
+        if hit:
+            index['entries'][key][1] = time.time()
+
+    # fragments are parsed again on every hit rather than kept for the life of the process, so each caller gets its
+    # own pages and memory stays flat in long-lived workers (the fragment file is small and already merged)
+    if hit:
+        return PdfReader(fname).pages
+
+    # merge the fragment and write it to a temporary file so other runs never read a partial fragment
+    page_lists: list[list] = build()
+    os.makedirs(fragment_cache_loc, exist_ok=True)
+    tmp_file: str = f"{fname}.{os.getpid()}.{threading.get_ident()}.tmp"
+    write_merged(tmp_file, page_lists)
+    os.replace(tmp_file, fname)
+
+    with _lock:
+        # the index may have been replaced by a flush() while the fragment was merged
+        index = _load_index()
+        index['entries'][key] = [os.path.getsize(fname), time.time()]
+        _evict(index, keep=key)
+    # the pages just merged are used as is (the written fragment is only read back by later runs)
+    return [page for pages in page_lists for page in pages]
+
+
+def _evict(index, keep):
+    # drop least recently used fragments until the cache fits its byte budget (never the fragment just written)
+    total: int = sum(size for size, _used in index['entries'].values())
+    for key, (size, _used) in sorted(index['entries'].items(), key=lambda e: e[1][1]):
+        if total <= fragment_cache_bytes:
+            break
+        if key == keep:
+            continue
+        try:
+            os.remove(os.path.join(fragment_cache_loc, f"{key}.pdf"))
+        except OSError:
+            pass
+        del index['entries'][key]
+        index['evicted'] += 1
+        total -= size
+
+
+def drawing_pages(fname):
+    """
+    :param str fname: filepath of a drawing
+    :return: pages - pdfrw pages of the drawing's cached fragment
+    :rtype: list
+    """
+    return fragment_pages(f"dwg-{file_digest(fname)}", lambda: [PdfReader(fname).pages])
+
+
+@contextmanager
+def _file_lock(fname):
+    # held while the lock file exists; creating it fails if another process (on any machine) holds it
+    while True:
+        try:
+            fd: int = os.open(fname, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(fname) > index_lock_stale:
+                    os.remove(fname)
+                    continue
+            except OSError:
+                continue
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(fname)
+
+
+def _merge(disk, index):
+    # this process's index merged into the one on disk: the latest use of each fragment, every source hash, and this
+    # process's counts since it loaded the index
+    merged: dict[str, ...] = {'entries': dict(disk['entries']), 'sources': {**disk['sources'], **index['sources']}}
+    key: str
+    for key, (size, used) in index['entries'].items():
+        if key not in merged['entries'] or merged['entries'][key][1] < used:
+            merged['entries'][key] = [size, used]
+    for count in counters:
+        merged[count] = disk[count] + index[count] - _counted[count]
+
+    # the cache folder is the record of which fragments exist: drop entries whose fragment another process evicted,
+    # and index fragments written by a process that never flushed (by size and modified time)
+    listed: dict[str, os.DirEntry] = {entry.name[:-4]: entry for entry in os.scandir(fragment_cache_loc)
+                                      if entry.name.endswith('.pdf')}
+    merged['entries'] = {key: entry for key, entry in merged['entries'].items() if key in listed}
+    entry: os.DirEntry
+    for key, entry in listed.items():
+        if key not in merged['entries']:
+            stat: os.stat_result = entry.stat()
+            merged['entries'][key] = [stat.st_size, stat.st_mtime]
+    return merged
+
+
+def flush():
+    """
+    Merges the fragment index (last used times, source hashes, and hit/miss counts) into the index in the cache folder,
+    evicts fragments over the byte budget, and writes the index back.
+
+    :return: None
+    """
+    global _index, _counted
+
+    with _lock:
+        if _index is None:
+            return
+        os.makedirs(fragment_cache_loc, exist_ok=True)
+        with _file_lock(f"{_index_loc}.lock"):
+            merged: dict[str, ...] = _merge(_read_index(_index_loc), _index)
+            _evict(merged, keep=None)
+            tmp_file: str = f"{_index_loc}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w') as outfile:
+                json.dump(merged, outfile)
+            os.replace(tmp_file, _index_loc)
+        _index = merged
+        _counted = {count: merged[count] for count in counters}
+
+
+def report():
+    """
+    :return: summary - dictionary of fragments cached, bytes cached, hits, misses, hit rate, and fragments evicted
+    :rtype: dict
+    """
+    with _lock:
+        index: dict[str, ...] = _load_index()
+        lookups: int = index['hits'] + index['misses']
+        return {'fragments': len(index['entries']), 'bytes': sum(e[0] for e in index['entries'].values()),
+                'hits': index['hits'], 'misses': index['misses'],
+                'hit rate': index['hits'] / lookups if lookups else 0.0, 'evicted': index['evicted']}
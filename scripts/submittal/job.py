@@ -0,0 +1,166 @@
+# scripts/submittal/job.py
+"""
+author: Sage Gendron
+Background submittal generation. start() launches a worker process that builds the submittal (see
+product_submittal.build_submittal()) and returns immediately, so Excel isn't frozen while drawings are resolved and pdfs
+are merged. The worker writes its progress to a status file next to the project file, which the workbook can poll:
+
+    {"state": "queued" | "running" | "done" | "failed" | "cancelled", "stage": ..., "drawings_total": ...,
+     "drawings_resolved": ..., "missing_drawings": [...], "pages_merged": ..., "bytes_written": ..., "target": ...,
+     "error": ..., "pid": ..., "started": ..., "updated": ...}
+
+cancel() drops a flag file next to the project file, which the worker checks at every progress update.
+
+    python -m submittal.job [project filepath]
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from utils.rename import rename
+
+# a running job not heard from in this many seconds is assumed to have died
+stale_after: int = 600
+
+
+class Cancelled(Exception):
+    pass
+
+
+def status_path(fullname):
+    """
+    :param str fullname: filepath of the project file
+    :return: status_path - filepath of the job's status file
+    :rtype: str
+    """
+    return rename(fullname, 'SUBMITTAL', 'status.json')
+
+
+def cancel_path(fullname):
+    """
+    :param str fullname: filepath of the project file
+    :return: cancel_path - filepath of the job's cancellation flag
+    :rtype: str
+    """
+    return rename(fullname, 'SUBMITTAL', 'cancel')
+
+
+def read_status(fullname):
+    """
+    :param str fullname: filepath of the project file
+    :return: status - last status written for the project's submittal job, or None if no job has been started
+    :rtype: dict | None
+    """
+    try:
+        with open(status_path(fullname)) as infile:
+            return json.load(infile)
+    except (OSError, ValueError):
+        return None
+
+
+def running(fullname):
+    """
+    :param str fullname: filepath of the project file
+    :return: running - a submittal job for the project is queued or running (and has reported within stale_after)
+    :rtype: bool
+    """
+    status: dict[str, ...] | None = read_status(fullname)
+    return status is not None and status['state'] in ('queued', 'running') and \
+        time.time() - status['updated'] < stale_after
+
+
+def _write_status(fullname, status, retries=10):
+    # write to a temporary file then replace, so a poll never reads a partial status; the workbook may have the status
+    # file open for a moment (PermissionError on Windows), so retry rather than fail the job
+    status['updated'] = time.time()
+    target: str = status_path(fullname)
+    tmp_file: str = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w') as outfile:
+        json.dump(status, outfile)
+    for _ in range(retries):
+        try:
+            os.replace(tmp_file, target)
+            return
+        except PermissionError:
+            time.sleep(0.1)
+    os.remove(tmp_file)
+
+
+def start(fullname):
+    """
+    Launches a background worker process building the project's submittal.
+
+    :param str fullname: filepath of the project file
+    :return: status_path - filepath of the status file the worker reports progress to
+    :rtype: str
+    """
+    if running(fullname):
+        raise Exception('Please wait for the submittal currently being generated to finish (or cancel it) and try '
+                        'again.')
+
+    # clear any cancellation left over from a previous job before the worker can see it
+    if os.path.exists(cancel_path(fullname)):
+        os.remove(cancel_path(fullname))
+    _write_status(fullname, {'state': 'queued', 'started': time.time(), 'target': rename(fullname, 'SUBMITTAL', 'pdf')})
+
+    # run from the scripts folder so the worker resolves the same modules, detached from the Excel process on Windows
+    scripts_dir: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    flags: int = subprocess.CREATE_NO_WINDOW | subprocess.DETACHED_PROCESS if sys.platform == 'win32' else 0
+    subprocess.Popen([sys.executable, '-m', 'submittal.job', fullname], cwd=scripts_dir, creationflags=flags,
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return status_path(fullname)
+
+
+def cancel(fullname):
+    """
+    Asks the project's running submittal job to stop at its next progress update.
+
+    :param str fullname: filepath of the project file
+    :return: None
+    """
+    with open(cancel_path(fullname), 'w') as outfile:
+        outfile.write(str(time.time()))
+
+
+def run(fullname):
+    """
+    Builds the project's submittal, writing progress to its status file (the background worker's entry point).
+
+    :param str fullname: filepath of the project file
+    :return: status - final status of the job
+    :rtype: dict
+    """
+    # imported here as product_submittal imports this module for its Excel entry points
+    from product_submittal import build_submittal
+
+    status: dict[str, ...] = read_status(fullname) or {'started': time.time()}
+    status.update({'state': 'running', 'stage': 'starting', 'pid': os.getpid(),
+                   'target': rename(fullname, 'SUBMITTAL', 'pdf'), 'drawings_total': 0, 'drawings_resolved': 0,
+                   'missing_drawings': [], 'pages_merged': 0, 'bytes_written': 0, 'error': None})
+
+    def progress(**fields):
+        if os.path.exists(cancel_path(fullname)):
+            raise Cancelled()
+        status.update(fields)
+        _write_status(fullname, status)
+
+    try:
+        progress()
+        build_submittal(fullname, progress)
+        status['state'] = 'done'
+    except Cancelled:
+        status['state'] = 'cancelled'
+    except Exception as e:
+        status.update({'state': 'failed', 'error': str(e)})
+    finally:
+        if os.path.exists(cancel_path(fullname)):
+            os.remove(cancel_path(fullname))
+
+    _write_status(fullname, status)
+    return status
+
+
+if __name__ == '__main__':
+    run(sys.argv[1])
@@ -0,0 +1,334 @@
+# scripts/submittal/merge.py
+"""
+author: Sage Gendron
+Writes merged submittal pdfs. Drawings from the same CAD template and spec sheets from the same vendor each embed their
+own copy of the same fonts, logos, and title blocks, which a plain merge copies into the submittal once per source
+file. Before writing, every shared (indirect) object reachable from the pages is hashed by content and pages are
+pointed at a single copy of each, then content streams are flate compressed.
+
+write_merged() holds every page of the submittal until the file is written; write_streamed() writes each source's
+objects as soon as the source is read and lets it go, so memory stays flat however many drawings a submittal has.
+Neither rewrites the pages handed to it (they may be cached and merged again, see submittal.spec_library):
+write_merged() deduplicates and compresses copies of them (see copy_pages()) and write_streamed() compresses copies of
+their streams.
+
+Written submittals can then be linearized (see linearize()) so viewers opening them over the network can show the
+first page before the rest of the file has downloaded.
+"""
+import hashlib
+import os
+
+import pikepdf
+
+from pdfrw import IndirectPdfDict, PdfArray, PdfDict, PdfName, PdfObject, PdfWriter
+from pdfrw.compress import compress as compress_streams
+from pdfrw.pdfwriter import user_fmt
+from pdfrw.py23_diffs import convert_store
+
+
+def _digest(obj, memo, active):
+    # content hash of a pdf object, with dictionaries/arrays hashed through their (resolved) children
+    if not isinstance(obj, (PdfDict, PdfArray)):
+        return f"{type(obj).__name__}:{obj}".encode('latin-1', 'replace')
+    if id(obj) in memo:
+        return memo[id(obj)]
+    # cycles other than /Parent (skipped below) are hashed by position only
+    if id(obj) in active:
+        return b'cycle'
+    active.add(id(obj))
+
+    h = hashlib.sha1()
+    if isinstance(obj, PdfDict):
+        h.update(b'<<')
+        for k, v in sorted(obj.iteritems()):
+            if k != '/Parent':
+                h.update(k.encode('latin-1'))
+                h.update(_digest(v, memo, active))
+        if obj.stream is not None:
+            h.update(b'stream')
+            h.update(obj.stream.encode('latin-1'))
+    else:
+        h.update(b'[')
+        for v in obj:
+            h.update(_digest(v, memo, active))
+
+    active.discard(id(obj))
+    memo[id(obj)] = h.digest()
+    return memo[id(obj)]
+
+
+def copy_pages(pages):
+    """
+    Copies pages and every object reachable from them, keeping objects shared between pages shared. Inheritable page
+    attributes are pinned to the page copies, whose /Parent is left pointing at the source page tree (which is replaced
+    when the pages are written, see PdfWriter.addpage()).
+
+    :param list pages: pdfrw pages
+    :return: copies - copies of the pages, in order
+    :rtype: list
+    """
+    # {id(object): copy}; the source objects are held by the caller's pages, so their ids can't be reused meanwhile
+    copies: dict[int, PdfDict | PdfArray] = {}
+
+    def copy(obj):
+        if not isinstance(obj, (PdfDict, PdfArray)):
+            return obj
+        if id(obj) in copies:
+            return copies[id(obj)]
+        if isinstance(obj, PdfArray):
+            new_array: PdfArray = PdfArray()
+            new_array.indirect = obj.indirect
+            copies[id(obj)] = new_array
+            new_array.extend(copy(v) for v in obj)
+            return new_array
+
+        new: PdfDict = PdfDict()
+        new.indirect = obj.indirect
+        new._stream = obj.stream
+        copies[id(obj)] = new
+        is_page: bool = obj.Type == PdfName.Page
+        items: dict = dict(obj.iteritems())
+        if is_page:
+            inheritable: PdfDict = obj.inheritable
+            items.update({k: v for k, v in ((PdfName.Resources, inheritable.Resources),
+                                            (PdfName.MediaBox, inheritable.MediaBox),
+                                            (PdfName.CropBox, inheritable.CropBox),
+                                            (PdfName.Rotate, inheritable.Rotate)) if v is not None})
+        for k, v in items.items():
+            new[k] = v if is_page and k == '/Parent' else copy(v)
+        return new
+
+    return [copy(page) for page in pages]
+
+
+def dedupe_pages(pages):
+    """
+    Points every page at a single copy of each distinct shared object (fonts, images, form XObjects, content streams).
+    Objects are only ever replaced by objects with identical content, so the pages render the same. The pages and the
+    objects they reference are rewritten in place, so pass copies of pages that are used again (see copy_pages()).
+
+    :param list pages: pdfrw pages to be merged
+    :return: duplicates - number of duplicate shared objects dropped
+    :rtype: int
+    """
+    memo: dict[int, bytes] = {}
+    canonical: dict[bytes, PdfDict | PdfArray] = {}
+    visited: set[int] = set()
+    duplicates: int = 0
+
+    def shared(obj):
+        nonlocal duplicates
+        if not isinstance(obj, (PdfDict, PdfArray)):
+            return obj
+        # only indirect objects are written once and referenced, direct objects are written inline wherever they are
+        if obj.indirect:
+            first = canonical.setdefault(_digest(obj, memo, set()), obj)
+            if first is not obj:
+                duplicates += 1
+                return first
+        visit(obj)
+        return obj
+
+    def visit(obj):
+        if id(obj) in visited:
+            return
+        visited.add(id(obj))
+        if isinstance(obj, PdfDict):
+            for k, v in list(obj.iteritems()):
+                if k != '/Parent':
+                    obj[k] = shared(v)
+        else:
+            for i, v in enumerate(list(obj)):
+                obj[i] = shared(v)
+
+    page: PdfDict
+    for page in pages:
+        # resources can be inherited from the page tree, so pin them to the page before deduplicating
+        page.Resources = page.inheritable.Resources
+        visit(page)
+
+    return duplicates
+
+
+def write_merged(target, page_lists, dedupe=True, compress=True):
+    """
+    Merges pages into a single pdf.
+
+    :param str target: filepath of the pdf to write
+    :param list page_lists: lists of pdfrw pages, in the order they are to appear
+    :param bool dedupe: write a single copy of identical fonts, images, and other shared objects
+    :param bool compress: flate compress uncompressed streams
+    :return: duplicates - number of duplicate shared objects dropped
+    :rtype: int
+    """
+    # deduplicate and compress copies, leaving the callers' (possibly cached) pages as they were read
+    pages: list[PdfDict] = [page for page_list in page_lists for page in page_list]
+    if dedupe or compress:
+        pages = copy_pages(pages)
+    duplicates: int = dedupe_pages(pages) if dedupe else 0
+
+    merger: PdfWriter = PdfWriter(compress=compress)
+    merger.addpages(pages)
+    merger.write(target)
+    return duplicates
+
+
+class StreamWriter:
+    """
+    Writes a merged pdf incrementally: every object reachable from a source's pages is written (and forgotten) as soon
+    as the source is added, and only the page tree, cross-reference offsets, and the content hashes of shared objects
+    written so far (for deduplication across sources) are kept until the file is finished.
+    """
+    def __init__(self, outfile, dedupe=True, compress=True):
+        self.outfile = outfile
+        self.dedupe: bool = dedupe
+        self.compress: bool = compress
+        # byte offset of each object by object number (0 is the free list head)
+        self.offsets: list[int | None] = [None]
+        # page object numbers, in order
+        self.kids: list[int] = []
+        # {content hash: object number} of every shared object written
+        self.written: dict[bytes, int] = {}
+        self.duplicates: int = 0
+
+        self.outfile.write(b'%PDF-1.3\n%\xe2\xe3\xcf\xd3\n')
+        self.pages_ref: PdfObject = PdfObject(f"{self._reserve()} 0 R")
+
+    def _reserve(self):
+        self.offsets.append(None)
+        return len(self.offsets) - 1
+
+    def add_pages(self, pages):
+        """
+        Writes a source's pages and every object they reference.
+
+        :param list pages: pdfrw pages of a single source
+        :return: None
+        """
+        # {id(object): (object number, object)} and digest memo for this source only; objects are held so their ids
+        # can't be reused by new objects while the source is written
+        numbers: dict[int, tuple[int, PdfDict | PdfArray]] = {}
+        memo: dict[int, bytes] = {}
+        pending: list[tuple[int, PdfDict | PdfArray]] = []
+
+        def ref(obj):
+            if id(obj) in numbers:
+                return numbers[id(obj)][0]
+            obj_type: str | None = obj.Type if isinstance(obj, PdfDict) else None
+            # the source's own page tree/catalog are replaced by the merged file's
+            if obj_type in (PdfName.Pages, PdfName.Catalog):
+                return None
+            # pages are never shared, even if identical
+            if self.dedupe and obj_type != PdfName.Page:
+                digest: bytes = _digest(obj, memo, set())
+                if digest in self.written:
+                    self.duplicates += 1
+                    numbers[id(obj)] = (self.written[digest], obj)
+                    return self.written[digest]
+                self.written[digest] = num = self._reserve()
+            else:
+                num = self._reserve()
+            numbers[id(obj)] = (num, obj)
+            pending.append((num, obj))
+            return num
+
+        def fmt(obj):
+            # indirect objects (and all streams) are written once and referenced
+            if isinstance(obj, PdfDict) and (obj.indirect or obj.stream is not None):
+                return 'null' if (num := ref(obj)) is None else f"{num} 0 R"
+            if isinstance(obj, PdfArray) and obj.indirect:
+                return f"{ref(obj)} 0 R"
+            return body(obj)
+
+        def body(obj):
+            if isinstance(obj, PdfDict):
+                return '<<' + ' '.join(f"{getattr(k, 'encoded', None) or k} {fmt(v)}"
+                                       for k, v in sorted(obj.iteritems())) + '>>'
+            if isinstance(obj, PdfArray):
+                return '[' + ' '.join(fmt(v) for v in obj) + ']'
+            if hasattr(obj, 'indirect'):
+                return str(getattr(obj, 'encoded', None) or obj)
+            return user_fmt(obj)
+
+        page: PdfDict
+        for page in pages:
+            # copy inheritable attributes onto the page and point it at the merged page tree (see PdfWriter.addpage())
+            inheritable: PdfDict = page.inheritable
+            self.kids.append(ref(IndirectPdfDict(page, Resources=inheritable.Resources, MediaBox=inheritable.MediaBox,
+                                                 CropBox=inheritable.CropBox, Rotate=inheritable.Rotate,
+                                                 Parent=self.pages_ref)))
+            while pending:
+                num, obj = pending.pop()
+                if self.compress and isinstance(obj, PdfDict) and obj.stream is not None:
+                    # compress a copy, leaving the source's (possibly cached) stream as it was read
+                    obj = PdfDict(obj)
+                    compress_streams([obj])
+                text: str = body(obj)
+                if isinstance(obj, PdfDict) and obj.stream is not None:
+                    text = f"{text}\nstream\n{obj.stream}\nendstream"
+                self.offsets[num] = self.outfile.tell()
+                self.outfile.write(convert_store(f"{num} 0 obj\n{text}\nendobj\n"))
+
+    def close(self):
+        """
+        Writes the page tree, catalog, cross-reference table, and trailer.
+
+        :return: None
+        """
+        pages_num: int = int(self.pages_ref.split()[0])
+        self.offsets[pages_num] = self.outfile.tell()
+        kids: str = ' '.join(f"{num} 0 R" for num in self.kids)
+        self.outfile.write(convert_store(f"{pages_num} 0 obj\n<</Count {len(self.kids)} /Kids [{kids}] /Type /Pages>>"
+                                         f"\nendobj\n"))
+        root_num: int = self._reserve()
+        self.offsets[root_num] = self.outfile.tell()
+        self.outfile.write(convert_store(f"{root_num} 0 obj\n<</Pages {pages_num} 0 R /Type /Catalog>>\nendobj\n"))
+
+        xref: int = self.outfile.tell()
+        lines: list[str] = [f"xref\n0 {len(self.offsets)}\n0000000000 65535 f \n"]
+        lines.extend(f"{offset:010d} 00000 n \n" for offset in self.offsets[1:])
+        lines.append(f"trailer\n<</Root {root_num} 0 R /Size {len(self.offsets)}>>\nstartxref\n{xref}\n%%EOF\n")
+        self.outfile.write(convert_store(''.join(lines)))
+
+
+def write_streamed(target, sources, dedupe=True, compress=True, progress=None):
+    """
+    Merges pages into a single pdf, writing each source as soon as it is read so only one source (plus any the caller
+    is prefetching) is held in memory at a time.
+
+    :param str target: filepath of the pdf to write
+    :param Iterable sources: lists of pdfrw pages (ie a generator reading one drawing at a time), in order
+    :param bool dedupe: write a single copy of identical fonts, images, and other shared objects
+    :param bool compress: flate compress uncompressed streams
+    :param function progress: optional function called with pages_merged and bytes_written after each source
+    :return: duplicates - number of duplicate shared objects dropped
+    :rtype: int
+    """
+    with open(target, 'wb') as outfile:
+        writer: StreamWriter = StreamWriter(outfile, dedupe, compress)
+        pages: list
+        for pages in sources:
+            writer.add_pages(pages)
+            if progress is not None:
+                progress(pages_merged=len(writer.kids), bytes_written=outfile.tell())
+        writer.close()
+    return writer.duplicates
+
+
+def linearize(target):
+    """
+    Rewrites a pdf in place as a linearized ("fast web view") pdf with objects packed into compressed object streams.
+
+    :param str target: filepath of the pdf to rewrite
+    :return: None - file is rewritten
+    """
+    tmp_file: str = f"{target}.{os.getpid()}.tmp"
+    try:
+        with pikepdf.open(target) as pdf:
+            pdf.save(tmp_file, linearize=True, object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                     compress_streams=True)
+        os.replace(tmp_file, target)
+    finally:
+        # a failed save leaves the original pdf in place, without the partial rewrite beside it
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
@@ -0,0 +1,196 @@
+# scripts/submittal/sources.py
+"""
+author: Sage Gendron
+Reverse dependency index of generated submittals. Every submittal written by product_submittal.concat() records the
+drawing and spec sheet files it was built from, with their content hashes, in a local SQLite database. When engineering
+revises a drawing or spec sheet, affected() finds the submittals built from an older version of it and regenerate()
+rebuilds just those submittals in parallel worker processes (see submittal.job, so each job's workbook can follow its
+progress as usual).
+
+    python -m submittal.sources [changed filepath ...]
+
+With no filepaths, every recorded source is checked for changes.
+"""
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from submittal import job
+from submittal.fragments import file_digest
+
+# relevant location variables
+source_index_loc: str = r'C:\Estimating\Data\submittal_sources.sqlite'
+# number of submittals regenerated at once
+regen_workers: int = 4
+
+schema: str = """
+CREATE TABLE IF NOT EXISTS submittals (
+    submittal_id INTEGER PRIMARY KEY,
+    project TEXT UNIQUE NOT NULL,
+    target TEXT NOT NULL,
+    built REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    submittal_id INTEGER NOT NULL REFERENCES submittals ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    sha1 TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    fsize INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_sources_path ON sources (path);
+CREATE INDEX IF NOT EXISTS ix_sources_submittal ON sources (submittal_id);
+"""
+
+
+def connect(db=None):
+    """
+    :param str db: filepath of the index (defaults to source_index_loc)
+    :return: con - open connection with the index schema created
+    :rtype: sqlite3.Connection
+    """
+    # several regeneration workers may record their submittals at the same time, so wait out each other's writes
+    con: sqlite3.Connection = sqlite3.connect(db or source_index_loc, timeout=30)
+    con.execute('PRAGMA foreign_keys = ON')
+    con.executescript(schema)
+    return con
+
+
+def _key(fname):
+    # one spelling per file, so lookups match however the path was typed
+    return os.path.normcase(os.path.abspath(fname))
+
+
+def record(fullname, target, dwg_paths, spec_paths):
+    """
+    Replaces the recorded sources of a project's submittal with the files it was just built from.
+
+    :param str fullname: filepath of the project file
+    :param str target: filepath of the submittal written
+    :param list dwg_paths: filepaths of the drawings merged
+    :param list spec_paths: filepaths of the spec sheets merged
+    :return: None - the index is updated
+    """
+    rows: list[tuple[str, str, str, float, int]] = []
+    kind: str
+    paths: list[str]
+    for kind, paths in (('drawing', dwg_paths), ('spec', spec_paths)):
+        fname: str
+        for fname in dict.fromkeys(paths):
+            stat: os.stat_result = os.stat(fname)
+            rows.append((_key(fname), kind, file_digest(fname), stat.st_mtime, stat.st_size))
+
+    con: sqlite3.Connection = connect()
+    with con:
+        con.execute('DELETE FROM submittals WHERE project = ?', (os.path.abspath(fullname),))
+        submittal_id: int = con.execute('INSERT INTO submittals (project, target, built) VALUES (?, ?, ?)',
+                                        (os.path.abspath(fullname), target, time.time())).lastrowid
+        con.executemany('INSERT INTO sources VALUES (?, ?, ?, ?, ?, ?)', [(submittal_id, *row) for row in rows])
+    con.close()
+
+
+def affected(changed=None):
+    """
+    Finds the submittals built from an older version of a source file (or from a source file since deleted).
+
+    :param list changed: filepaths of revised drawings/spec sheets, or None to check every recorded source
+    :return: stale - dictionary of project filepaths: sorted list of their changed source filepaths
+    :rtype: dict
+    """
+    if changed is not None and not changed:
+        return {}
+
+    # every recorded version of the sources to check
+    con: sqlite3.Connection = connect()
+    query: str = 'SELECT DISTINCT path, sha1, mtime, fsize FROM sources'
+    params: list[str] = []
+    if changed is not None:
+        params = list(dict.fromkeys(_key(f) for f in changed))
+        query += f" WHERE path IN ({', '.join('?' * len(params))})"
+    recorded: list[tuple[str, str, float, int]] = con.execute(query, params).fetchall()
+
+    versions: dict[str, list[tuple[str, float, int]]] = {}
+    path: str
+    for path, sha1, mtime, fsize in recorded:
+        versions.setdefault(path, []).append((sha1, mtime, fsize))
+
+    # a recorded version is changed if its file is gone or the file's contents now differ from it (the file is only
+    # re-hashed when its size or mtime matches none of its recorded versions)
+    stale_versions: list[tuple[str, str]] = []
+    for path, recorded_versions in versions.items():
+        current: str | None = None
+        try:
+            stat: os.stat_result = os.stat(path)
+            current = next((sha1 for sha1, mtime, fsize in recorded_versions
+                            if (stat.st_mtime, stat.st_size) == (mtime, fsize)), None) or file_digest(path)
+        except FileNotFoundError:
+            pass
+        stale_versions.extend((path, sha1) for sha1, _mtime, _fsize in recorded_versions if sha1 != current)
+
+    # reverse lookup of every submittal built from a changed version of those sources
+    stale: dict[str, list[str]] = {}
+    project: str
+    for path, sha1 in dict.fromkeys(stale_versions):
+        for (project,) in con.execute('SELECT project FROM submittals JOIN sources USING (submittal_id) '
+                                      'WHERE path = ? AND sha1 = ?', (path, sha1)):
+            stale.setdefault(project, []).append(path)
+    con.close()
+    return {project: sorted(set(paths)) for project, paths in sorted(stale.items())}
+
+
+def regenerate(projects, workers=None):
+    """
+    Rebuilds the submittals of the given projects in parallel worker processes. Projects whose file no longer exists are
+    dropped from the index, and projects with a submittal job already running are left to that job.
+
+    :param list projects: filepaths of the project files
+    :param int workers: number of submittals built at once (defaults to regen_workers)
+    :return: results - dictionary of project filepaths: last job status (None if the project file is gone)
+    :rtype: dict
+    """
+    results: dict[str, dict | None] = {project: None for project in projects if not os.path.exists(project)}
+    if results:
+        con: sqlite3.Connection = connect()
+        with con:
+            con.executemany('DELETE FROM submittals WHERE project = ?', [(project,) for project in results])
+        con.close()
+    # leave submittals already being generated from the workbook to that job
+    results.update({project: job.read_status(project) for project in projects
+                    if project not in results and job.running(project)})
+
+    # each submittal is built in its own process with its own status file, as generate_submittal_background() does
+    building: list[str] = [project for project in projects if project not in results]
+    with ProcessPoolExecutor(min(workers or regen_workers, len(building) or 1)) as pool:
+        results.update(zip(building, pool.map(job.run, building)))
+    return results
+
+
+def main(changed=None):
+    """
+    Regenerates every submittal built from a changed source file.
+
+    :param list changed: filepaths of revised drawings/spec sheets, or None to check every recorded source
+    :return: results - dictionary of project filepaths: final job status (see regenerate())
+    :rtype: dict
+    """
+    stale: dict[str, list[str]] = affected(changed)
+    project: str
+    for project, paths in stale.items():
+        print(f"{project}: {', '.join(os.path.basename(path) for path in paths)}")
+
+    start: float = time.perf_counter()
+    results: dict[str, dict | None] = regenerate(list(stale))
+    status: dict[str, ...] | None
+    for project, status in results.items():
+        if status is None:
+            print(f"{project}: project file missing, dropped")
+        else:
+            print(f"{project}: {status['state']}{'' if status.get('error') is None else ' (' + status['error'] + ')'}")
+    print(f"{len(results)} submittals regenerated in {time.perf_counter() - start:.1f} s")
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or None)
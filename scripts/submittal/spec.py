@@ -3,6 +3,25 @@
 author: Sage Gendron
 Module to assist in determining specification sheets required to be included in submittal document generation.
 """
+from itertools import chain
+
+from submittal.DWG import DWG
+
+# spec sheet filename for each (component letter, drawing variant); small packages only have their own A and D sheets
+component_letters: str = 'ABCDE'
+aux_letter: str = 'F'
+spec_sheets: dict[tuple[str, str], str] = {
+    **{(c, 'TYP'): f"{c}.pdf" for c in component_letters + aux_letter},
+    **{(c, 'SM'): f"{c}-SM.pdf" if c in 'AD' else f"{c}.pdf" for c in component_letters + aux_letter},
+    **{(c, 'LG'): f"{c}-LG.pdf" for c in component_letters + aux_letter},
+    **{(c, 'SP1'): f"{c}-SP1.pdf" for c in component_letters + aux_letter},
+    **{(c, 'SP2'): f"{c}-SP2.pdf" for c in component_letters + aux_letter},
+}
+# position of the aux component in the second part of the drawing code (large size codes are one character shorter)
+aux_position: dict[str, int] = {'LG': 1}
+# component sheets always included for a variant
+required_letters: dict[str, str] = {'LG': 'B'}
+
 # GLOBAL VARIABLES FOR controls()
 ctrl_1_sm_part: dict[str, str] = {'24V': 'R-24.pdf', '120V': 'R-120.pdf'}
 ctrl_1_lg_part: dict[str, dict[str, str]] = {
@@ -12,158 +31,71 @@ ctrl_2_sm_part: dict[str, str] = {'24V': 'S-24.pdf', '120V': 'S-120.pdf'}
 ctrl_2_lg_part: dict[str, str] = {'24V': 'T-24.pdf', '120V': 'T-120.pdf'}
 
 
-def lg_spec(dwg_parts, spec_list_lg):
-    """
-    Parses through large drawings to identify spec pages required. Always includes a part 'B' spec sheet.
-
-    :param list dwg_parts: smart kit code (drawing name) split by hyphens
-    :param list spec_list_lg: list of spec sheets identified so far
-    :return: spec_list_lg - list of spec sheets including those identified for this special case 1 type
-    :rtype: list
+def variant(dwg):
     """
-    a: str = 'A-LG.pdf'
-    b: str = 'B-LG.pdf'
-    c: str = 'C-LG.pdf'
-    d: str = 'D-LG.pdf'
-    e: str = 'E-LG.pdf'
-    f: str = 'F-LG.pdf'
-    # loop through first portion of drawing code (ie L2ABCD) to grab spec sheet filenames
-    char: str
-    for char in dwg_parts[0]:
-        if char == 'A' and a not in spec_list_lg:
-            spec_list_lg.append(a)
-        elif char == 'B' and b not in spec_list_lg:
-            spec_list_lg.append(b)
-        elif char == 'C' and c not in spec_list_lg:
-            spec_list_lg.append(c)
-        elif char == 'D' and d not in spec_list_lg:
-            spec_list_lg.append(d)
-        elif char == 'E' and e not in spec_list_lg:
-            spec_list_lg.append(e)
-    # check to ensure 'B' spec included if not already
-    if b not in spec_list_lg:
-        spec_list_lg.append(b)
-    # check for aux spec 'F'
-    if dwg_parts[1][1] == 'F' and f not in spec_list_lg:
-        spec_list_lg.append(f)
-    return spec_list_lg
-
-
-def typ_spec(dwg_parts, is_sm, spec_list):
+    :param DWG dwg: drawing object with its size/special case flags set
+    :return: variant - spec sheet variant of the drawing: 'LG', 'SP2', 'SP1', 'SM', or 'TYP'
+    :rtype: str
     """
-    Loops through characters in the first half of the smart package code to come up with a list of spec sheets required.
+    # large size doesn't have special cases, and special cases don't have small size sheets
+    if dwg.lg:
+        return 'LG'
+    if dwg.sp_case_2:
+        return 'SP2'
+    if dwg.sp_case_1:
+        return 'SP1'
+    return 'SM' if dwg.sm else 'TYP'
 
-    :param list dwg_parts: smart packaage code (drawing name) split by hyphens
-    :param bool is_sm: is this a small package?
-    :param list spec_list: list of spec sheets identified so far
-    :return: spec_list - list of spec sheets including those identified for this special case 1 type
-    :rtype: list
-    """
-    a: str = 'A.pdf'
-    a_sm: str = 'A-SM.pdf'
-    b: str = 'B.pdf'
-    c: str = 'C.pdf'
-    d: str = 'D.pdf'
-    d_sm: str = 'D-SM.pdf'
-    e: str = 'E.pdf'
-    f: str = 'F.pdf'
-    # loop through first portion of drawing code (ie 2ABCD) to grab spec sheet filenames
-    char: str
-    for char in dwg_parts[0]:
-        if char == 'A':
-            # check for small size
-            if is_sm and a_sm not in spec_list:
-                spec_list.append(a_sm)
-            elif not is_sm and a not in spec_list:
-                spec_list.append(a)
-        elif char == 'B' and b not in spec_list:
-            spec_list.append(b)
-        elif char == 'C' and c not in spec_list:
-            spec_list.append(c)
-        elif char == 'D':
-            # check for small size
-            if is_sm and d_sm not in spec_list:
-                spec_list.append(d_sm)
-            elif not is_sm and d not in spec_list:
-                spec_list.append(d)
-        elif char == 'E' and e not in spec_list:
-            spec_list.append(e)
-    # check for aux spec 'F'
-    if dwg_parts[1][2] == 'F' and f not in spec_list:
-        spec_list.append(f)
-
-    return spec_list
-
-
-def sp_case_1(dwg_parts, spec_list):
+
+def drawing_specs(components, suffix, dwg_variant):
     """
-    Grab spec sheet names (literal strings) as required based on components in first half of the smart packaage code.
-    Specifically called if the row is flagged special case 1 in the schedule.
+    Spec sheets for the components in the first half of the smart package code (ie 2ABCD), plus any required sheets and
+    the aux 'F' sheet if called for in the second half.
 
-    :param list dwg_parts: smart package code (drawing name) split by hyphens
-    :param list spec_list: list of spec sheets identified so far
-    :return: spec_list - list of spec sheets including those identified for this special case 1 type
+    :param str components: first part of the drawing code (ie 2ABCD)
+    :param str suffix: second part of the drawing code
+    :param str dwg_variant: spec sheet variant of the drawing (see variant())
+    :return: spec_names - spec sheet filenames in order (repeats are dropped by resolve_specs())
     :rtype: list
     """
-    a: str = 'A-SP1.pdf'
-    b: str = 'B-SP1.pdf'
-    c: str = 'C-SP1.pdf'
-    d: str = 'D-SP1.pdf'
-    e: str = 'E-SP1.pdf'
-    f: str = 'F-SP1.pdf'
-    # loop through first portion of drawing code (ie 2ABCD) to grab spec sheet filenames
-    char: str
-    for char in dwg_parts[0]:
-        if char == 'A' and a not in spec_list:
-            spec_list.append(a)
-        elif char == 'B' and b not in spec_list:
-            spec_list.append(b)
-        elif char == 'C' and c not in spec_list:
-            spec_list.append(c)
-        elif char == 'D' and d not in spec_list:
-            spec_list.append(d)
-        elif char == 'E' and e not in spec_list:
-            spec_list.append(e)
-    # check for aux spec 'F'
-    if dwg_parts[1][2] == 'F' and f not in spec_list:
-        spec_list.append(f)
-    return spec_list
-
-
-def sp_case_2(dwg_parts, spec_list):
+    spec_names: list[str] = [spec_sheets[(c, dwg_variant)] for c in components if c in component_letters]
+    if (required := required_letters.get(dwg_variant)) is not None:
+        spec_names.append(spec_sheets[(required, dwg_variant)])
+    if suffix[aux_position.get(dwg_variant, 2)] == aux_letter:
+        spec_names.append(spec_sheets[(aux_letter, dwg_variant)])
+    return spec_names
+
+
+def resolve_specs(dwgs):
     """
-    Loops through characters in the first half of the smart package code to come up with a list of spec sheets required.
-    Specifically called if special case 2 is one of the connections to the package.
+    Collects the spec sheets for all drawings in a submittal: standard/special case sheets, then large size sheets, then
+    controls sheets, each in the order first called for.
 
-    :param list dwg_parts: smart package code (drawing name) split by hyphens
-    :param list spec_list: list of spec sheets identified so far
-    :return: spec_list - list of spec sheets including those identified for this special case 2 type
+    :param Iterable dwgs: DWG objects in submittal order
+    :return: spec_list - spec sheet filenames in order, without repeats
     :rtype: list
     """
-    a: str = 'A-SP2.pdf'
-    b: str = 'B-SP2.pdf'
-    c: str = 'C-SP2.pdf'
-    d: str = 'D-SP2.pdf'
-    e: str = 'E-SP2.pdf'
-    f: str = 'F-SP2.pdf'
-    # loop through first portion of drawing code (ie 2ABCD) to grab spec sheet filenames
-    char: str
-    for char in dwg_parts[0]:
-        if char == 'A' and a not in spec_list:
-            spec_list.append(a)
-        elif char == 'B' and b not in spec_list:
-            spec_list.append(b)
-        elif char == 'C' and c not in spec_list:
-            spec_list.append(c)
-        elif char == 'D' and d not in spec_list:
-            spec_list.append(d)
-        elif char == 'E' and e not in spec_list:
-            spec_list.append(e)
-    # check for aux spec 'F'
-    if dwg_parts[1][2] == 'F' and f not in spec_list:
-        spec_list.append(f)
-
-    return spec_list
+    # insertion ordered sets (dict keys) of spec sheets by submittal section
+    typ: dict[str, None] = {}
+    lg: dict[str, None] = {}
+    ctrl: dict[str, None] = {}
+
+    dwg: DWG
+    name: str
+    for dwg in dwgs:
+        # split dwg filename by '-' and '&'
+        parts: list[str] = dwg.parts()
+        dwg_variant: str = variant(dwg)
+        section: dict[str, None] = lg if dwg_variant == 'LG' else typ
+        for name in drawing_specs(parts[0], parts[1], dwg_variant):
+            section[name] = None
+
+        # if dwg object flagged to include controls
+        if type(dwg.ctrl_model) not in (None, float):
+            for name in controls(parts[1], dwg.ctrl_model, dwg.ctrl_size, dwg.signal):
+                ctrl[name] = None
+
+    return list(dict.fromkeys(chain(typ, lg, ctrl)))
 
 
 def controls(dwg_suffix, control_pt, control_size, signal):
@@ -175,7 +107,7 @@ def controls(dwg_suffix, control_pt, control_size, signal):
     :param str control_pt: control part number
     :param str control_size: control size
     :param str signal: signal from signal cell in this particular row from schedule
-    :return: controls_list - a list of literal strings indicating spec sheet names for controls parts
+    :return: controls_list - literal strings indicating spec sheet names for controls parts, base sheet first
     :rtype: list
     """
     controls_list: list[str] = []
@@ -193,4 +125,4 @@ def controls(dwg_suffix, control_pt, control_size, signal):
         elif control_pt.startswith('T'):
             controls_list.extend(['T.pdf', ctrl_2_lg_part[signal]])
 
-    return list(set(controls_list))
+    return controls_list
@@ -0,0 +1,179 @@
+# scripts/submittal/spec_library.py
+"""
+author: Sage Gendron
+Consolidated spec sheet library. Every spec sheet in the Specification Pages folder is packed into one merged pdf
+(fonts/logos shared between vendors' sheets are stored once, see submittal.merge) with an index of
+{sheet name: [page offset, page count, content hash, modified time, size]}, so submittal generation opens a single file
+instead of one file per spec sheet. pdfrw resolves objects lazily, so only the pages of the sheets a submittal uses are
+ever parsed from the library.
+
+Sheets edited or added since the library was built are found with one listing of the spec folder and read from their
+own pdf until the library is rebuilt:
+
+    python -m submittal.spec_library
+
+This is the only spec sheet cache: submittals get their spec pages from load_sheets() whether or not they are stitched
+from drawing fragments (see submittal.fragments). Nothing but the library pdf is cached on disk. Sheets read from their
+own pdf are parsed once per process and their ready-made pages kept in memory (keyed by modified time and size, so an
+edited sheet is parsed again), with each caller handed its own copy of the pages (see submittal.merge.copy_pages()).
+"""
+import hashlib
+import os
+import threading
+import time
+
+import msgpack
+from pdfrw import PdfReader
+
+from submittal.merge import copy_pages, write_merged
+
+# relevant location variables
+spec_library_loc: str = r'C:\Estimating\Data\spec_library.pdf'
+spec_library_index_loc: str = r'C:\Estimating\Data\spec_library.msgpack'
+spec_library_version: int = 1
+
+# {'index': library index, 'pages': pdfrw pages of the library} loaded by load_library(), kept for the process
+_library: dict[str, ...] | None = None
+_lock: threading.Lock = threading.Lock()
+# {filepath: ((modified time, size), pages)} of spec sheets parsed from their own pdf by this process
+_sheets: dict[str, tuple[tuple[float, int], list]] = {}
+# counts of where those sheets came from: in-memory pages or read and parsed from the pdf
+stats: dict[str, int] = {'memory': 0, 'read': 0}
+
+
+def build_library(spec_folder):
+    """
+    Packs every spec sheet in spec_folder into the library pdf and writes its index.
+
+    :param str spec_folder: folder holding the individual spec sheets
+    :return: index - dictionary with version, spec folder, build time, library size, and
+        {sheet name: [page offset, page count, sha1, modified time, size]}
+    :rtype: dict
+    """
+    global _library
+
+    sheets: dict[str, list] = {}
+    page_lists: list[list] = []
+    offset: int = 0
+    entry: os.DirEntry
+    for entry in sorted(os.scandir(spec_folder), key=lambda e: e.name):
+        if not entry.is_file() or not entry.name.lower().endswith('.pdf'):
+            continue
+        stat: os.stat_result = entry.stat()
+        with open(entry.path, 'rb') as infile:
+            data: bytes = infile.read()
+        pages: list = PdfReader(fdata=data).pages
+        sheets[entry.name] = [offset, len(pages), hashlib.sha1(data).hexdigest(), stat.st_mtime, stat.st_size]
+        page_lists.append(pages)
+        offset += len(pages)
+
+    # write the library under a temporary name so a submittal being generated never reads a partial library
+    tmp_file: str = f"{spec_library_loc}.{os.getpid()}.tmp"
+    write_merged(tmp_file, page_lists)
+    os.replace(tmp_file, spec_library_loc)
+
+    index: dict[str, ...] = {'version': spec_library_version, 'root': os.path.normcase(os.path.abspath(spec_folder)),
+                             'built': time.time(), 'size': os.path.getsize(spec_library_loc), 'sheets': sheets}
+    with open(spec_library_index_loc, 'wb') as outfile:
+        outfile.write(msgpack.packb(index, use_bin_type=True))
+    _library = None
+    return index
+
+
+def load_library():
+    """
+    :return: library - dictionary of {'index': library index, 'pages': pdfrw pages of the library}, or None if no
+        current library has been built
+    :rtype: dict | None
+    """
+    global _library
+
+    with _lock:
+        if _library is not None and _library['loc'] == spec_library_loc:
+            return _library
+        try:
+            with open(spec_library_index_loc, 'rb') as infile:
+                index: dict[str, ...] = msgpack.unpackb(infile.read(), raw=False)
+            # the library is rewritten before its index, so a size mismatch means a rebuild is in progress
+            if index.get('version') != spec_library_version or os.path.getsize(spec_library_loc) != index['size']:
+                return None
+            pages: list = PdfReader(spec_library_loc).pages
+        except (OSError, ValueError):
+            return None
+        _library = {'loc': spec_library_loc, 'index': index, 'pages': pages}
+        return _library
+
+
+def _current(library, fnames):
+    # library entries of the requested sheets still matching the spec folder (one directory listing per folder)
+    if library is None:
+        return {}
+    sheets: dict[str, list] = library['index']['sheets']
+    current: dict[str, list] = {}
+    listed: dict[str, os.DirEntry] = {}
+    folder: str
+    for folder in {os.path.dirname(f) for f in fnames}:
+        if os.path.normcase(os.path.abspath(folder)) == library['index']['root']:
+            listed.update({os.path.join(folder, e.name): e for e in os.scandir(folder)})
+
+    fname: str
+    for fname in fnames:
+        sheet: list | None = sheets.get(os.path.basename(fname))
+        entry: os.DirEntry | None = listed.get(fname)
+        if sheet is not None and entry is not None and sheet[3:] == [entry.stat().st_mtime, entry.stat().st_size]:
+            current[fname] = sheet
+    return current
+
+
+def load_pages(fname):
+    """
+    :param str fname: filepath of a spec sheet
+    :return: pages - copies of the pdfrw pages of the sheet's own pdf (a new copy on every call)
+    :rtype: list
+    """
+    stat: os.stat_result = os.stat(fname)
+    key: tuple[float, int] = (stat.st_mtime, stat.st_size)
+    # unchanged spec sheets already parsed by this process
+    if (cached := _sheets.get(fname)) is not None and cached[0] == key:
+        stats['memory'] += 1
+        pages: list = cached[1]
+    else:
+        with open(fname, 'rb') as infile:
+            data: bytes = infile.read()
+        stats['read'] += 1
+        # copying resolves every object pdfrw would otherwise parse lazily, so the cached pages are only ever read
+        # (by concurrent callers on concat()'s thread pool) and never parsed again
+        pages = copy_pages(PdfReader(fdata=data).pages)
+        _sheets[fname] = (key, pages)
+
+    return copy_pages(pages)
+
+
+def load_sheets(fnames, pool=None):
+    """
+    :param list fnames: filepaths of spec sheets, in order
+    :param ThreadPoolExecutor pool: optional thread pool to read sheets missing from the library concurrently
+    :return: page_lists - list of each spec sheet's pdfrw pages, taken from the library where its copy is current and
+        from the sheet's own pdf (see load_pages()) otherwise
+    :rtype: list
+    """
+    library: dict[str, ...] | None = load_library()
+    current: dict[str, list] = _current(library, fnames)
+    missing: list[str] = [fname for fname in fnames if fname not in current]
+    loaded: dict[str, list] = dict(zip(missing, pool.map(load_pages, missing) if pool else map(load_pages, missing)))
+
+    page_lists: list[list] = []
+    fname: str
+    for fname in fnames:
+        if (sheet := current.get(fname)) is not None:
+            page_lists.append(library['pages'][sheet[0]:sheet[0] + sheet[1]])
+        else:
+            page_lists.append(loaded[fname])
+    return page_lists
+
+
+if __name__ == '__main__':
+    from product_submittal import spec_loc
+
+    built: dict[str, ...] = build_library(spec_loc)
+    print(f"{len(built['sheets'])} spec sheets packed into {spec_library_loc} ({built['size'] / 1024:.0f} KB)")
@@ -0,0 +1,191 @@
+# scripts/utils/com_profiler.py
+"""
+author: Sage Gendron
+Opt-in instrumentation proxy for xlwings Books. Every range read, write, and copy made through the proxy is recorded
+with its address, cell count, direction, elapsed time, and the line of code that made the call, so the Excel round
+trips that dominate run time can be found and budgeted.
+
+Profiling is enabled by setting the COM_PROFILE environment variable (a summary is written next to the calling
+workbook) or by wrapping a Book directly in benchmarks. Setting COM_ROUND_TRIP_BUDGET (or passing budget=) raises
+RoundTripBudgetExceeded as soon as a run makes more range calls than allowed.
+"""
+import os
+import sys
+import time
+
+from openpyxl.utils.cell import range_boundaries
+
+from utils.rename import rename
+
+
+class RoundTripBudgetExceeded(Exception):
+    pass
+
+
+class ComProfile:
+    def __init__(self, budget=None):
+        self.budget: int | None = budget
+        self.calls: list[tuple[str, str, int, str, float]] = []
+
+    def record(self, site, address, cells, direction, elapsed):
+        """
+        Stores a single Excel round trip and enforces the round trip budget if one was set.
+
+        :param str site: 'file:line function' of the code that made the call
+        :param str address: sheet-qualified range address (ie QUOTE!E15)
+        :param int cells: number of cells in the range
+        :param str direction: 'read', 'write', or 'copy'
+        :param float elapsed: seconds spent in the call
+        :return: None
+        """
+        self.calls.append((site, address, cells, direction, elapsed))
+        if self.budget is not None and len(self.calls) > self.budget:
+            raise RoundTripBudgetExceeded(f"{len(self.calls)} Excel round trips exceeds the budget of {self.budget} "
+                                          f"(last call {direction} {address} from {site}).")
+
+    def summary(self, top=10):
+        """
+        Aggregates recorded calls by call site, worst (most total time) first.
+
+        :param int top: number of call sites to include
+        :return: summary - printable per-run report
+        :rtype: str
+        """
+        sites: dict[str, list] = {}
+        site: str
+        for site, _address, cells, direction, elapsed in self.calls:
+            entry: list = sites.setdefault(site, [0, 0, 0.0, set()])
+            entry[0] += 1
+            entry[1] += cells
+            entry[2] += elapsed
+            entry[3].add(direction)
+
+        total: float = sum(c[4] for c in self.calls)
+        lines: list[str] = [f"{len(self.calls)} round trips, {sum(c[2] for c in self.calls)} cells, "
+                            f"{total * 1000:.1f} ms total",
+                            f"{'calls':>7}{'cells':>9}{'ms':>10}  {'dir':<16}site"]
+        for site, (calls, cells, elapsed, directions) in sorted(sites.items(), key=lambda s: -s[1][2])[:top]:
+            lines.append(f"{calls:>7}{cells:>9}{elapsed * 1000:>10.1f}  {'/'.join(sorted(directions)):<16}{site}")
+        return '\n'.join(lines)
+
+
+def _call_site():
+    # walk out of this module to the first frame belonging to the calling code
+    frame = sys._getframe(2)
+    while frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+def _cell_count(address):
+    try:
+        min_col, min_row, max_col, max_row = range_boundaries(address.replace('$', ''))
+        return (max_row - min_row + 1) * (max_col - min_col + 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+class ProfiledBook:
+    def __init__(self, book, profile=None):
+        self._book = book
+        self.profile: ComProfile = profile or ComProfile()
+        self.sheets: ProfiledSheets = ProfiledSheets(self)
+
+    def __getattr__(self, item):
+        # fullname, save(), close(), app, etc. pass straight through to the wrapped Book
+        return getattr(self._book, item)
+
+
+class ProfiledSheets:
+    def __init__(self, book):
+        self._book: ProfiledBook = book
+
+    def __getitem__(self, item):
+        return ProfiledSheet(self._book._book.sheets[item], self._book.profile)
+
+
+class ProfiledSheet:
+    def __init__(self, sheet, profile):
+        self._sheet = sheet
+        self._profile: ComProfile = profile
+
+    def __getattr__(self, item):
+        return getattr(self._sheet, item)
+
+    def range(self, address):
+        return ProfiledRange(self._sheet.range(address), f"{self._sheet.name}!{address}", self._profile)
+
+
+class ProfiledRange:
+    def __init__(self, rng, address, profile):
+        self._rng = rng
+        self._address: str = address
+        self._profile: ComProfile = profile
+
+    def __getattr__(self, item):
+        return getattr(self._rng, item)
+
+    def _timed(self, direction, func, *args):
+        start: float = time.perf_counter()
+        result = func(*args)
+        self._profile.record(_call_site(), self._address, _cell_count(self._address.split('!')[-1]), direction,
+                             time.perf_counter() - start)
+        return result
+
+    def options(self, *args, **kwargs):
+        return ProfiledRange(self._rng.options(*args, **kwargs), self._address, self._profile)
+
+    @property
+    def value(self):
+        return self._timed('read', getattr, self._rng, 'value')
+
+    @value.setter
+    def value(self, value):
+        self._timed('write', setattr, self._rng, 'value', value)
+
+    @property
+    def formula(self):
+        return self._timed('read', getattr, self._rng, 'formula')
+
+    @formula.setter
+    def formula(self, value):
+        self._timed('write', setattr, self._rng, 'formula', value)
+
+    def copy(self, destination=None):
+        if isinstance(destination, ProfiledRange):
+            destination = destination._rng
+        self._timed('copy', self._rng.copy, destination)
+
+
+def profile(wb, parent=None):
+    """
+    Wraps a Book in a ProfiledBook if profiling was requested via the COM_PROFILE environment variable (or if the Book
+    is opened alongside an already profiled parent Book), otherwise returns the Book untouched.
+
+    :param xw.Book wb: Book to be profiled
+    :param ProfiledBook parent: profiled calling Book to share a round trip record/budget with
+    :return: wb - a ProfiledBook or the original Book
+    :rtype: ProfiledBook | xw.Book
+    """
+    if isinstance(wb, ProfiledBook):
+        return wb
+    if isinstance(parent, ProfiledBook):
+        return ProfiledBook(wb, parent.profile)
+    if not os.environ.get('COM_PROFILE'):
+        return wb
+
+    budget: str | None = os.environ.get('COM_ROUND_TRIP_BUDGET')
+    return ProfiledBook(wb, ComProfile(int(budget) if budget else None))
+
+
+def write_summary(wb):
+    """
+    Writes the per-run round trip summary next to the calling workbook if it was profiled.
+
+    :param ProfiledBook | xw.Book wb: calling Book
+    :return: None - writes PROJECT_COM PROFILE_QUOTENUM.txt when profiling
+    """
+    if not isinstance(wb, ProfiledBook):
+        return
+    with open(rename(wb, 'COM PROFILE', 'txt'), 'w') as outfile:
+        outfile.write(wb.profile.summary())
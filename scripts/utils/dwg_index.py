@@ -0,0 +1,155 @@
+# scripts/utils/dwg_index.py
+"""
+author: Sage Gendron
+Persistent drawing name -> filepath index built from the list_files() crawl of the CAD Drawings folder, so submittal
+generation resolves each drawing with a lookup instead of walking a kit folder per drawing.
+
+The index is stored as msgpack with folder paths interned (each folder is written once and files reference it by
+position), loaded once per process, and refreshed automatically the first time a lookup misses or points at a drawing
+that has since been moved: only the folder the drawing was looked up in (ie its kit type folder) is re-crawled.
+"""
+import os
+import time
+
+import msgpack
+
+from utils import list_dwgs
+
+# relevant location variables
+dwg_index_loc: str = r'C:\Estimating\Data\dwg_index.msgpack'
+dwg_index_version: int = 1
+
+# index loaded by load_index(), kept for the life of the process
+_index: dict[str, ...] | None = None
+
+
+def build_index(dwg_list=None):
+    """
+    Crawls the drawing folders (see list_dwgs.list_files()) and writes the drawing index.
+
+    :param list dwg_list: output of list_dwgs.list_files() if the folders were just crawled, else None to crawl them
+    :return: index - dictionary with version, crawl root, build time, folders, and {pdf name: [folder positions]}
+    :rtype: dict
+    """
+    # skip the header row
+    return _write_index([(path, pdf) for path, _dwg, pdf in (dwg_list or list_dwgs.list_files())[1:]])
+
+
+def refresh_folder(folder):
+    """
+    Re-crawls a single folder (see list_dwgs.crawl()) and replaces the drawings listed under it in the drawing index,
+    keeping the rest of the index as it was.
+
+    :param str folder: folder to re-crawl (ie a kit type folder)
+    :return: index - updated drawing index (see build_index())
+    :rtype: dict
+    """
+    index: dict[str, ...] = load_index()
+
+    # drawings outside the folder are kept from the current index
+    listing: list[tuple[str, str]] = [(index['folders'][i], pdf) for pdf, positions in index['files'].items()
+                                      for i in positions if not _inside(index['folders'][i], folder)]
+    path: str
+    for path, (_mtime, files, _subdirs) in list_dwgs.crawl(folder).items():
+        listing.extend((path, pdf) for pdf in files)
+    return _write_index(listing)
+
+
+def _inside(path, folder):
+    return os.path.normcase(os.path.join(path, '')).startswith(os.path.normcase(os.path.join(folder, '')))
+
+
+def _write_index(listing):
+    # intern the folders of (folder, pdf name) pairs and store the index
+    global _index
+
+    folders: dict[str, int] = {}
+    files: dict[str, list[int]] = {}
+    path: str
+    pdf: str
+    for path, pdf in listing:
+        files.setdefault(pdf, []).append(folders.setdefault(path, len(folders)))
+
+    _index = {'version': dwg_index_version, 'root': list_dwgs.dwg_folder_loc, 'built': time.time(),
+              'folders': list(folders), 'files': files}
+    with open(dwg_index_loc, 'wb') as outfile:
+        outfile.write(msgpack.packb(_index, use_bin_type=True))
+    return _index
+
+
+def load_index(rebuild=False):
+    """
+    :param bool rebuild: re-crawl the drawing folders rather than using the stored index
+    :return: index - drawing index (see build_index()), read from disk at most once per process
+    :rtype: dict
+    """
+    global _index
+
+    if rebuild:
+        return build_index()
+    if _index is not None and _index['root'] == list_dwgs.dwg_folder_loc:
+        return _index
+
+    try:
+        with open(dwg_index_loc, 'rb') as infile:
+            _index = msgpack.unpackb(infile.read(), raw=False)
+    except (FileNotFoundError, ValueError):
+        return build_index()
+    # rebuild indexes written by an older version or for a different drawing folder
+    if _index.get('version') != dwg_index_version or _index.get('root') != list_dwgs.dwg_folder_loc:
+        return build_index()
+    return _index
+
+
+def lookup(index, name, folder=None):
+    """
+    :param dict index: drawing index (see load_index())
+    :param str name: drawing file name including .pdf
+    :param str folder: only return a drawing inside this folder (ie the kit type folder), or None for any folder
+    :return: fpath - filepath of the drawing, or None if it is not in the index
+    :rtype: str | None
+    """
+    i: int
+    for i in index['files'].get(name, []):
+        path: str = index['folders'][i]
+        if not folder or _inside(path, folder):
+            return os.path.join(path, name)
+    return None
+
+
+def resolve(names, folders=None):
+    """
+    Finds the filepath of each drawing. A drawing missing from the index (or moved) has its folder re-crawled, or the
+    whole index rebuilt if it has no folder, at most once per call.
+
+    :param list names: drawing file names including .pdf
+    :param dict folders: optional dictionary of {drawing name: folder the drawing must be found in}
+    :return:
+        - found - dictionary of {drawing name: filepath}
+        - missing - list of drawing names that do not exist in the drawing folders
+    :rtype: (dict, list)
+    """
+    folders = folders or {}
+    index: dict[str, ...] = load_index()
+    found: dict[str, str] = {}
+    missing: list[str] = []
+
+    # folders re-crawled so far (None once the whole index has been rebuilt)
+    refreshed: set[str | None] = set()
+    name: str
+    for name in names:
+        folder: str | None = folders.get(name)
+        fpath: str | None = lookup(index, name, folder)
+        # a miss (or a stale entry) means drawings were added/moved in the folder since the last crawl
+        if (fpath is None or not os.path.exists(fpath)) and not refreshed & {folder, None}:
+            index = refresh_folder(folder) if folder else load_index(rebuild=True)
+            refreshed.add(folder or None)
+            fpath = lookup(index, name, folder)
+
+        # a drawing still listed after the re-crawl can be gone again by now (ie moved while the folder was listed)
+        if fpath is None or not os.path.exists(fpath):
+            missing.append(name)
+        else:
+            found[name] = fpath
+
+    return found, missing
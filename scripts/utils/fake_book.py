@@ -0,0 +1,272 @@
+# scripts/utils/fake_book.py
+"""
+author: Sage Gendron
+In-memory stand-in for the subset of the xlwings Book/Sheet/Range API used by the entry point modules. Backed by an
+openpyxl Workbook so the file written by FakeBook.save() can still be read by pandas via Book.fullname.
+
+Every range read/write/copy/save is counted and timed so that whole workflows can be run and benchmarked on machines
+without an Excel instance (ie a Linux build box).
+"""
+import os
+import time
+from contextlib import contextmanager
+
+import openpyxl
+from openpyxl.formula.translate import Translator
+from openpyxl.utils.cell import get_column_letter, range_boundaries
+
+
+class FakeBook:
+    def __init__(self, fullname, workbook=None):
+        self.fullname: str = fullname
+        self.stats: dict[str, list[int, float]] = {}
+
+        # load an existing file if one was passed, otherwise start from a blank workbook
+        if workbook is not None:
+            self.workbook: openpyxl.Workbook = workbook
+        elif os.path.isfile(fullname):
+            self.workbook = openpyxl.load_workbook(fullname, keep_vba=fullname.endswith('.xlsm'))
+        else:
+            self.workbook = openpyxl.Workbook()
+
+        self.sheets: FakeSheets = FakeSheets(self)
+        self.app: FakeApp = FakeApp()
+
+    def record(self, op, start):
+        """
+        Adds a single call of the given operation to the per-Book call statistics.
+
+        :param str op: name of the operation (ie 'read', 'write', 'formula_read', 'copy', 'save')
+        :param float start: time.perf_counter() value taken when the operation started
+        :return: None
+        """
+        entry: list[int, float] = self.stats.setdefault(op, [0, 0.0])
+        entry[0] += 1
+        entry[1] += time.perf_counter() - start
+
+    def report(self):
+        """
+        Formats the call statistics collected so far as a small table.
+
+        :return: report - one line per operation with call count, total and mean milliseconds
+        :rtype: str
+        """
+        lines: list[str] = [f"{'op':<14}{'calls':>8}{'total ms':>12}{'mean ms':>10}"]
+        op: str
+        for op, (calls, seconds) in sorted(self.stats.items()):
+            lines.append(f"{op:<14}{calls:>8}{seconds * 1000:>12.2f}{seconds * 1000 / calls:>10.3f}")
+        return '\n'.join(lines)
+
+    def save(self, path=None):
+        start: float = time.perf_counter()
+        if path is not None:
+            self.fullname = path
+        self.workbook.save(self.fullname)
+        self.record('save', start)
+
+    def close(self):
+        pass
+
+
+class FakeApp:
+    def quit(self):
+        pass
+
+
+class FakeApi:
+    """
+    Swallows any COM attribute access or call (ie sheet.api.AutoFilter.ShowAllData()) and records it by name.
+    """
+    def __init__(self, calls=None, name='api'):
+        self._calls: list[str] = calls if calls is not None else []
+        self._name: str = name
+
+    def __getattr__(self, item):
+        return FakeApi(self._calls, f"{self._name}.{item}")
+
+    def __call__(self, *args, **kwargs):
+        self._calls.append(self._name)
+
+
+class FakeSheets:
+    def __init__(self, book):
+        self.book: FakeBook = book
+
+    def __getitem__(self, item):
+        if type(item) is int:
+            return FakeSheet(self.book, self.book.workbook.worksheets[item])
+        return FakeSheet(self.book, self.book.workbook[item])
+
+    def __iter__(self):
+        return (FakeSheet(self.book, ws) for ws in self.book.workbook.worksheets)
+
+    def __len__(self):
+        return len(self.book.workbook.worksheets)
+
+
+class FakeSheet:
+    def __init__(self, book, worksheet):
+        self.book: FakeBook = book
+        self.ws = worksheet
+        self.name: str = worksheet.title
+        self.api: FakeApi = FakeApi()
+
+    def range(self, address):
+        return FakeRange(self, address)
+
+
+class FakeRange:
+    def __init__(self, sheet, address, transpose=False):
+        self.sheet: FakeSheet = sheet
+        self.address: str = address.replace('$', '').upper()
+        self.transpose: bool = transpose
+        self.api: FakeApi = FakeApi()
+
+        # openpyxl returns None for the row bounds of whole column references, which are not used by these modules
+        self.min_col, self.min_row, self.max_col, self.max_row = range_boundaries(self.address)
+
+    @property
+    def shape(self):
+        return self.max_row - self.min_row + 1, self.max_col - self.min_col + 1
+
+    @property
+    def count(self):
+        rows, cols = self.shape
+        return rows * cols
+
+    def options(self, transpose=False, **_kwargs):
+        return FakeRange(self.sheet, self.address, transpose)
+
+    def _grid(self):
+        # raw cell contents (values or '=' prefixed formula strings) in row-major order
+        return [list(r) for r in self.sheet.ws.iter_rows(min_row=self.min_row, max_row=self.max_row,
+                                                            min_col=self.min_col, max_col=self.max_col,
+                                                            values_only=True)]
+
+    def _shape_output(self, grid):
+        # mimic xlwings: scalar for one cell, flat list for one row/column, nested lists otherwise
+        rows, cols = self.shape
+        if rows == 1 and cols == 1:
+            return grid[0][0]
+        if rows == 1:
+            return grid[0]
+        if cols == 1:
+            return [r[0] for r in grid]
+        if self.transpose:
+            return [list(c) for c in zip(*grid)]
+        return grid
+
+    def _to_grid(self, value):
+        # expand a scalar/1D/2D input into a 2D grid written from the top left cell like xlwings does
+        if not isinstance(value, (list, tuple)):
+            rows, cols = self.shape
+            return [[value] * cols for _ in range(rows)]
+        if not value or not isinstance(value[0], (list, tuple)):
+            return [[v] for v in value] if self.transpose else [list(value)]
+        if self.transpose:
+            return [list(c) for c in zip(*value)]
+        return [list(r) for r in value]
+
+    def _write(self, grid):
+        r: int
+        row: list
+        for r, row in enumerate(grid):
+            c: int
+            for c, v in enumerate(row):
+                # assign rather than passing value=, which openpyxl ignores for None (so cells would never clear); Excel
+                # stores an empty string as an empty cell
+                self.sheet.ws.cell(row=self.min_row + r, column=self.min_col + c).value = None if v == '' else v
+
+    @property
+    def value(self):
+        start: float = time.perf_counter()
+        grid: list[list] = [[None if type(v) is str and v.startswith('=') else v for v in r] for r in self._grid()]
+        out = self._shape_output(grid)
+        self.sheet.book.record('read', start)
+        return out
+
+    @value.setter
+    def value(self, value):
+        start: float = time.perf_counter()
+        self._write(self._to_grid(value))
+        self.sheet.book.record('write', start)
+
+    @property
+    def formula(self):
+        start: float = time.perf_counter()
+        grid: list[list[str]] = [['' if v is None else str(v) for v in r] for r in self._grid()]
+        self.sheet.book.record('formula_read', start)
+        # xlwings returns a single string for one cell and a tuple of tuples for anything larger
+        if self.count == 1:
+            return grid[0][0]
+        return tuple(tuple(r) for r in grid)
+
+    @formula.setter
+    def formula(self, value):
+        start: float = time.perf_counter()
+        grid: list[list] = self._to_grid(value)
+        self._write([[None if v == '' else v for v in r] for r in grid])
+        self.sheet.book.record('formula_write', start)
+
+    def copy(self, destination=None):
+        """
+        Copies cell contents (values and formulas) onto the destination range's top left cell. Relative formula
+        references are shifted the same way an Excel copy/paste would shift them.
+
+        :param FakeRange destination: range to paste onto
+        :return: None
+        """
+        start: float = time.perf_counter()
+        # copying to the clipboard (no destination) is still a call into Excel
+        if destination is None:
+            self.sheet.book.record('copy', start)
+            return
+        r: int
+        row: list
+        for r, row in enumerate(self._grid()):
+            c: int
+            for c, v in enumerate(row):
+                src: str = f"{get_column_letter(self.min_col + c)}{self.min_row + r}"
+                dest: str = f"{get_column_letter(destination.min_col + c)}{destination.min_row + r}"
+                if type(v) is str and v.startswith('=') and src != dest:
+                    v = Translator(v, origin=src).translate_formula(dest)
+                destination.sheet.ws[dest].value = v
+        self.sheet.book.record('copy', start)
+
+
+class HeadlessBook:
+    """
+    Replacement for the xlwings.Book class while running headless. Book.caller() returns the FakeBook passed in and
+    Book(fullname) opens any other workbook as its own FakeBook (ie customer file templates).
+    """
+    def __init__(self, caller_book):
+        self.caller_book: FakeBook = caller_book
+        self.opened: list[FakeBook] = []
+
+    def caller(self):
+        return self.caller_book
+
+    def __call__(self, fullname):
+        book: FakeBook = FakeBook(fullname)
+        self.opened.append(book)
+        return book
+
+
+@contextmanager
+def as_caller(book):
+    """
+    Temporarily patches xlwings.Book so that entry points calling xw.Book.caller() operate on the given FakeBook.
+
+    :param FakeBook book: workbook to be handed to the entry point
+    :return: HeadlessBook - patched Book class, holds any other books opened during the run
+    :rtype: HeadlessBook
+    """
+    import xlwings as xw
+
+    original = xw.Book
+    headless: HeadlessBook = HeadlessBook(book)
+    xw.Book = headless
+    try:
+        yield headless
+    finally:
+        xw.Book = original
@@ -5,9 +5,11 @@ Read all .pdf files in a directory to an excel file by hierarchically column.
 Copies data into an excel file and the quote generation template file to be referenced in drop down menus for automated
 estimating.
 """
+import msgpack
 import pandas as pd
 import xlwings as xw
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # IMMUTABLE GLOBAL VARIABLES USED FOR EASE IN UPDATING; THIS IS NOT BEST PRACTICE
 # area to copy from list_dwgs to quote generation template file
@@ -17,36 +19,112 @@ copy_area = 'B1:ZZ50'
 dwg_folder_loc = r'C:\Estimating\CAD Drawings'
 list_dwgs_loc = r'C:\Estimating\Data\list_dwgs.xlsx'
 project_template_loc = r'C:\Estimating\Customer\Project Template.xlsm'
+# previous crawl (folder modified times and listings) used to only rescan changed folders
+crawl_cache_loc = r'C:\Estimating\Data\list_dwgs_crawl.msgpack'
 
+# folders (and everything below them) skipped by the crawl
+excluded_dirs = ('_archive', '_edgecase', 'engineer-specific')
+# folder listings run in parallel, as each one is a network round trip on the share
+crawl_workers = 16
 
-def list_files():
+
+def scan_dir(path, cached=None):
+    """
+    Lists a single folder's pdf files and the subfolders to descend into, reusing the cached listing if the folder has
+    not changed (a folder's modified time moves whenever a file or folder directly inside it is added, removed, or
+    renamed).
+
+    :param str path: folder to list
+    :param list cached: [modified time, pdf files, subfolders] from the previous crawl, or None
+    :return: listing - [modified time, pdf files, subfolders]
+    :rtype: list
+    """
+    try:
+        mtime: float = os.stat(path).st_mtime
+        if cached is not None and cached[0] == mtime:
+            return cached
+
+        files: list[str] = []
+        subdirs: list[str] = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    # prune excluded folders here so they are never listed
+                    if not any(x in entry.name.lower() for x in excluded_dirs):
+                        subdirs.append(entry.name)
+                # only grab files with .pdf filetypes
+                elif entry.name.endswith('.pdf'):
+                    files.append(entry.name)
+    # unreadable/removed folders are skipped, as os.walk does
+    except OSError:
+        return [None, [], []]
+
+    return [mtime, files, subdirs]
+
+
+def crawl(root, previous=None):
+    """
+    Lists every folder under root one level at a time, with each level's folders listed in parallel.
+
+    :param str root: top level folder to crawl
+    :param dict previous: {folder: listing} from the previous crawl of root (see scan_dir()), or None
+    :return: tree - dictionary of {folder: [modified time, pdf files, subfolders]}
+    :rtype: dict
+    """
+    previous = previous or {}
+    tree: dict[str, list] = {}
+    frontier: list[str] = [root]
+    with ThreadPoolExecutor(crawl_workers) as pool:
+        while frontier:
+            listings: list[list] = list(pool.map(lambda p: scan_dir(p, previous.get(p)), frontier))
+            next_level: list[str] = []
+            path: str
+            for path, listing in zip(frontier, listings):
+                tree[path] = listing
+                next_level.extend(os.path.join(path, d) for d in listing[2])
+            frontier = next_level
+    return tree
+
+
+def load_crawl():
+    """
+    :return: previous - {folder: listing} from the last crawl of dwg_folder_loc, or {} if there is none
+    :rtype: dict
+    """
+    try:
+        with open(crawl_cache_loc, 'rb') as infile:
+            cache: dict = msgpack.unpackb(infile.read(), raw=False)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return cache['dirs'] if cache.get('root') == dwg_folder_loc else {}
+
+
+def list_files(incremental=True):
     """
     Crawl through drawing directories to find drawings and folder names to be listed in project template.
 
+    :param bool incremental: only rescan folders changed since the previous crawl (else rescan everything)
     :returns: dwg_list (:py:class:'list') - data structure containing dwg files, pdf files, and the paths to get to them
     :rtype: list
     """
     # instantiate list variable to be placed into list_dwgs file with column names
     dwg_list: list[list[str, str, str]] = [['path', 'dwg', 'pdf']]
 
-    # walk through subdirectories to find drawings to be listed for submittal pull and quote production
-    path: str
-    subdir: list[str]
-    files: list[str]
-    for path, subdir, files in os.walk(dwg_folder_loc):
-        # skip folders as follows
-        if '_archive' in path.lower():
-            continue
-        if '_edgecase' in path.lower():
-            continue
-        if 'engineer-specific' in path.lower():
-            continue
-
+    # list all folders, skipping excluded folders and reusing the listings of unchanged folders
+    tree: dict[str, list] = crawl(dwg_folder_loc, load_crawl() if incremental else None)
+    with open(crawl_cache_loc, 'wb') as outfile:
+        outfile.write(msgpack.packb({'root': dwg_folder_loc, 'dirs': tree}, use_bin_type=True))
+
+    # add the drawings to the list in the same (top down) order os.walk visits folders
+    stack: list[str] = [dwg_folder_loc]
+    while stack:
+        path: str = stack.pop()
+        _mtime, files, subdirs = tree[path]
+        file: str
         for file in files:
-            # only grab files with .pdf filetypes
-            if file.endswith('.pdf'):
-                # add the file to the list to be placed into the list_dwgs file
-                dwg_list.append([path, f"{file[:-4]}.dwg", file])
+            # add the file to the list to be placed into the list_dwgs file
+            dwg_list.append([path, f"{file[:-4]}.dwg", file])
+        stack.extend(os.path.join(path, d) for d in reversed(subdirs))
 
     return dwg_list
 
@@ -93,3 +171,6 @@ if __name__ == '__main__':
     file_list = list_files()
     # transpose and place the lists into an Excel file to be copied into the project template
     kit_type_by_column(file_list)
+    # refresh the drawing index used to locate drawings for submittals
+    from utils.dwg_index import build_index
+    build_index(file_list)
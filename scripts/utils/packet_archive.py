@@ -0,0 +1,230 @@
+# scripts/utils/packet_archive.py
+"""
+author: Sage Gendron
+Content-addressed compaction of the DATA packets archived in job folders. Every revision of a quote writes a complete
+packet even though most schedule rows and package BOMs are unchanged from the previous revision, so rows and packages
+are stored once each in an object table keyed by their hash, and each packet is kept as a manifest listing the hashes
+of its rows and packages. Any archived packet can be rebuilt on demand with restore().
+
+    python -m utils.packet_archive [job folder] [archive file]
+"""
+import hashlib
+import os
+import sqlite3
+import sys
+
+import msgpack
+
+from quote.packet import build_packet, load_packet, no_bom_dwgs, package_boms, package_components, row_columns
+from utils.warehouse import file_hash, find_packets
+
+# relevant location variables
+job_folder_loc: str = r'C:\Estimating\Jobs'
+archive_loc: str = r'C:\Estimating\Data\packet_archive.sqlite'
+manifest_version: int = 3
+
+schema: str = """
+CREATE TABLE IF NOT EXISTS objects (
+    hash BLOB PRIMARY KEY,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS manifests (
+    path TEXT PRIMARY KEY,
+    sha1 TEXT NOT NULL,
+    fsize INTEGER NOT NULL,
+    manifest BLOB NOT NULL
+);
+"""
+
+
+def connect(db=None):
+    """
+    :param str db: filepath of the archive (defaults to archive_loc)
+    :return: con - open connection with the archive schema created
+    :rtype: sqlite3.Connection
+    """
+    con: sqlite3.Connection = sqlite3.connect(db or archive_loc)
+    con.executescript(schema)
+    return con
+
+
+def _put(con, obj):
+    # objects are the msgpack encoding of a list, so equal content always hashes the same
+    data: bytes = msgpack.packb(obj, use_bin_type=True)
+    digest: bytes = hashlib.sha1(data).digest()
+    con.execute('INSERT OR IGNORE INTO objects VALUES (?, ?)', (digest, data))
+    return digest
+
+
+def archive_packet(con, fname):
+    """
+    Stores a DATA packet's rows and packages as objects and records its manifest.
+
+    :param sqlite3.Connection con: open archive connection
+    :param str fname: filepath of the DATA packet
+    :return: manifest - dictionary of version, row hashes, package hashes, the components table, and schedule digest
+    :rtype: dict
+    """
+    packet: dict[str, ...] = load_packet(fname)
+    boms: dict[str, tuple[str, list[str], list[int]]] = package_boms(packet)
+    packages: dict[str, list] = packet['packages']
+
+    # rows are stored without their BOMs (see quote.packet); packages hold the BOM as part numbers, not string indexes
+    columns: list[list] = list(packet['rows'].values())
+    manifest: dict[str, ...] = {
+        'version': manifest_version,
+        'rows': [_put(con, list(values)) for values in zip(*columns)],
+        'packages': [_put(con, [k, q, *boms.get(k, (None, [], []))]) for k, q in zip(packages['pkg_key'],
+                                                                                   packages['qty'])],
+        # the engineered components table is a few entries per package, so is kept in the manifest itself
+        'components': packet['components'],
+        'schedule_digest': packet['schedule_digest']
+    }
+    return manifest
+
+
+def _compact_packet(con, fname, archived_sha1):
+    # archive one packet unless unchanged since it was last archived; returns 'archived' or 'unchanged'
+    digest: str = file_hash(fname)
+    if archived_sha1 == digest:
+        return 'unchanged'
+    manifest: dict[str, ...] = archive_packet(con, fname)
+    con.execute('INSERT OR REPLACE INTO manifests VALUES (?, ?, ?, ?)',
+                (fname, digest, os.path.getsize(fname), msgpack.packb(manifest, use_bin_type=True)))
+    return 'archived'
+
+
+def _collect(con):
+    # delete objects no manifest references any more (left behind when a re-archived packet replaced its manifest)
+    live: set[bytes] = set()
+    data: bytes
+    for (data,) in con.execute('SELECT manifest FROM manifests'):
+        manifest: dict[str, ...] = msgpack.unpackb(data, raw=False)
+        live.update(manifest['rows'])
+        live.update(manifest['packages'])
+    orphans: list[tuple[bytes]] = [row for row in con.execute('SELECT hash FROM objects') if row[0] not in live]
+    con.executemany('DELETE FROM objects WHERE hash = ?', orphans)
+    return len(orphans)
+
+
+def compact(root=None, db=None):
+    """
+    Archives every DATA packet under root that is new or changed since the last run. Each packet is archived under its
+    own savepoint, so a packet that can't be read (ie truncated or still being written) is skipped and reported, keeping
+    any earlier archived copy of it, without undoing the rest of the run. When a changed packet replaces its earlier
+    manifest, objects no manifest references any more are deleted.
+
+    :param str root: top level job folder (defaults to job_folder_loc)
+    :param str db: filepath of the archive (defaults to archive_loc)
+    :return: counts - dictionary of {'archived', 'unchanged', 'failed': number of packets, 'collected': number of
+        unreferenced objects deleted}
+    :rtype: dict
+    """
+    counts: dict[str, int] = {'archived': 0, 'unchanged': 0, 'failed': 0, 'collected': 0}
+    con: sqlite3.Connection = connect(db)
+    try:
+        known: dict[str, str] = dict(con.execute('SELECT path, sha1 FROM manifests'))
+        replaced: bool = False
+        with con:
+            con.execute('BEGIN')
+            fname: str
+            for fname in find_packets(root or job_folder_loc):
+                con.execute('SAVEPOINT packet')
+                try:
+                    outcome: str = _compact_packet(con, fname, known.get(fname))
+                    counts[outcome] += 1
+                    replaced = replaced or (outcome == 'archived' and fname in known)
+                except Exception as e:
+                    # leave the packet's archived copy as it was and carry on with the rest
+                    con.execute('ROLLBACK TO packet')
+                    counts['failed'] += 1
+                    print(f"skipped {fname}: {type(e).__name__}: {e}", file=sys.stderr)
+                con.execute('RELEASE packet')
+
+            if replaced:
+                counts['collected'] = _collect(con)
+    finally:
+        con.close()
+
+    return counts
+
+
+def restore(fname, db=None, target=None):
+    """
+    Rebuilds an archived DATA packet from its manifest.
+
+    :param str fname: filepath the packet was archived from
+    :param str db: filepath of the archive (defaults to archive_loc)
+    :param str target: filepath to write the rebuilt packet to (msgpack), or None to only return it
+    :return: packet - DATA packet in the current layout (see quote.packet.load_packet())
+    :rtype: dict
+    """
+    con: sqlite3.Connection = connect(db)
+    try:
+        found: tuple[bytes] | None = con.execute('SELECT manifest FROM manifests WHERE path = ?', (fname,)).fetchone()
+        if found is None:
+            raise Exception(f"{fname} has not been archived.")
+        manifest: dict[str, ...] = msgpack.unpackb(found[0], raw=False)
+
+        hashes: set[bytes] = set(manifest['rows']) | set(manifest['packages'])
+        objects: dict[bytes, bytes] = {}
+        digests: list[bytes] = list(hashes)
+        # stay under SQLite's bound parameter limit
+        i: int
+        for i in range(0, len(digests), 900):
+            chunk: list[bytes] = digests[i:i + 900]
+            objects.update(con.execute(f"SELECT hash, data FROM objects WHERE hash IN ({','.join('?' * len(chunk))})",
+                                       chunk))
+    finally:
+        con.close()
+
+    # expand rows and BOMs back into the schedule rows/package quantities generate_quote() wrote the packet from
+    pkg_quantities: dict[str, float] = {}
+    boms: dict[str, tuple[str, list[str], list[int]]] = {}
+    for digest in manifest['packages']:
+        k, q, dwg, pns, qtys = msgpack.unpackb(objects[digest], raw=False)
+        if q is not None:
+            pkg_quantities[k] = q
+        if dwg is not None:
+            boms[k] = (dwg, pns, qtys)
+    columns: dict[str, list] = {col: [] for col in row_columns}
+    for digest in manifest['rows']:
+        for col, v in zip(row_columns, msgpack.unpackb(objects[digest], raw=False)):
+            columns[col].append(v)
+    json_sch: list[dict[str, ...]] = [dict(zip(columns.keys(), values)) for values in zip(*columns.values())]
+    row: dict[str, ...]
+    for row in json_sch:
+        quoted: bool = row['dwg'] is not None and row['dwg'] not in no_bom_dwgs
+        _dwg, row['part_numbers'], row['part_quantities'] = boms[row['pkg_key']] if quoted else (None, [], [])
+    packet: dict[str, ...] = build_packet(json_sch, pkg_quantities, package_components(manifest),
+                                          # version 2 manifests were archived without the schedule digest
+                                          manifest.get('schedule_digest'))
+
+    if target is not None:
+        with open(target, 'wb') as outfile:
+            outfile.write(msgpack.packb(packet, use_bin_type=True))
+    return packet
+
+
+def report(db=None):
+    """
+    :param str db: filepath of the archive (defaults to archive_loc)
+    :return: summary - dictionary of packets, original bytes, archived bytes (objects plus manifests), and bytes saved
+    :rtype: dict
+    """
+    con: sqlite3.Connection = connect(db)
+    try:
+        packets, original, manifests = con.execute(
+            'SELECT COUNT(*), COALESCE(SUM(fsize), 0), COALESCE(SUM(LENGTH(manifest)), 0) FROM manifests').fetchone()
+        objects, object_bytes = con.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM objects').fetchone()
+    finally:
+        con.close()
+
+    return {'packets': packets, 'objects': objects, 'original bytes': original,
+            'archived bytes': object_bytes + manifests, 'bytes saved': original - object_bytes - manifests}
+
+
+if __name__ == '__main__':
+    # archive new/changed packets and report the space saved across the archive
+    print(compact(*sys.argv[1:3]))
+    print(report(*sys.argv[2:3]))
@@ -1,9 +1,10 @@
 # scripts/utils/rename.py
 """
 author: Sage Gendron
-Reconstructs a filepath based on the xlwings Book object passed to the function. The function is designed around using
-the schema identified at the company of PROJECT_FILENAME_QUOTENUMBER.
+Reconstructs a filepath based on the xlwings Book object (or filepath) passed to the function. The function is
+designed around using the schema identified at the company of PROJECT_FILENAME_QUOTENUMBER.
 """
+import os
 
 
 def rename(wb, fname, ftype):
@@ -11,16 +12,17 @@ def rename(wb, fname, ftype):
     Rename the filepath for a given Excel Workbook based on the double underscore naming schema, the fname parameter,
     and the ftype parameter.
 
-    :param xlwings.Book wb: Excel file with filename/path to be altered
+    :param xlwings.Book | str wb: Excel file (or its filepath) with filename/path to be altered
     :param str fname: new filename to be placed between double underscores
     :param str ftype: new filetype to be placed at the end of the filename (must match file to be exported)
     :return: target - full filepath with new filename/type at the end
     :rtype: str
     """
-    # retrieve filepath for the workbook
-    full_path = wb.fullname
-    # split the filepath by \
-    target = full_path.split('\\')
+    # retrieve filepath for the workbook (headless callers pass the filepath directly)
+    full_path = wb if type(wb) is str else wb.fullname
+    # split the filepath by \ (or by the local separator when run headless off of Windows)
+    sep = '\\' if '\\' in full_path else os.sep
+    target = full_path.split(sep)
     # split the actual filename by _ assuming the file has used the double underscore schema
     name = target[-1].split('_')
     # check to make sure the filename was split properly so the filename can be correctly renamed
@@ -31,6 +33,6 @@ def rename(wb, fname, ftype):
     # set the filetype from .xlsm to the parameter given
     name[-1] = f"{name[-1][:-4]}{ftype}"
     # reassemble the filename and filepath and append the filename at the end
-    target = '\\'.join(target[:-1]) + f"\\{'_'.join(name)}"
+    target = sep.join(target[:-1]) + sep + '_'.join(name)
 
     return target
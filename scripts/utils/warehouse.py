@@ -0,0 +1,268 @@
+# scripts/utils/warehouse.py
+"""
+author: Sage Gendron
+Ingests the DATA packets archived in job folders by generate_quote() into a local SQLite warehouse so historical
+estimates can be mined without re-parsing every packet. Re-runs are incremental: packets whose file hash is unchanged
+are skipped, changed packets are replaced, and packets deleted from the job folders are dropped.
+
+Packages are indexed by a signature (hash of the drawing and sorted BOM), so identical kits quoted on different jobs
+group together regardless of their package keys.
+
+    python -m utils.warehouse [job folder] [warehouse file]
+"""
+import datetime
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+
+from quote.packet import load_packet, package_boms
+
+# relevant location variables
+job_folder_loc: str = r'C:\Estimating\Jobs'
+warehouse_loc: str = r'C:\Estimating\Data\warehouse.sqlite'
+# DATA packet file types written by generate_quote() (see product_quote.data_packet_format)
+packet_types: tuple[str, str] = ('.msgpack', '.json')
+
+schema: str = """
+CREATE TABLE IF NOT EXISTS packets (
+    packet_id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    sha1 TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    fsize INTEGER NOT NULL,
+    job TEXT NOT NULL,
+    quote_num TEXT NOT NULL,
+    quote_date TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rows (
+    packet_id INTEGER NOT NULL REFERENCES packets ON DELETE CASCADE,
+    row_num INTEGER NOT NULL,
+    tag TEXT,
+    qty REAL,
+    eq_type TEXT,
+    pkg_key TEXT,
+    size TEXT,
+    sys_type TEXT,
+    conn_type TEXT,
+    control_type TEXT,
+    dwg TEXT
+);
+CREATE TABLE IF NOT EXISTS packages (
+    packet_id INTEGER NOT NULL REFERENCES packets ON DELETE CASCADE,
+    pkg_key TEXT NOT NULL,
+    qty REAL,
+    dwg TEXT NOT NULL,
+    size TEXT,
+    signature TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS package_parts (
+    packet_id INTEGER NOT NULL REFERENCES packets ON DELETE CASCADE,
+    pkg_key TEXT NOT NULL,
+    part_number TEXT NOT NULL,
+    qty REAL
+);
+CREATE INDEX IF NOT EXISTS ix_packets_date ON packets (quote_date);
+CREATE INDEX IF NOT EXISTS ix_rows_packet ON rows (packet_id);
+CREATE INDEX IF NOT EXISTS ix_rows_size ON rows (size);
+CREATE INDEX IF NOT EXISTS ix_packages_packet ON packages (packet_id);
+CREATE INDEX IF NOT EXISTS ix_packages_dwg ON packages (dwg);
+CREATE INDEX IF NOT EXISTS ix_packages_signature ON packages (signature);
+CREATE INDEX IF NOT EXISTS ix_packages_size ON packages (size, signature);
+CREATE INDEX IF NOT EXISTS ix_parts_part ON package_parts (part_number);
+CREATE INDEX IF NOT EXISTS ix_parts_packet ON package_parts (packet_id, pkg_key);
+"""
+
+
+def connect(db=None):
+    """
+    :param str db: filepath of the warehouse (defaults to warehouse_loc)
+    :return: con - open connection with the warehouse schema created
+    :rtype: sqlite3.Connection
+    """
+    con: sqlite3.Connection = sqlite3.connect(db or warehouse_loc)
+    con.execute('PRAGMA foreign_keys = ON')
+    con.executescript(schema)
+    return con
+
+
+def find_packets(root):
+    """
+    Crawls job folders for DATA packets (PROJECT_DATA_QUOTENUM.msgpack/.json).
+
+    :param str root: top level job folder
+    :return: paths - filepaths of all DATA packets found
+    :rtype: list
+    """
+    paths: list[str] = []
+    path: str
+    files: list[str]
+    for path, _subdir, files in os.walk(root):
+        # skip archived/superseded folders as list_files() does
+        if '_archive' in path.lower():
+            continue
+        paths.extend(os.path.join(path, f) for f in files if '_DATA_' in f and f.endswith(packet_types))
+    return sorted(paths)
+
+
+def file_hash(fname):
+    """
+    :param str fname: filepath to hash
+    :return: digest - hex sha1 digest of the file contents
+    :rtype: str
+    """
+    h = hashlib.sha1()
+    with open(fname, 'rb') as infile:
+        for chunk in iter(lambda: infile.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def kit_signature(dwg, part_numbers, part_quantities):
+    """
+    :param str dwg: drawing code of the package
+    :param list part_numbers: package BOM part numbers
+    :param list part_quantities: package BOM part quantities
+    :return: signature - short hash identifying the kit independent of package key and BOM order
+    :rtype: str
+    """
+    bom: str = ';'.join(f"{pn}x{q:g}" for pn, q in sorted(zip(part_numbers, part_quantities)))
+    return hashlib.sha1(f"{dwg}|{bom}".encode()).hexdigest()[:16]
+
+
+def _load(con, fname, digest, stat):
+    # split PROJECT_DATA_QUOTENUM.ext into the project name and quote number
+    name: list[str] = os.path.splitext(os.path.basename(fname))[0].split('_')
+    cur: sqlite3.Cursor = con.execute(
+        'INSERT INTO packets (path, sha1, mtime, fsize, job, quote_num, quote_date) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (fname, digest, stat.st_mtime, stat.st_size, '_'.join(name[:-2]), name[-1],
+         datetime.date.fromtimestamp(stat.st_mtime).isoformat()))
+    packet_id: int = cur.lastrowid
+
+    packet: dict[str, ...] = load_packet(fname)
+    columns: dict[str, list] = packet['rows']
+    con.executemany('INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    zip([packet_id] * len(columns['tag']), range(len(columns['tag'])), columns['tag'], columns['qty'],
+                        columns['eq_type'], columns['pkg_key'], columns['size'], columns['sys_type'],
+                        columns['conn_type'], columns['control_type'], columns['dwg']))
+
+    # package size is taken from the first scheduled row of the package
+    sizes: dict[str, str] = {}
+    for k, size in zip(columns['pkg_key'], columns['size']):
+        sizes.setdefault(k, size)
+    quantities: dict[str, float] = dict(zip(packet['packages']['pkg_key'], packet['packages']['qty']))
+
+    k: str
+    for k, (dwg, pns, qtys) in package_boms(packet).items():
+        con.execute('INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?)',
+                    (packet_id, k, quantities.get(k), dwg, sizes.get(k), kit_signature(dwg, pns, qtys)))
+        con.executemany('INSERT INTO package_parts VALUES (?, ?, ?, ?)',
+                        [(packet_id, k, pn, q) for pn, q in zip(pns, qtys)])
+
+
+def _ingest_packet(con, fname, prior):
+    # returns which of the ingest counts the packet falls under
+    stat: os.stat_result = os.stat(fname)
+    # only hash files whose modified time or size moved since the last ingest
+    if prior is not None and (prior[3], prior[4]) == (stat.st_mtime, stat.st_size):
+        return 'unchanged'
+    digest: str = file_hash(fname)
+    if prior is not None:
+        if prior[2] == digest:
+            con.execute('UPDATE packets SET mtime = ?, fsize = ? WHERE packet_id = ?',
+                        (stat.st_mtime, stat.st_size, prior[0]))
+            return 'unchanged'
+        con.execute('DELETE FROM packets WHERE packet_id = ?', (prior[0],))
+    _load(con, fname, digest, stat)
+    return 'added' if prior is None else 'updated'
+
+
+def ingest(root=None, db=None):
+    """
+    Loads new and changed DATA packets under root into the warehouse and drops packets that no longer exist. Each packet
+    is loaded under its own savepoint, so a packet that can't be read (ie truncated or written by an older version) is
+    skipped and reported, keeping the warehouse's prior copy of it, without undoing the rest of the ingest.
+
+    :param str root: top level job folder (defaults to job_folder_loc)
+    :param str db: filepath of the warehouse (defaults to warehouse_loc)
+    :return: counts - dictionary of {'added', 'updated', 'unchanged', 'removed', 'failed': number of packets}
+    :rtype: dict
+    """
+    counts: dict[str, int] = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'failed': 0}
+    con: sqlite3.Connection = connect(db)
+    try:
+        known: dict[str, tuple[int, str, float, int]] = {
+            row[1]: row for row in con.execute('SELECT packet_id, path, sha1, mtime, fsize FROM packets')}
+
+        with con:
+            con.execute('BEGIN')
+            fname: str
+            for fname in find_packets(root or job_folder_loc):
+                prior: tuple | None = known.pop(fname, None)
+                con.execute('SAVEPOINT packet')
+                try:
+                    counts[_ingest_packet(con, fname, prior)] += 1
+                except Exception as e:
+                    # leave the packet as it was before this ingest and carry on with the rest
+                    con.execute('ROLLBACK TO packet')
+                    counts['failed'] += 1
+                    print(f"skipped {fname}: {type(e).__name__}: {e}", file=sys.stderr)
+                con.execute('RELEASE packet')
+
+            # anything left in known was deleted from the job folders
+            for packet_id, *_ in known.values():
+                con.execute('DELETE FROM packets WHERE packet_id = ?', (packet_id,))
+                counts['removed'] += 1
+    finally:
+        con.close()
+
+    return counts
+
+
+def jobs_using_part(part_number, db=None):
+    """
+    :param str part_number: part number to search for
+    :param str db: filepath of the warehouse (defaults to warehouse_loc)
+    :return: jobs - list of (job, quote number, quote date, total part quantity) tuples, newest first
+    :rtype: list
+    """
+    con: sqlite3.Connection = connect(db)
+    try:
+        return con.execute(
+            'SELECT p.job, p.quote_num, p.quote_date, SUM(pp.qty * COALESCE(k.qty, 1)) '
+            'FROM package_parts pp '
+            'JOIN packets p ON p.packet_id = pp.packet_id '
+            'JOIN packages k ON k.packet_id = pp.packet_id AND k.pkg_key = pp.pkg_key '
+            'WHERE pp.part_number = ? '
+            'GROUP BY p.packet_id ORDER BY p.quote_date DESC, p.job', (part_number,)).fetchall()
+    finally:
+        con.close()
+
+
+def common_kits_by_size(size=None, top=10, db=None):
+    """
+    :param str size: only include kits of this size (ie '2'), or None for all sizes
+    :param int top: number of kits to return per size
+    :param str db: filepath of the warehouse (defaults to warehouse_loc)
+    :return: kits - list of (size, dwg, signature, jobs quoted on, total kits quoted) tuples, most common first
+    :rtype: list
+    """
+    con: sqlite3.Connection = connect(db)
+    try:
+        return con.execute(
+            'SELECT size, dwg, signature, jobs, kits FROM ('
+            '  SELECT size, dwg, signature, COUNT(DISTINCT packet_id) AS jobs, SUM(COALESCE(qty, 0)) AS kits, '
+            '         ROW_NUMBER() OVER (PARTITION BY size ORDER BY COUNT(DISTINCT packet_id) DESC, '
+            '                                                      SUM(COALESCE(qty, 0)) DESC) AS rank '
+            '  FROM packages WHERE ? IS NULL OR size = ? GROUP BY size, signature, dwg'
+            ') WHERE rank <= ? ORDER BY size, jobs DESC, kits DESC', (size, size, top)).fetchall()
+    finally:
+        con.close()
+
+
+if __name__ == '__main__':
+    # crawl job folders and load new/changed packets into the warehouse
+    start: float = time.perf_counter()
+    result: dict[str, int] = ingest(*sys.argv[1:3])
+    print(', '.join(f"{v} {k}" for k, v in result.items()), f"in {time.perf_counter() - start:.1f} s")
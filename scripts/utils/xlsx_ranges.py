@@ -0,0 +1,173 @@
+# scripts/utils/xlsx_ranges.py
+"""
+author: Sage Gendron
+File-level (Excel-free) equivalents of the xlwings range reads/copies used to move data between workbooks. Source
+ranges are read in a single streaming pass with openpyxl's read-only reader and destination ranges are written into the
+target workbook with a single save.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import shutil
+import zipfile
+from xml.etree import ElementTree
+
+import openpyxl
+from openpyxl.formula.translate import Translator
+from openpyxl.utils.cell import get_column_letter, range_boundaries
+
+# namespaces of the workbook part and its relationships
+main_ns: str = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+rel_ns: str = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+pkg_rel_ns: str = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# direct single cell reference formulas (ie =SCHEDULE!D33 or ='PACKING LIST'!$A$2 or =B4)
+direct_ref: re.Pattern = re.compile(r"^=(?:'?([^'!]+)'?!)?\$?([A-Z]{1,3})\$?(\d+)$")
+
+
+def read_ranges(fname, sheet_name, addresses, data_only=False):
+    """
+    Reads several ranges from one sheet in a single pass over the rows spanning all of them.
+
+    :param str fname: filepath of the workbook to read
+    :param str sheet_name: name of the sheet to read from
+    :param list addresses: A1 style range addresses (ie ['A13:S26', 'B33:L1032'])
+    :param bool data_only: read cached values of formula cells instead of the formulas themselves
+    :return: grids - dictionary of {address: list of rows (lists) of cell contents}
+    :rtype: dict
+    """
+    bounds: dict[str, tuple[int, int, int, int]] = {a: range_boundaries(a) for a in addresses}
+    min_col: int = min(b[0] for b in bounds.values())
+    min_row: int = min(b[1] for b in bounds.values())
+    max_col: int = max(b[2] for b in bounds.values())
+    max_row: int = max(b[3] for b in bounds.values())
+
+    grids: dict[str, list[list]] = {a: [] for a in addresses}
+    wb: openpyxl.Workbook = openpyxl.load_workbook(fname, read_only=True, data_only=data_only)
+    try:
+        r: int
+        row: tuple
+        for r, row in enumerate(wb[sheet_name].iter_rows(min_row=min_row, max_row=max_row, min_col=min_col,
+                                                          max_col=max_col, values_only=True), start=min_row):
+            # read-only sheets can return short rows past the last used cell, so pad them out
+            row = tuple(row) + (None,) * (max_col - min_col + 1 - len(row))
+            address: str
+            for address, (c1, r1, c2, r2) in bounds.items():
+                if r1 <= r <= r2:
+                    grids[address].append(list(row[c1 - min_col:c2 - min_col + 1]))
+    finally:
+        wb.close()
+
+    # rows missing entirely from the end of the sheet are blank
+    for address, (c1, r1, c2, r2) in bounds.items():
+        grids[address].extend([None] * (c2 - c1 + 1) for _ in range(r2 - r1 + 1 - len(grids[address])))
+
+    return grids
+
+
+def sheet_digest(fname, sheet_name):
+    """
+    Hashes the stored XML of one sheet, without parsing its cells, so a sheet can be checked for changes since it was
+    last read far more cheaply than reading it again.
+
+    :param str fname: filepath of the workbook
+    :param str sheet_name: name of the sheet
+    :return: digest - sha1 hex digest of the sheet's XML part
+    :rtype: str
+    """
+    with zipfile.ZipFile(fname) as zf:
+        # the workbook part maps sheet names to relationship ids, and its relationships map those to sheet parts
+        r_id: str = next(sheet.get(f"{rel_ns}id") for sheet in ElementTree.fromstring(zf.read('xl/workbook.xml')).iter(
+            f"{main_ns}sheet") if sheet.get('name') == sheet_name)
+        target: str = next(rel.get('Target') for rel in ElementTree.fromstring(
+            zf.read('xl/_rels/workbook.xml.rels')).iter(f"{pkg_rel_ns}Relationship") if rel.get('Id') == r_id)
+        part: str = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+        return hashlib.sha1(zf.read(part)).hexdigest()
+
+
+def write_ranges(fname, sheet_name, blocks):
+    """
+    Writes blocks of cell contents into a workbook and saves it once. Formulas moved to a different location are
+    translated the same way an Excel copy/paste shifts relative references.
+
+    :param str fname: filepath of the workbook to write (must already exist, ie a copied template)
+    :param str sheet_name: name of the sheet to write to
+    :param list blocks: list of (source address, destination address, grid) tuples
+    :return: None - saves fname
+    """
+    wb: openpyxl.Workbook = openpyxl.load_workbook(fname, keep_vba=fname.endswith('.xlsm'))
+    ws = wb[sheet_name]
+
+    src: str
+    dest: str
+    grid: list[list]
+    for src, dest, grid in blocks:
+        src_col, src_row, _, _ = range_boundaries(src)
+        dest_col, dest_row, _, _ = range_boundaries(dest)
+        shifted: bool = (src_col, src_row) != (dest_col, dest_row)
+
+        r: int
+        row: list
+        for r, row in enumerate(grid):
+            c: int
+            for c, v in enumerate(row):
+                if shifted and type(v) is str and v.startswith('='):
+                    v = Translator(v, origin=f"{get_column_letter(src_col + c)}{src_row + r}").translate_formula(
+                        f"{get_column_letter(dest_col + c)}{dest_row + r}")
+                ws.cell(row=dest_row + r, column=dest_col + c, value=v)
+
+    wb.save(fname)
+
+
+def extract_sheet(fname, sheet_name, target):
+    """
+    Saves a single sheet of a workbook as its own workbook (the file-level equivalent of Sheet.api.Copy() followed by
+    saving the new active book). Formulas are replaced by their values, as references to the other sheets would not
+    survive on their own; values are the cached results Excel saved with the file or, for direct cell references in
+    files never calculated by Excel (ie generated headless), the referenced cell's value. Any other formula with no
+    cached value can't be resolved without Excel, so rather than leave blank cells the extraction fails, naming them.
+
+    :param str fname: filepath of the source workbook
+    :param str sheet_name: name of the sheet to extract
+    :param str target: filepath of the new single sheet workbook
+    :return: None - saves target
+    """
+    # copy the file so the extracted sheet keeps its formatting, column widths, print setup, etc.
+    shutil.copyfile(fname, target)
+    wb: openpyxl.Workbook = openpyxl.load_workbook(target)
+    wb_values: openpyxl.Workbook = openpyxl.load_workbook(fname, data_only=True)
+
+    ws = wb[sheet_name]
+    unresolved: list[str] = []
+    for row in ws.iter_rows():
+        for cell in row:
+            if type(cell.value) is str and cell.value.startswith('='):
+                try:
+                    cell.value = _resolve(wb, wb_values, sheet_name, cell.coordinate)
+                except LookupError:
+                    unresolved.append(cell.coordinate)
+    if unresolved:
+        os.remove(target)
+        raise Exception(f"Please open {os.path.basename(fname)} in Excel, save it so its formulas are calculated, and "
+                        f"try again. {sheet_name} cells with no calculated value: {', '.join(unresolved[:10])}"
+                        f"{f' and {len(unresolved) - 10} more' if len(unresolved) > 10 else ''}")
+
+    # drop every other sheet
+    for other in [s for s in wb.worksheets if s.title != sheet_name]:
+        wb.remove(other)
+    wb.save(target)
+
+
+def _resolve(wb, wb_values, sheet_name, coordinate, depth=0):
+    # cached value if Excel saved one, else follow a chain of direct cell references (LookupError if the chain ends in
+    # any other formula, which only Excel can calculate)
+    value = wb_values[sheet_name][coordinate].value
+    formula = wb[sheet_name][coordinate].value
+    if value is not None:
+        return value
+    if type(formula) is not str or not formula.startswith('='):
+        return formula
+    if depth > 20 or (match := direct_ref.match(formula)) is None or (match[1] or sheet_name) not in wb.sheetnames:
+        raise LookupError(f"{sheet_name}!{coordinate}")
+    return _resolve(wb, wb_values, match[1] or sheet_name, f"{match[2]}{match[3]}", depth + 1)